@@ -0,0 +1,410 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy import sparse
+import functions as fn
+import similaridade as sim
+
+# Grade comum da biblioteca: 1 nm na faixa do LI-180
+GRADE_REFERENCIA = np.arange(380.0, 781.0, 1.0)
+
+PASTA_PLOT_SPECTRA = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'plot_spectra'))
+CAMINHO_PLANILHA_REFERENCIA = os.path.join(PASTA_PLOT_SPECTRA, 'dados', 'spectros_referencia.xlsx')
+PASTA_SOL = os.path.join(PASTA_PLOT_SPECTRA, 'dados', 'sol')
+PASTA_MONOCROMATICAS = os.path.join(PASTA_PLOT_SPECTRA, 'dados_monocromaticas')
+
+# Biblioteca reamostrada gravada na primeira montagem e reaproveitada nas sessões seguintes, enquanto os arquivos de
+# plot_spectra de que ela foi montada não mudarem (arquivo gerado, fora do controle de versão)
+CAMINHO_BIBLIOTECA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'biblioteca_referencia.npz')
+
+# Curvas de absorbância de pigmentos e fotorreceptores da planilha do LI-180: não são fontes de luz e ficam de fora das
+# comparações, a menos que suas categorias sejam pedidas explicitamente
+PREFIXO_ABSORBANCIA = 'Absorbance spectra'
+
+_BIBLIOTECA_PADRAO = None
+_RESULTADOS = {}
+
+
+def matriz_reamostragem(wl_origem: np.ndarray, wl_destino: np.ndarray = GRADE_REFERENCIA) -> sparse.csr_matrix:
+    """
+    Monta a matriz esparsa (destino x origem) da interpolação linear entre duas grades de comprimento de onda, com
+    passos quaisquer (inclusive irregulares). Reamostrar muitos espectros na mesma grade é um único produto:
+    espectros @ M.T. Comprimentos de onda de destino fora da grade de origem recebem zero.
+    """
+    wl_origem = np.asarray(wl_origem, dtype=float)
+    wl_destino = np.asarray(wl_destino, dtype=float)
+    ordem = np.argsort(wl_origem)
+    origem = wl_origem[ordem]
+    dentro = (wl_destino >= origem[0]) & (wl_destino <= origem[-1])
+    linhas = np.flatnonzero(dentro)
+    direita = np.clip(np.searchsorted(origem, wl_destino[linhas], side='right'), 1, len(origem) - 1)
+    esquerda = direita - 1
+    passo = origem[direita] - origem[esquerda]
+    peso = np.where(passo > 0, (wl_destino[linhas] - origem[esquerda]) / np.where(passo > 0, passo, 1), 0.0)
+    return sparse.csr_matrix(
+        (np.concatenate([1 - peso, peso]),
+         (np.concatenate([linhas, linhas]), np.concatenate([ordem[esquerda], ordem[direita]]))),
+        shape=(len(wl_destino), len(wl_origem)))
+
+
+def reamostrar(wl_origem: np.ndarray, espectros: np.ndarray, wl_destino: np.ndarray = GRADE_REFERENCIA) -> np.ndarray:
+    """Reamostra um espectro ou uma matriz (espectros x wl_origem) para 'wl_destino' por interpolação linear."""
+    espectros = np.nan_to_num(np.atleast_2d(np.asarray(espectros, dtype=float)))
+    return np.asarray((matriz_reamostragem(wl_origem, wl_destino) @ espectros.T).T)
+
+
+def _normalizar_pico(matriz: np.ndarray) -> np.ndarray:
+    picos = np.max(matriz, axis=1, keepdims=True)
+    picos[picos <= 0] = 1.0
+    return matriz / picos
+
+
+def ler_planilha_referencia(caminho: str = None) -> list:
+    """
+    Lê os espectros de referência do LI-180 (aba 'Reference Spectrums' de spectros_referencia.xlsx): pares de colunas
+    'Wavelength (nm)' / 'Relative absorbance', com o nome do espectro acima do par e o grupo (pigmentos,
+    fotorreceptores, pigmentos de algas) acima do primeiro espectro de cada grupo.
+
+    Returns:
+        list: Um dict por espectro com 'nome', 'categoria', 'wl' e 'valores'.
+    """
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "A leitura da planilha de referências requer o pacote 'openpyxl'. Instale com: pip install openpyxl")
+    tabela = pd.read_excel(caminho or CAMINHO_PLANILHA_REFERENCIA, sheet_name='Reference Spectrums', header=None)
+    linha_cabecalho = int(np.flatnonzero((tabela.astype(str) == 'Wavelength (nm)').any(axis=1))[0])
+    espectros, categoria = [], ''
+    for coluna in range(tabela.shape[1] - 1):
+        if tabela.iat[linha_cabecalho, coluna] != 'Wavelength (nm)':
+            continue
+        if pd.notna(tabela.iat[linha_cabecalho - 2, coluna]):
+            categoria = str(tabela.iat[linha_cabecalho - 2, coluna]).strip()
+        par = tabela.iloc[linha_cabecalho + 1:, [coluna, coluna + 1]].apply(pd.to_numeric, errors='coerce').dropna()
+        espectros.append({
+            'nome': str(tabela.iat[linha_cabecalho - 1, coluna]).strip(),
+            'categoria': categoria,
+            'wl': par.iloc[:, 0].to_numpy(),
+            'valores': par.iloc[:, 1].to_numpy(),
+        })
+    return espectros
+
+
+class BibliotecaReferencia:
+    """
+    Biblioteca de espectros de referência reamostrados na grade comum de 1 nm (GRADE_REFERENCIA). Os espectros ficam
+    em uma única matriz float32 (referências x comprimentos de onda), normalizados pelo pico; só a forma importa.
+    Espectros de luz ficam em fluxo de fótons (unidade dos arquivos uMOL_).
+
+    Os vetores unitários usados na comparação são calculados uma vez por faixa e guardados; comparar uma campanha
+    inteira com todas as referências é um produto matricial (medições x wl) @ (wl x referências).
+
+    Exemplo:
+        biblioteca = biblioteca_padrao()
+        biblioteca.adicionar_pasta('Caminho/para/pasta_principal/100A', nome='100A')
+        print(biblioteca.melhores(wl, espectros, n=3))
+    """
+
+    def __init__(self, wl: np.ndarray = GRADE_REFERENCIA):
+        self.wl = np.asarray(wl, dtype=float)
+        self.matriz = np.zeros((0, len(self.wl)), dtype=np.float32)
+        self.nomes = []
+        self.categorias = []
+        self.origens = []
+        self.fontes = {}
+        self.versao = 0
+        self._unitarios = {}
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def adicionar_varios(self, nomes: list, wl: np.ndarray, matriz: np.ndarray, categoria: str = '',
+                         origem: str = '') -> None:
+        """
+        Acrescenta vários espectros que compartilham a grade 'wl' (reamostrados de uma vez). Um nome já existente é
+        substituído.
+        """
+        novos = _normalizar_pico(reamostrar(wl, matriz, self.wl)).astype(np.float32)
+        acrescentados = []
+        for nome, espectro in zip(nomes, novos):
+            if nome in self.nomes:
+                i = self.nomes.index(nome)
+                self.matriz[i] = espectro
+                self.categorias[i], self.origens[i] = categoria, origem
+            else:
+                acrescentados.append(espectro)
+                self.nomes.append(nome)
+                self.categorias.append(categoria)
+                self.origens.append(origem)
+        if acrescentados:
+            self.matriz = np.vstack([self.matriz] + acrescentados)
+        self.versao += 1
+        self._unitarios.clear()
+
+    def adicionar(self, nome: str, wl: np.ndarray, valores: np.ndarray, categoria: str = '', origem: str = '') -> None:
+        """Acrescenta (ou substitui) um espectro de referência em qualquer grade de comprimento de onda."""
+        self.adicionar_varios([nome], wl, np.asarray(valores, dtype=float)[None, :], categoria, origem)
+
+    def adicionar_pasta(self, pasta: str, nome: str = None, categoria: str = 'medido', origem: str = None) -> None:
+        """
+        Acrescenta a forma típica (mediana dos espectros normalizados pelo pico) dos arquivos uMOL_ de uma pasta, por
+        exemplo um tratamento medido (100A) usado como especificação da luminária. A origem registrada é a própria
+        pasta, a menos que 'origem' seja informada.
+        """
+        wl, matriz, validos = fn.empilhar_espectros(_arquivos_umol(pasta))
+        if not validos:
+            raise ValueError(f'Nenhum arquivo uMOL_ válido em {pasta}.')
+        mediana = np.nanmedian(_normalizar_pico(np.nan_to_num(matriz)), axis=0)
+        self.adicionar(nome or os.path.basename(os.path.normpath(pasta)), wl, mediana, categoria, origem or pasta)
+
+    def adicionar_csv(self, caminho: str, categoria: str = 'especificacao') -> None:
+        """
+        Acrescenta os espectros de um CSV com a coluna 'Wavelength(nm)' e uma coluna por espectro (mesmo formato de
+        espectros_acao.csv), como curvas de catálogo de LEDs.
+        """
+        tabela = fn.ler_csv(caminho)
+        if 'Wavelength(nm)' not in tabela.columns:
+            raise ValueError("O CSV de referências precisa da coluna 'Wavelength(nm)'.")
+        tabela = tabela.set_index('Wavelength(nm)').sort_index()
+        self.adicionar_varios(list(tabela.columns), tabela.index.to_numpy(dtype=float),
+                              tabela.to_numpy(dtype=float).T, categoria, caminho)
+
+    def selecionar(self, categorias=None) -> np.ndarray:
+        """Índices das referências das categorias informadas (se None, todas exceto as curvas de absorbância)."""
+        if categorias is None:
+            return np.flatnonzero([not c.startswith(PREFIXO_ABSORBANCIA) for c in self.categorias])
+        categorias = [categorias] if isinstance(categorias, str) else list(categorias)
+        return np.flatnonzero(np.isin(np.asarray(self.categorias, dtype=object), categorias))
+
+    def unitarios(self, faixa: tuple = None) -> tuple:
+        """(máscara da faixa na grade, referências unitárias na faixa), calculados uma vez por faixa."""
+        chave = None if faixa is None else (float(faixa[0]), float(faixa[1]))
+        if chave not in self._unitarios:
+            mascara = np.ones(len(self.wl), dtype=bool) if chave is None else \
+                (self.wl >= chave[0]) & (self.wl <= chave[1])
+            self._unitarios[chave] = (mascara, sim.normalizar_espectros(self.matriz[:, mascara])[0])
+        return self._unitarios[chave]
+
+    def comparar(self, wl: np.ndarray, espectros: np.ndarray, faixa: tuple = None, metrica: str = 'sam',
+                 categorias=None) -> np.ndarray:
+        """
+        Compara a forma de cada espectro medido com todas as referências.
+
+        Args:
+            wl (np.ndarray): Comprimentos de onda dos espectros medidos (qualquer passo).
+            espectros (np.ndarray): Matriz (medições x wl) em fluxo de fótons.
+            faixa (tuple, opcional): (início, fim) em nm considerados na comparação. Padrão é None (grade inteira).
+            metrica (str, opcional): 'sam' (ângulo espectral em graus) ou 'cosseno' (similaridade, 1 = idêntico).
+            categorias (opcional): Categorias de referência consideradas. Padrão é None (fontes de luz: todas exceto as
+                curvas de absorbância de pigmentos e fotorreceptores).
+
+        Returns:
+            np.ndarray: Matriz (medições x referências selecionadas).
+        """
+        mascara, referencias = self.unitarios(faixa)
+        selecionadas = self.selecionar(categorias)
+        medidos, _ = sim.normalizar_espectros(reamostrar(wl, espectros, self.wl)[:, mascara])
+        cosseno = np.clip(medidos @ referencias[selecionadas].T, -1.0, 1.0)
+        if metrica == 'cosseno':
+            return cosseno
+        if metrica == 'sam':
+            return np.degrees(np.arccos(cosseno))
+        raise ValueError(f"Métrica desconhecida: {metrica}. Use 'sam' ou 'cosseno'.")
+
+    def melhores(self, wl: np.ndarray, espectros: np.ndarray, n: int = 3, faixa: tuple = None,
+                 categorias=None, comparacao: np.ndarray = None) -> pd.DataFrame:
+        """
+        As n referências mais parecidas com cada espectro (menor ângulo espectral), em colunas 'referencia_1',
+        'angulo_1', 'referencia_2', ...
+        """
+        angulos = self.comparar(wl, espectros, faixa, 'sam', categorias) if comparacao is None else comparacao
+        nomes = np.asarray(self.nomes, dtype=object)[self.selecionar(categorias)]
+        n = min(n, angulos.shape[1])
+        parcial = np.argpartition(angulos, n - 1, axis=1)[:, :n] if n < angulos.shape[1] else \
+            np.tile(np.arange(angulos.shape[1]), (len(angulos), 1))
+        ordem = np.take_along_axis(parcial, np.argsort(np.take_along_axis(angulos, parcial, axis=1), axis=1), axis=1)
+        colunas = {}
+        for k in range(n):
+            colunas[f'referencia_{k + 1}'] = nomes[ordem[:, k]]
+            colunas[f'angulo_{k + 1}'] = np.take_along_axis(angulos, ordem[:, k:k + 1], axis=1)[:, 0]
+        return pd.DataFrame(colunas)
+
+    def salvar(self, caminho: str = CAMINHO_BIBLIOTECA) -> None:
+        """Grava a biblioteca reamostrada em um .npz compacto, com as datas de modificação dos arquivos de origem."""
+        fn.gravar_atomico(caminho, lambda tmp: np.savez_compressed(
+            tmp, wl=self.wl, matriz=self.matriz, nomes=np.asarray(self.nomes, dtype=str),
+            categorias=np.asarray(self.categorias, dtype=str), origens=np.asarray(self.origens, dtype=str),
+            fontes=np.asarray(list(self.fontes), dtype=str),
+            mtimes_fontes=np.asarray(list(self.fontes.values()), dtype=float)))
+
+    @classmethod
+    def carregar(cls, caminho: str = CAMINHO_BIBLIOTECA) -> 'BibliotecaReferencia':
+        """Lê uma biblioteca gravada por salvar."""
+        with np.load(caminho) as arquivo:
+            biblioteca = cls(arquivo['wl'])
+            biblioteca.matriz = arquivo['matriz'].astype(np.float32)
+            biblioteca.nomes = arquivo['nomes'].tolist()
+            biblioteca.categorias = arquivo['categorias'].tolist()
+            biblioteca.origens = arquivo['origens'].tolist()
+            if 'fontes' in arquivo.files:
+                biblioteca.fontes = dict(zip(arquivo['fontes'].tolist(), arquivo['mtimes_fontes'].tolist()))
+        return biblioteca
+
+
+def _relativo(caminho: str) -> str:
+    """Caminho relativo a PASTA_PLOT_SPECTRA, com '/', para que a biblioteca gravada não dependa da máquina."""
+    return os.path.relpath(caminho, PASTA_PLOT_SPECTRA).replace(os.sep, '/')
+
+
+def _arquivos_umol(pasta: str) -> list:
+    return sorted(os.path.join(pasta, a) for a in fn.listar_pasta(pasta)
+                  if a.startswith('uMOL_') and a.endswith('.txt'))
+
+
+def fontes_padrao() -> dict:
+    """{caminho relativo: data de modificação} dos arquivos de plot_spectra usados por montar_biblioteca_padrao."""
+    arquivos = [CAMINHO_PLANILHA_REFERENCIA] if fn.existe(CAMINHO_PLANILHA_REFERENCIA) else []
+    if fn.eh_pasta(PASTA_SOL):
+        arquivos += _arquivos_umol(PASTA_SOL)
+    if fn.eh_pasta(PASTA_MONOCROMATICAS):
+        for cor in sorted(fn.listar_pasta(PASTA_MONOCROMATICAS)):
+            if fn.eh_pasta(os.path.join(PASTA_MONOCROMATICAS, cor)):
+                arquivos += _arquivos_umol(os.path.join(PASTA_MONOCROMATICAS, cor))
+    return {_relativo(a): os.path.getmtime(a) for a in arquivos}
+
+
+def montar_biblioteca_padrao() -> BibliotecaReferencia:
+    """
+    Monta a biblioteca a partir dos dados do lado R (plot_spectra): espectros de referência do LI-180 da planilha
+    spectros_referencia.xlsx (a mesma origem de reference_spectra.RDS), cada medição de luz solar de dados/sol e a
+    forma típica de cada LED monocromático de dados_monocromaticas. As origens ficam relativas a PASTA_PLOT_SPECTRA.
+    """
+    biblioteca = BibliotecaReferencia()
+    biblioteca.fontes = fontes_padrao()
+    for espectro in ler_planilha_referencia():
+        biblioteca.adicionar(espectro['nome'], espectro['wl'], espectro['valores'], espectro['categoria'],
+                             _relativo(CAMINHO_PLANILHA_REFERENCIA))
+    if fn.eh_pasta(PASTA_SOL):
+        wl, matriz, validos = fn.empilhar_espectros(_arquivos_umol(PASTA_SOL))
+        if validos:
+            nomes = [f"Sol {os.path.splitext(os.path.basename(a))[0][len('uMOL_SOL'):]}".strip() for a in validos]
+            biblioteca.adicionar_varios(nomes, wl, matriz, 'Luz solar', _relativo(PASTA_SOL))
+    if fn.eh_pasta(PASTA_MONOCROMATICAS):
+        for cor in sorted(fn.listar_pasta(PASTA_MONOCROMATICAS)):
+            pasta = os.path.join(PASTA_MONOCROMATICAS, cor)
+            if fn.eh_pasta(pasta):
+                biblioteca.adicionar_pasta(pasta, nome=f'LED {cor}', categoria='LED monocromático',
+                                           origem=_relativo(pasta))
+    return biblioteca
+
+
+def biblioteca_padrao(recarregar: bool = False) -> BibliotecaReferencia:
+    """
+    Biblioteca padrão da sessão: lida de CAMINHO_BIBLIOTECA se já tiver sido montada a partir dos arquivos atuais de
+    plot_spectra, ou montada de novo e gravada quando algum arquivo de origem foi acrescentado, removido ou alterado.
+    Use recarregar=True para forçar a remontagem.
+    """
+    global _BIBLIOTECA_PADRAO
+    if _BIBLIOTECA_PADRAO is None or recarregar:
+        gravada = None
+        if os.path.exists(CAMINHO_BIBLIOTECA) and not recarregar:
+            gravada = BibliotecaReferencia.carregar(CAMINHO_BIBLIOTECA)
+            if gravada.fontes != fontes_padrao():
+                print('Os dados de referência de plot_spectra mudaram; a biblioteca será montada de novo.')
+                gravada = None
+        if gravada is not None:
+            _BIBLIOTECA_PADRAO = gravada
+        else:
+            _BIBLIOTECA_PADRAO = montar_biblioteca_padrao()
+            _BIBLIOTECA_PADRAO.salvar(CAMINHO_BIBLIOTECA)
+            print(f'Biblioteca de referência com {len(_BIBLIOTECA_PADRAO)} espectros gravada em: {CAMINHO_BIBLIOTECA}')
+    return _BIBLIOTECA_PADRAO
+
+
+def _comparacao_campanha(pasta_principal: str, biblioteca: BibliotecaReferencia, faixa: tuple) -> tuple:
+    """(espectros da campanha, ângulos medições x todas as referências), calculados uma vez por sessão."""
+    chave = (os.path.abspath(pasta_principal), None if faixa is None else tuple(faixa), id(biblioteca),
+             biblioteca.versao)
+    if chave not in _RESULTADOS:
+        dados = sim.carregar_espectros(pasta_principal)
+        if not len(dados['arquivos']):
+            raise ValueError('Nenhum arquivo uMOL_ encontrado nas subpastas.')
+        todas = sorted(set(biblioteca.categorias))
+        _RESULTADOS[chave] = (dados, biblioteca.comparar(dados['wl'], dados['matriz'], faixa, 'sam', todas))
+    return _RESULTADOS[chave]
+
+
+def comparar_campanha(pasta_principal: str, biblioteca: BibliotecaReferencia = None, n_melhores: int = 3,
+                      faixa: tuple = None, categorias=None, salvar_csv: bool = True) -> pd.DataFrame:
+    """
+    Compara todos os espectros uMOL_ de uma campanha com a biblioteca de referência e lista as referências mais
+    parecidas com cada medição. A matriz de ângulos (medições x referências) é guardada na sessão: consultas
+    seguintes da mesma campanha, faixa e biblioteca (por exemplo com outro n_melhores ou outras categorias) não
+    releem os arquivos nem refazem a comparação.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento (ou pacote de campanha).
+        biblioteca (BibliotecaReferencia, opcional): Padrão é biblioteca_padrao().
+        n_melhores (int, opcional): Quantas referências listar por medição. Padrão é 3.
+        faixa (tuple, opcional): (início, fim) em nm considerados. Padrão é None (380–780 nm).
+        categorias (opcional): Categorias de referência consideradas (ex: 'Luz solar'). Padrão é None (fontes de luz;
+            as curvas de absorbância entram só se suas categorias forem informadas).
+        salvar_csv (bool, opcional): Se True, salva 'correspondencia_referencias.csv' na pasta principal (ao lado do
+            pacote, se a campanha estiver empacotada).
+
+    Returns:
+        pd.DataFrame: Uma linha por arquivo com 'arquivo', 'ID', 'linha', 'coluna' e as colunas de melhores.
+
+    Exemplo:
+        df = comparar_campanha('Caminho/para/pasta_principal', categorias=['Luz solar', 'LED monocromático'])
+        print(df.groupby('ID')['referencia_1'].agg(lambda s: s.mode()[0]))
+    """
+    try:
+        biblioteca = biblioteca_padrao() if biblioteca is None else biblioteca
+        dados, angulos = _comparacao_campanha(pasta_principal, biblioteca, faixa)
+        angulos = angulos[:, biblioteca.selecionar(categorias)]
+        df = pd.concat([
+            pd.DataFrame({'arquivo': [os.path.basename(a) for a in dados['arquivos']], 'ID': dados['grupos'],
+                          'linha': dados['linha'], 'coluna': dados['coluna']}),
+            biblioteca.melhores(None, None, n_melhores, faixa, categorias, comparacao=angulos)], axis=1)
+        if salvar_csv:
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta_principal,
+                                       'correspondencia_referencias.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+            print(f'Correspondência com as referências salva em: {caminho_csv}')
+        return df
+    except Exception as e:
+        print(f'Erro ao comparar a campanha com as referências: {e}')
+        raise
+
+
+def plotar_correspondencias(pasta_principal: str, biblioteca: BibliotecaReferencia = None, faixa: tuple = None,
+                            categorias=None) -> None:
+    """
+    Mapa de calor do ângulo espectral mediano (graus) entre cada tratamento da campanha e cada referência; valores
+    baixos indicam forma parecida. Sem categorias, mostra apenas as fontes de luz (como comparar_campanha).
+    """
+    try:
+        biblioteca = biblioteca_padrao() if biblioteca is None else biblioteca
+        dados, angulos = _comparacao_campanha(pasta_principal, biblioteca, faixa)
+        selecionadas = biblioteca.selecionar(categorias)
+        tabela = pd.DataFrame(angulos[:, selecionadas], columns=np.asarray(biblioteca.nomes)[selecionadas])
+        tabela = tabela.groupby(dados['grupos']).median()
+        fig = go.Figure(go.Heatmap(
+            z=tabela.to_numpy(), x=tabela.columns, y=[fn.NOMES_LEGENDA.get(g, g) for g in tabela.index],
+            colorscale='Viridis_r', colorbar=dict(title='Ângulo (°)'),
+            hovertemplate='%{y} × %{x}<br>Ângulo: %{z:.1f}°<extra></extra>'))
+        fig.update_layout(
+            title='Semelhança com os espectros de referência (ângulo espectral mediano)',
+            xaxis_title='Referência',
+            yaxis_title='Tratamento',
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar a correspondência com as referências: {e}')
+        raise
@@ -0,0 +1,384 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import functions as fn
+import metricas_fotobiologicas as mf
+
+# Tabelas CIE em grade de 1 nm (380–780 nm): observador padrão CIE 1931 2° (x_bar, y_bar, z_bar), vetores S0, S1 e S2
+# do iluminante da série D e amostras de cor de teste TCS01–TCS15 (CIE 13.3; TCS15 é a pele asiática usada no R15).
+CAMINHO_TABELAS_CIE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tabelas_cie.csv')
+
+# Eficácia luminosa máxima (lm/W)
+KM = 683.0
+
+# Acima deste |Duv| a CCT e o IRC não são definidos (o LI-180 grava 0 nesses casos)
+DUV_MAXIMO = 0.05
+
+# Segunda constante de radiação de Planck (m·K); a primeira se cancela na normalização
+C2 = 1.4388e-2
+
+# Grade de temperaturas (K) usada na busca da CCT, espaçada em escala logarítmica
+TEMPERATURAS_CCT = np.geomspace(1000, 100000, 2000)
+
+# Colunas do cabeçalho do ESPD comparadas em verificar_colorimetria
+COLUNAS_CABECALHO = ['LUX', 'LambdaP', 'LambdaD', 'Purity', 'CCT', 'Duv', 'x', 'y', "u'", "v'", 'CRI'] + \
+    [f'R{i}' for i in range(1, 16)]
+
+
+def carregar_tabelas_cie(wl: np.ndarray = None, caminho: str = None) -> pd.DataFrame:
+    """
+    Lê as tabelas CIE (índice = comprimento de onda em nm). Se 'wl' for informado, reamostra todas as colunas
+    para essa grade (zero fora da faixa tabelada).
+    """
+    tabela = pd.read_csv(caminho or CAMINHO_TABELAS_CIE).set_index('Wavelength(nm)').sort_index()
+    if wl is None:
+        return tabela
+    wl = np.asarray(wl, dtype=float)
+    origem = tabela.index.to_numpy(dtype=float)
+    return pd.DataFrame({c: np.interp(wl, origem, tabela[c].to_numpy(), left=0.0, right=0.0) for c in tabela.columns},
+                        index=pd.Index(wl, name='Wavelength(nm)'))
+
+
+def _uv_1960(xyz: np.ndarray) -> tuple:
+    """Coordenadas CIE 1960 (u, v) de tristímulos (..., 3)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominador = xyz[..., 0] + 15 * xyz[..., 1] + 3 * xyz[..., 2]
+        return 4 * xyz[..., 0] / denominador, 6 * xyz[..., 1] / denominador
+
+
+def _planck(wl: np.ndarray, temperaturas: np.ndarray) -> np.ndarray:
+    """Espectros de corpo negro (temperaturas x wl), normalizados para máximo 1 em cada linha."""
+    lam = np.asarray(wl, dtype=float)[None, :] * 1e-9
+    temperaturas = np.asarray(temperaturas, dtype=float)[:, None]
+    with np.errstate(over='ignore'):
+        espectros = lam ** -5 / np.expm1(C2 / (lam * temperaturas))
+    return espectros / espectros.max(axis=1, keepdims=True)
+
+
+def _iluminante_d(tabelas: pd.DataFrame, temperaturas: np.ndarray) -> np.ndarray:
+    """Espectros do iluminante da série D (temperaturas x wl) pelas fórmulas da CIE 15, válidos entre 4000 e 25000 K."""
+    t = np.clip(np.asarray(temperaturas, dtype=float), 4000, 25000)
+    x_d = np.where(t <= 7000,
+                   -4.6070e9 / t ** 3 + 2.9678e6 / t ** 2 + 0.09911e3 / t + 0.244063,
+                   -2.0064e9 / t ** 3 + 1.9018e6 / t ** 2 + 0.24748e3 / t + 0.237040)
+    y_d = -3.0 * x_d ** 2 + 2.87 * x_d - 0.275
+    m = 0.0241 + 0.2562 * x_d - 0.7341 * y_d
+    m1 = (-1.3515 - 1.7703 * x_d + 5.9114 * y_d) / m
+    m2 = (0.0300 - 31.4424 * x_d + 30.0717 * y_d) / m
+    return (tabelas['S0'].to_numpy()[None, :] + m1[:, None] * tabelas['S1'].to_numpy()[None, :]
+            + m2[:, None] * tabelas['S2'].to_numpy()[None, :])
+
+
+def calcular_cct_duv(u: np.ndarray, v: np.ndarray, wl: np.ndarray, tabelas: pd.DataFrame) -> tuple:
+    """
+    CCT e Duv de vários pontos (u, v) CIE 1960 ao mesmo tempo, pelo método de Ohno (2014): busca do ponto mais próximo
+    em uma tabela do lugar de Planck e refinamento parabólico com os dois vizinhos. A distância até toda a tabela é
+    calculada em um produto matricial (pontos x temperaturas).
+
+    Returns:
+        tuple: (CCT em K, Duv com sinal positivo acima do lugar de Planck).
+    """
+    u = np.atleast_1d(np.asarray(u, dtype=float))
+    v = np.atleast_1d(np.asarray(v, dtype=float))
+    cmf = tabelas[['x_bar', 'y_bar', 'z_bar']].to_numpy()
+    up, vp = _uv_1960(_planck(wl, TEMPERATURAS_CCT) @ cmf)
+    # Quadrado da distância até toda a tabela por produto matricial: |p|² - 2 p·q + |q|² (o termo |p|² não muda o mínimo).
+    # Em blocos de pontos, para que a matriz intermediária caiba no cache mesmo com milhares de espectros
+    pontos = np.nan_to_num(np.column_stack([u, v]))
+    tabela = np.column_stack([up, vp])
+    normas = (tabela ** 2).sum(axis=1)
+    i = np.concatenate([np.argmin(normas[None, :] - 2 * pontos[k:k + 512] @ tabela.T, axis=1)
+                        for k in range(0, len(pontos), 512)] or [np.zeros(0, dtype=int)])
+    i = np.clip(i, 1, len(TEMPERATURAS_CCT) - 2)
+    t0, t1, t2 = TEMPERATURAS_CCT[i - 1], TEMPERATURAS_CCT[i], TEMPERATURAS_CCT[i + 1]
+    d0, d1, d2 = (np.hypot(u - up[j], v - vp[j]) for j in (i - 1, i, i + 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (t2 - t1) * (t0 - t2) * (t1 - t0)
+        a = (t0 * (d2 - d1) + t1 * (d0 - d2) + t2 * (d1 - d0)) / x
+        b = -(t0 ** 2 * (d2 - d1) + t1 ** 2 * (d0 - d2) + t2 ** 2 * (d1 - d0)) / x
+        cct = np.where(a > 0, -b / (2 * a), t1)
+    cct = np.clip(cct, t0, t2)
+    # Ponto do lugar de Planck na CCT refinada, interpolado na tabela em escala logarítmica de temperatura
+    log_t = np.log(TEMPERATURAS_CCT)
+    u_cct = np.interp(np.log(cct), log_t, up)
+    v_cct = np.interp(np.log(cct), log_t, vp)
+    duv = np.sign(v - v_cct) * np.hypot(u - u_cct, v - v_cct)
+    cct = np.where(np.isfinite(u) & np.isfinite(v), cct, np.nan)
+    return cct, duv
+
+
+def _comprimento_onda_dominante(x: np.ndarray, y: np.ndarray, tabelas: pd.DataFrame,
+                                branco: tuple = (1 / 3, 1 / 3)) -> tuple:
+    """
+    Comprimento de onda dominante (nm) e pureza de excitação (%) em relação ao branco equienergético.
+    Na região das púrpuras retorna o complementar com sinal negativo, como na CIE 15.
+    """
+    cmf = tabelas[['x_bar', 'y_bar', 'z_bar']].to_numpy()
+    wl_locus = tabelas.index.to_numpy(dtype=float)
+    validos = cmf.sum(axis=1) > 0
+    cmf, wl_locus = cmf[validos], wl_locus[validos]
+    x_l = cmf[:, 0] / cmf.sum(axis=1)
+    y_l = cmf[:, 1] / cmf.sum(axis=1)
+    ang_l = np.unwrap(np.arctan2(y_l - branco[1], x_l - branco[0]))
+    # O ângulo do lugar espectral diminui com o comprimento de onda; inverte para interpolar em ordem crescente
+    ordem = np.argsort(ang_l)
+    ang_l, wl_ord, x_ord, y_ord = ang_l[ordem], wl_locus[ordem], x_l[ordem], y_l[ordem]
+    ang = np.arctan2(y - branco[1], x - branco[0])
+    ang = ang_l[0] + np.mod(ang - ang_l[0], 2 * np.pi)
+    no_locus = ang <= ang_l[-1]
+    ang_comp = np.where(no_locus, ang, ang_l[0] + np.mod(ang - np.pi - ang_l[0], 2 * np.pi))
+    dominante = np.interp(ang_comp, ang_l, wl_ord)
+    dominante = np.where(no_locus, dominante, -dominante)
+    # Pureza: distância ao branco relativa à distância do ponto no lugar espectral ou, para as púrpuras, do ponto na
+    # reta que une as extremidades do lugar espectral, na mesma direção a partir do branco
+    dx, dy = x - branco[0], y - branco[1]
+    x_a, y_a = x_l[0] - branco[0], y_l[0] - branco[1]
+    x_b, y_b = x_l[-1] - x_l[0], y_l[-1] - y_l[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        escala_purpura = (x_a * y_b - y_a * x_b) / (dx * y_b - dy * x_b)
+        x_d = np.where(no_locus, np.interp(ang_comp, ang_l, x_ord) - branco[0], escala_purpura * dx)
+        y_d = np.where(no_locus, np.interp(ang_comp, ang_l, y_ord) - branco[1], escala_purpura * dy)
+        pureza = np.hypot(dx, dy) / np.hypot(x_d, y_d) * 100
+    return dominante, pureza
+
+
+def calcular_irc(espectros: np.ndarray, cct: np.ndarray, wl: np.ndarray, tabelas: pd.DataFrame) -> np.ndarray:
+    """
+    Índices especiais de reprodução de cor R1–R15 (CIE 13.3) de vários espectros ao mesmo tempo.
+    Os tristímulos das 15 amostras sob cada fonte de teste e sob o iluminante de referência (Planck abaixo de 5000 K,
+    série D acima) saem de um produto matricial com a matriz (wl x 45) amostras x observador.
+
+    Returns:
+        np.ndarray: Matriz (espectros x 15) com R1–R15; NaN onde a CCT não está definida.
+    """
+    espectros = np.atleast_2d(np.asarray(espectros, dtype=float))
+    n = len(espectros)
+    cmf = tabelas[['x_bar', 'y_bar', 'z_bar']].to_numpy()
+    amostras = tabelas[[f'TCS{i:02d}' for i in range(1, 16)]].to_numpy().T
+    amostras_cmf = (amostras[:, :, None] * cmf[None, :, :]).transpose(1, 0, 2).reshape(len(wl), -1)
+
+    validos = np.isfinite(cct)
+    t = np.where(validos, cct, 5000.0)
+    referencia = np.where((t < 5000)[:, None], _planck(wl, t), _iluminante_d(tabelas, t))
+
+    def tristimulos(fontes):
+        fator = 100.0 / (fontes @ cmf[:, 1])
+        branco = (fontes @ cmf) * fator[:, None]
+        cores = (fontes @ amostras_cmf).reshape(n, 15, 3) * fator[:, None, None]
+        return branco, cores
+
+    def c_d(u, v):
+        return (4 - u - 10 * v) / v, (1.708 * v + 0.404 - 1.481 * u) / v
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        branco_k, cores_k = tristimulos(espectros)
+        branco_r, cores_r = tristimulos(referencia)
+        uk, vk = _uv_1960(branco_k)
+        ur, vr = _uv_1960(branco_r)
+        uki, vki = _uv_1960(cores_k)
+        uri, vri = _uv_1960(cores_r)
+        ck, dk = c_d(uk, vk)
+        cr, dr = c_d(ur, vr)
+        cki, dki = c_d(uki, vki)
+        # Adaptação cromática de von Kries (CIE 13.3) das amostras sob a fonte de teste para o branco de referência
+        fc = (cr / ck)[:, None] * cki
+        fd = (dr / dk)[:, None] * dki
+        denominador = 16.518 + 1.481 * fc - fd
+        uki_a = (10.872 + 0.404 * fc - 4 * fd) / denominador
+        vki_a = 5.520 / denominador
+
+        def uvw(u, v, y, u_branco, v_branco):
+            w = 25 * np.cbrt(y) - 17
+            return 13 * w * (u - u_branco[:, None]), 13 * w * (v - v_branco[:, None]), w
+
+        u_r, v_r, w_r = uvw(uri, vri, cores_r[..., 1], ur, vr)
+        u_k, v_k, w_k = uvw(uki_a, vki_a, cores_k[..., 1], ur, vr)
+        delta_e = np.sqrt((u_r - u_k) ** 2 + (v_r - v_k) ** 2 + (w_r - w_k) ** 2)
+    indices = 100 - 4.6 * delta_e
+    indices[~validos] = np.nan
+    return indices
+
+
+def calcular_colorimetria(wl: np.ndarray, espectros: np.ndarray, unidade: str = 'energia',
+                          tabelas: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calcula as grandezas colorimétricas de vários espectros de uma vez, em operações vetorizadas do NumPy:
+    tristímulos XYZ (X_cie, Y_cie, Z_cie, em W m⁻² ponderados), x/y, u'/v', iluminância (lux), irradiância (W m⁻²), comprimento de onda de pico, dominante e
+    pureza, CCT, Duv e IRC (Ra = média de R1–R8, mais R1–R15). Funciona para espectros médios ou interpolados.
+
+    Args:
+        wl (np.ndarray): Comprimentos de onda (nm).
+        espectros (np.ndarray): Um espectro ou matriz (espectros x wl). Valores ausentes (NaN) contam como zero.
+        unidade (str, opcional): 'energia' para mW m⁻² nm⁻¹ (ESPD_) ou 'umol' para µmol m⁻² s⁻¹ nm⁻¹ (uMOL_).
+            Padrão é 'energia'.
+        tabelas (pd.DataFrame, opcional): Tabelas CIE já reamostradas para 'wl'. Padrão é carregar CAMINHO_TABELAS_CIE.
+
+    Returns:
+        pd.DataFrame: Uma linha por espectro, com as colunas nomeadas como no cabeçalho do ESPD ('LUX', 'CCT', 'CRI',
+            'R1'…'R15' etc.). CCT e IRC são NaN quando |Duv| > DUV_MAXIMO.
+
+    Exemplo:
+        colecao = fn.ColecaoMedicoes.de_pasta('Caminho/para/100B')
+        cores = calcular_colorimetria(colecao.wl, colecao.espectros)
+    """
+    if unidade not in ('umol', 'energia'):
+        raise ValueError(f"Unidade desconhecida: {unidade}. Use 'energia' ou 'umol'.")
+    wl = np.asarray(wl, dtype=float)
+    espectros = np.atleast_2d(np.nan_to_num(np.asarray(espectros, dtype=float)))
+    if unidade == 'umol':
+        espectros = espectros * mf.FATOR_FOTONS / wl[None, :]
+    tabelas = carregar_tabelas_cie(wl) if tabelas is None else tabelas
+    delta = np.gradient(wl) if len(wl) > 1 else np.ones(1)
+    watts = espectros * delta[None, :] / 1000.0
+    cmf = tabelas[['x_bar', 'y_bar', 'z_bar']].to_numpy()
+
+    xyz = watts @ cmf
+    with np.errstate(divide='ignore', invalid='ignore'):
+        soma = xyz.sum(axis=1)
+        x = xyz[:, 0] / soma
+        y = xyz[:, 1] / soma
+    u, v = _uv_1960(xyz)
+    cct, duv = calcular_cct_duv(u, v, wl, tabelas)
+    cct = np.where(np.abs(duv) <= DUV_MAXIMO, cct, np.nan)
+    dominante, pureza = _comprimento_onda_dominante(x, y, tabelas)
+    indices = calcular_irc(espectros, cct, wl, tabelas)
+
+    df = pd.DataFrame({
+        'X_cie': xyz[:, 0], 'Y_cie': xyz[:, 1], 'Z_cie': xyz[:, 2],
+        'LUX': KM * xyz[:, 1],
+        'IRR': watts.sum(axis=1),
+        'LambdaP': wl[np.argmax(espectros, axis=1)],
+        'LambdaD': dominante,
+        'Purity': pureza,
+        'CCT': cct,
+        'Duv': duv,
+        'x': x,
+        'y': y,
+        "u'": u,
+        "v'": 1.5 * v,
+        'CRI': indices[:, :8].mean(axis=1),
+    })
+    for i in range(15):
+        df[f'R{i + 1}'] = indices[:, i]
+    return df
+
+
+def verificar_colorimetria(pasta_principal: str, salvar_csv: bool = True) -> tuple:
+    """
+    Recalcula a colorimetria de todos os arquivos ESPD_ das subpastas a partir do bloco espectral e compara com os
+    valores gravados pelo LI-180 no cabeçalho. Zeros do cabeçalho em CCT, CRI e R1–R15 (grandeza não definida) são
+    tratados como ausentes, assim como o Duv dessas medições. Nas púrpuras, LambdaD e pureza seguem convenções
+    diferentes (ver _comprimento_onda_dominante) e também não são comparados.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        salvar_csv (bool, opcional): Se True, salva 'verificacao_colorimetria.csv' na pasta principal (ao
+            lado do pacote, se a campanha estiver empacotada). Padrão é True.
+
+    Returns:
+        tuple: (tabela com valores calculados, do cabeçalho e diferenças por arquivo,
+            resumo com a diferença absoluta mediana e máxima por grandeza).
+    """
+    try:
+        registros, espectros, wl = [], [], None
+        for subpasta in sorted(fn.listar_pasta(pasta_principal)):
+            caminho_sub = os.path.join(pasta_principal, subpasta)
+            if not fn.eh_pasta(caminho_sub):
+                continue
+            for arquivo in sorted(fn.listar_pasta(caminho_sub)):
+                if not (arquivo.startswith('ESPD_') and arquivo.endswith('.txt')):
+                    continue
+                cabecalho, wl_arquivo, espectro = fn.ler_arquivo_espd(os.path.join(caminho_sub, arquivo))
+                if wl is None:
+                    wl = wl_arquivo
+                elif len(wl_arquivo) != len(wl) or not np.allclose(wl_arquivo, wl):
+                    espectro = np.interp(wl, wl_arquivo, espectro)
+                registros.append({'pasta': subpasta, 'arquivo': arquivo,
+                                  **{c: cabecalho.get(c, np.nan) for c in COLUNAS_CABECALHO}})
+                espectros.append(espectro)
+        if not registros:
+            return pd.DataFrame(), pd.DataFrame()
+
+        cabecalhos = pd.DataFrame(registros)
+        calculado = calcular_colorimetria(wl, np.vstack(espectros))
+        # Fora do lugar de Planck o LI-180 grava CCT e IRC zerados e um Duv com outra convenção; só são comparados
+        # onde a CCT é definida
+        nao_definidos = ['CCT', 'Duv', 'CRI'] + [f'R{i}' for i in range(1, 16)]
+        cabecalhos[nao_definidos] = cabecalhos[nao_definidos].where(cabecalhos['CCT'] != 0)
+        # Para as púrpuras o LI-180 grava LambdaD = 380 nm e a pureza em relação a esse ponto, em vez do complementar
+        purpuras = calculado['LambdaD'].to_numpy() < 0
+        cabecalhos.loc[purpuras, ['LambdaD', 'Purity']] = np.nan
+        df = cabecalhos[['pasta', 'arquivo']].copy()
+        linhas_resumo = []
+        for coluna in COLUNAS_CABECALHO:
+            df[f'{coluna}_calculado'] = calculado[coluna]
+            df[f'{coluna}_cabecalho'] = cabecalhos[coluna]
+            diferenca = calculado[coluna] - cabecalhos[coluna]
+            df[f'{coluna}_diferenca'] = diferenca
+            linhas_resumo.append({'grandeza': coluna, 'n': int(diferenca.notna().sum()),
+                                  'mediana_abs': diferenca.abs().median(), 'maximo_abs': diferenca.abs().max()})
+        resumo = pd.DataFrame(linhas_resumo)
+        if salvar_csv:
+            # Pacotes são somente leitura: a tabela fica ao lado do pacote
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta_principal,
+                                       'verificacao_colorimetria.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+            print(f'Verificação da colorimetria salva em: {caminho_csv}')
+        return df, resumo
+    except Exception as e:
+        print(f'Erro ao verificar a colorimetria: {e}')
+        raise
+
+
+def rotular_tratamentos(pasta_principal: str, salvar_csv: bool = True) -> pd.DataFrame:
+    """
+    Gera a tabela para etiquetas das luminárias: espectro médio de cada tratamento (subpasta) e suas grandezas
+    colorimétricas e fotométricas, todas calculadas em uma única chamada de calcular_colorimetria.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        salvar_csv (bool, opcional): Se True, salva 'etiquetas_colorimetria.csv' na pasta principal (ao lado
+            do pacote, se a campanha estiver empacotada). Padrão é True.
+
+    Returns:
+        pd.DataFrame: Uma linha por tratamento, com nome de legenda, número de pontos, PPFD e PFD médios e a
+            colorimetria do espectro médio.
+    """
+    try:
+        inicio = time.perf_counter()
+        colecao = fn.ColecaoMedicoes()
+        pastas = []
+        for subpasta in sorted(fn.listar_pasta(pasta_principal)):
+            caminho_sub = os.path.join(pasta_principal, subpasta)
+            if not fn.eh_pasta(caminho_sub):
+                continue
+            antes = len(colecao)
+            fn.ColecaoMedicoes.de_pasta(caminho_sub, espectros=True, colecao=colecao)
+            pastas.extend([subpasta] * (len(colecao) - antes))
+        if not pastas:
+            return pd.DataFrame()
+        pastas = np.array(pastas)
+        nomes = sorted(set(pastas))
+        medios = np.vstack([np.nanmean(colecao.espectros[pastas == p], axis=0) for p in nomes])
+        dados = colecao.dados
+        df = pd.DataFrame({
+            'pasta': nomes,
+            'tratamento': [fn.NOMES_LEGENDA.get(p, p) for p in nomes],
+            'n_pontos': [int((pastas == p).sum()) for p in nomes],
+            'PPFD_medio': [float(np.nanmean(dados['PPFD'][pastas == p])) for p in nomes],
+            'PFD_medio': [float(np.nanmean(dados['PFD'][pastas == p])) for p in nomes],
+        })
+        df = pd.concat([df, calcular_colorimetria(colecao.wl, medios).drop(columns=['X_cie', 'Y_cie', 'Z_cie'])], axis=1)
+        if salvar_csv:
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta_principal,
+                                       'etiquetas_colorimetria.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+            print(f'Tabela de etiquetas salva em: {caminho_csv}')
+        print(f'{len(nomes)} tratamentos rotulados em {time.perf_counter() - inicio:.2f} s.')
+        return df
+    except Exception as e:
+        print(f'Erro ao rotular tratamentos: {e}')
+        raise
@@ -0,0 +1,378 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy import stats
+import functions as fn
+
+
+def _carregar_pastas(pastas: list) -> tuple:
+    """
+    Lê as pastas de tratamento [(grupo, caminho), ...] para uma única ColecaoMedicoes.
+
+    Returns:
+        tuple: (coleção, array com o grupo de cada medição).
+    """
+    colecao = fn.ColecaoMedicoes()
+    grupos = []
+    for grupo, caminho in pastas:
+        antes = len(colecao)
+        fn.ColecaoMedicoes.de_pasta(caminho, espectros=True, colecao=colecao)
+        grupos.extend([grupo] * (len(colecao) - antes))
+    return colecao, np.array(grupos, dtype=object)
+
+
+def _subpastas(pasta_principal: str) -> list:
+    return [(p, os.path.join(pasta_principal, p)) for p in sorted(fn.listar_pasta(pasta_principal))
+            if fn.eh_pasta(os.path.join(pasta_principal, p))]
+
+
+def chaves_posicao(indices_grupo: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Chave inteira única de cada medição: grupo, linha (X) e coluna (Y) da grade."""
+    return (np.asarray(indices_grupo, dtype=np.int64) * 100 + np.asarray(x, dtype=np.int64) * 10
+            + np.asarray(y, dtype=np.int64))
+
+
+def alinhar_indices(chaves_a: np.ndarray, chaves_b: np.ndarray) -> tuple:
+    """
+    Alinha duas listas de medições pela chave de posição com busca binária (np.searchsorted), sem merge de DataFrames.
+    As chaves de B devem ser únicas (veja medias_por_posicao); com repetições, o par depende da ordem de leitura.
+
+    Returns:
+        tuple: (índices em A, índices em B) dos pares encontrados, na ordem de A.
+    """
+    ordem = np.argsort(chaves_b, kind='stable')
+    ordenadas = chaves_b[ordem]
+    posicao = np.clip(np.searchsorted(ordenadas, chaves_a), 0, max(len(ordenadas) - 1, 0))
+    encontrados = ordenadas[posicao] == chaves_a if len(ordenadas) else np.zeros(len(chaves_a), dtype=bool)
+    return np.nonzero(encontrados)[0], ordem[posicao[encontrados]]
+
+
+def medias_por_posicao(colecao: 'fn.ColecaoMedicoes', grupos: np.ndarray, indice_grupos: dict,
+                       wl: np.ndarray = None) -> dict:
+    """
+    Reduz uma coleção a uma medição por (grupo, X, Y): posições remedidas no mesmo grupo viram a média de PPFD, PFD e
+    espectro das leituras, independente da ordem em que os arquivos foram lidos.
+
+    Args:
+        colecao (ColecaoMedicoes): Medições com espectros.
+        grupos (np.ndarray): Grupo de cada medição.
+        indice_grupos (dict): Código inteiro de cada grupo, comum às coleções comparadas.
+        wl (np.ndarray, opcional): Comprimentos de onda de saída; espectros em outra grade são interpolados.
+
+    Returns:
+        dict: {'chaves' (ordenadas e únicas), 'grupos', 'X', 'Y', 'PPFD', 'PFD', 'espectros', 'arquivos' (nomes das
+            leituras da posição em ordem alfabética, unidos por ' + '), 'n_leituras'}.
+    """
+    dados = colecao.dados
+    chaves = chaves_posicao([indice_grupos[g] for g in grupos], dados['X'], dados['Y'])
+    unicas, inverso, contagem = np.unique(chaves, return_inverse=True, return_counts=True)
+    espectros = np.asarray(colecao.espectros, dtype=np.float64)
+    if wl is not None and colecao.wl is not None and (len(colecao.wl) != len(wl) or not np.allclose(colecao.wl, wl)):
+        espectros = np.vstack([np.interp(wl, colecao.wl, e) for e in espectros])
+
+    def media(valores):
+        soma = np.zeros((len(unicas),) + valores.shape[1:])
+        np.add.at(soma, inverso, valores)
+        return soma / contagem.reshape((-1,) + (1,) * (valores.ndim - 1))
+
+    primeira = np.zeros(len(unicas), dtype=np.int64)
+    primeira[inverso[::-1]] = np.arange(len(chaves))[::-1]
+    arquivos = pd.Series(colecao.arquivos, dtype=object).groupby(inverso).agg(lambda s: ' + '.join(sorted(s)))
+    return {
+        'chaves': unicas,
+        'grupos': np.asarray(grupos, dtype=object)[primeira],
+        'X': dados['X'][primeira].astype(np.int64),
+        'Y': dados['Y'][primeira].astype(np.int64),
+        'PPFD': media(dados['PPFD'].astype(np.float64)),
+        'PFD': media(dados['PFD'].astype(np.float64)),
+        'espectros': media(espectros),
+        'arquivos': arquivos.to_numpy(dtype=object),
+        'n_leituras': contagem,
+    }
+
+
+def _ajustar_bh(p: np.ndarray) -> np.ndarray:
+    """Valores-p ajustados por Benjamini-Hochberg (taxa de falsas descobertas); NaN são ignorados."""
+    p = np.asarray(p, dtype=float)
+    ajustado = np.full_like(p, np.nan)
+    validos = np.isfinite(p)
+    if not validos.any():
+        return ajustado
+    pv = p[validos]
+    ordem = np.argsort(pv)
+    m = len(pv)
+    q = pv[ordem] * m / np.arange(1, m + 1)
+    q = np.minimum.accumulate(q[::-1])[::-1]
+    resultado = np.empty(m)
+    resultado[ordem] = np.clip(q, 0, 1)
+    ajustado[validos] = resultado
+    return ajustado
+
+
+def comparar_colecoes(colecao_a: 'fn.ColecaoMedicoes', grupos_a: np.ndarray, colecao_b: 'fn.ColecaoMedicoes',
+                      grupos_b: np.ndarray, alfa: float = 0.05, limiar_z: float = 3.5,
+                      dispersao_minima: float = 0.01) -> dict:
+    """
+    Compara duas coleções ponto a ponto. As medições são alinhadas por (grupo, X, Y) e todas as diferenças e razões
+    (PPFD, PFD e espectros inteiros) são calculadas de uma vez sobre os arrays alinhados. Posições remedidas no mesmo
+    grupo entram pela média das leituras (medias_por_posicao), em qualquer ordem de leitura, e são contadas no resumo.
+
+    Significância:
+        - por grupo: teste t pareado e de Wilcoxon da diferença de PPFD entre os pontos;
+        - por ponto: escore z robusto do log da razão B/A dentro do grupo, que separa mudanças locais (luminária
+          deslocada ou trocada) da mudança geral do grupo;
+        - por comprimento de onda: teste t pareado entre os pontos do grupo, com correção de Benjamini-Hochberg.
+
+    Args:
+        colecao_a, colecao_b (ColecaoMedicoes): Medições da campanha de referência (A) e da nova (B).
+        grupos_a, grupos_b (np.ndarray): Grupo (subpasta) de cada medição.
+        alfa (float, opcional): Nível de significância. Padrão é 0.05.
+        limiar_z (float, opcional): |z| acima do qual um ponto é marcado como mudança local. Padrão é 3.5.
+        dispersao_minima (float, opcional): Piso da dispersão robusta do log da razão (0.01 ≈ 1 %, repetibilidade
+            típica do LI-180), para que grupos com mudança uniforme não marquem diferenças de arredondamento.
+
+    Returns:
+        dict: {'pontos', 'resumo', 'comprimentos_onda' (DataFrames), 'wl', 'delta_espectros', 'grupos_pares',
+            'nao_pareados_a', 'nao_pareados_b' (posições (grupo, X, Y) sem par, como 'grupo', 'linha', 'coluna')}.
+    """
+    nomes = sorted(set(grupos_a) | set(grupos_b))
+    indice = {g: i for i, g in enumerate(nomes)}
+    wl = colecao_a.wl
+    a = medias_por_posicao(colecao_a, grupos_a, indice)
+    b = medias_por_posicao(colecao_b, grupos_b, indice, wl)
+    ia, ib = alinhar_indices(a['chaves'], b['chaves'])
+    grupos_pares = a['grupos'][ia]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pontos = pd.DataFrame({
+            'grupo': grupos_pares,
+            'arquivo_a': a['arquivos'][ia],
+            'arquivo_b': b['arquivos'][ib],
+            'linha': a['X'][ia],
+            'coluna': a['Y'][ia],
+            'n_leituras_a': a['n_leituras'][ia],
+            'n_leituras_b': b['n_leituras'][ib],
+        })
+        for variavel in ('PPFD', 'PFD'):
+            va, vb = a[variavel][ia], b[variavel][ib]
+            pontos[f'{variavel}_a'] = va
+            pontos[f'{variavel}_b'] = vb
+            pontos[f'delta_{variavel}'] = vb - va
+            pontos[f'razao_{variavel}'] = vb / va
+
+        espectros_a = a['espectros'][ia]
+        espectros_b = b['espectros'][ib]
+        delta_espectros = espectros_b - espectros_a
+
+        log_razao = np.log(pontos['razao_PPFD'].to_numpy())
+    z = np.full(len(pontos), np.nan)
+    linhas_resumo, linhas_wl = [], []
+    for grupo in nomes:
+        membros = grupos_pares == grupo
+        n = int(membros.sum())
+        if n == 0:
+            continue
+        lr = log_razao[membros]
+        finitos = np.isfinite(lr)
+        if finitos.sum() > 2:
+            mediana = np.median(lr[finitos])
+            mad = max(1.4826 * np.median(np.abs(lr[finitos] - mediana)), dispersao_minima)
+            z[membros] = (lr - mediana) / mad
+
+        delta = pontos.loc[membros, 'delta_PPFD'].to_numpy()
+        p_t = p_w = np.nan
+        if n > 2:
+            p_t = stats.ttest_rel(pontos.loc[membros, 'PPFD_b'], pontos.loc[membros, 'PPFD_a']).pvalue
+            if np.any(delta != 0):
+                p_w = stats.wilcoxon(delta).pvalue
+        media_a = pontos.loc[membros, 'PPFD_a'].mean()
+        linhas_resumo.append({
+            'grupo': grupo, 'n_pares': n,
+            'n_nao_pareados_a': int(np.sum(a['grupos'] == grupo)) - n,
+            'n_nao_pareados_b': int(np.sum(b['grupos'] == grupo)) - n,
+            'n_duplicados_a': int(np.sum(a['n_leituras'][a['grupos'] == grupo] - 1)),
+            'n_duplicados_b': int(np.sum(b['n_leituras'][b['grupos'] == grupo] - 1)),
+            'PPFD_medio_a': media_a, 'PPFD_medio_b': pontos.loc[membros, 'PPFD_b'].mean(),
+            'delta_PPFD_medio': delta.mean(), 'variacao_%': 100 * delta.mean() / media_a if media_a else np.nan,
+            'p_t_pareado': p_t, 'p_wilcoxon': p_w, 'significativo': bool(p_t < alfa) if np.isfinite(p_t) else False,
+        })
+
+        # Teste t pareado em todos os comprimentos de onda de uma vez (eixo 0 = pontos)
+        d = delta_espectros[membros]
+        media_d = d.mean(axis=0)
+        if n > 2:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                p_wl = stats.ttest_rel(espectros_b[membros], espectros_a[membros], axis=0).pvalue
+        else:
+            p_wl = np.full(len(wl), np.nan)
+        p_aj = _ajustar_bh(p_wl)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            razao_wl = espectros_b[membros].mean(axis=0) / espectros_a[membros].mean(axis=0)
+        linhas_wl.append(pd.DataFrame({
+            'grupo': grupo, 'Wavelength(nm)': wl, 'delta_medio': media_d,
+            'delta_desvio': d.std(axis=0, ddof=1) if n > 1 else np.zeros(len(wl)),
+            'razao_media': razao_wl, 'p_valor': p_wl, 'p_ajustado': p_aj,
+            'significativo': np.nan_to_num(p_aj, nan=1.0) < alfa,
+        }))
+
+    pontos['z_razao'] = z
+    pontos['mudanca_local'] = np.abs(np.nan_to_num(z)) > limiar_z
+    return {
+        'pontos': pontos,
+        'resumo': pd.DataFrame(linhas_resumo),
+        'comprimentos_onda': pd.concat(linhas_wl, ignore_index=True) if linhas_wl else pd.DataFrame(),
+        'wl': wl,
+        'delta_espectros': delta_espectros,
+        'grupos_pares': grupos_pares,
+        'nao_pareados_a': _posicoes(a, np.setdiff1d(np.arange(len(a['chaves'])), ia)),
+        'nao_pareados_b': _posicoes(b, np.setdiff1d(np.arange(len(b['chaves'])), ib)),
+    }
+
+
+def _posicoes(medias: dict, indices: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({'grupo': medias['grupos'][indices], 'linha': medias['X'][indices],
+                         'coluna': medias['Y'][indices], 'arquivos': medias['arquivos'][indices]})
+
+
+def _finalizar(comparacao: dict, pasta_coordenadas: str, pasta_saida: str, salvar_csv: bool) -> dict:
+    # Coordenadas reais para as superfícies: a posição da grade fica em X/Y, como em extrair_coordenadas_e_valores_espd
+    comparacao['pontos'] = fn.mesclar_coordenadas(comparacao['pontos'], pasta_coordenadas)
+    if salvar_csv:
+        # Pacotes são somente leitura: as tabelas ficam ao lado do pacote
+        pacote, _ = fn.localizar_pacote(pasta_saida)
+        pasta_saida = os.path.dirname(pacote) if pacote else pasta_saida
+        for nome, chave in (('comparacao_pontos.csv', 'pontos'), ('comparacao_resumo.csv', 'resumo'),
+                            ('comparacao_comprimentos_onda.csv', 'comprimentos_onda')):
+            caminho = os.path.join(pasta_saida, nome)
+            tabela = comparacao[chave]
+            fn.gravar_atomico(caminho, lambda tmp: tabela.to_csv(tmp, index=False))
+        print(f'Comparação salva em: {pasta_saida}')
+    resumo = comparacao['resumo']
+    if not resumo.empty:
+        print(resumo.to_string(index=False))
+        duplicados = resumo[(resumo['n_duplicados_a'] > 0) | (resumo['n_duplicados_b'] > 0)]
+        for _, linha in duplicados.iterrows():
+            print(f"Aviso: {linha['grupo']} tem posições remedidas ({linha['n_duplicados_a']} leitura(s) extra em A, "
+                  f"{linha['n_duplicados_b']} em B); a comparação usa a média das leituras de cada posição.")
+    return comparacao
+
+
+def comparar_pastas(pasta_a: str, pasta_b: str, alfa: float = 0.05, limiar_z: float = 3.5,
+                    salvar_csv: bool = False) -> dict:
+    """
+    Compara duas pastas de tratamento (ex: antes e depois da troca de lâmpadas, ou 0A e 100A) ponto a ponto.
+
+    Args:
+        pasta_a (str): Pasta de referência (A).
+        pasta_b (str): Pasta comparada (B). As diferenças são B - A e as razões B / A.
+        alfa (float, opcional): Nível de significância. Padrão é 0.05.
+        limiar_z (float, opcional): |z| para marcar mudança local em um ponto. Padrão é 3.5.
+        salvar_csv (bool, opcional): Se True, salva as tabelas da comparação na pasta B. Padrão é False.
+
+    Returns:
+        dict: Resultado de comparar_colecoes; o grupo de todas as medições é 'nome_A→nome_B'.
+
+    Exemplo:
+        comparacao = comparar_pastas('Caminho/para/0A', 'Caminho/para/100A')
+        plotar_surface_delta(comparacao)
+    """
+    try:
+        grupo = f'{os.path.basename(os.path.normpath(pasta_a))}→{os.path.basename(os.path.normpath(pasta_b))}'
+        colecao_a, grupos_a = _carregar_pastas([(grupo, pasta_a)])
+        colecao_b, grupos_b = _carregar_pastas([(grupo, pasta_b)])
+        comparacao = comparar_colecoes(colecao_a, grupos_a, colecao_b, grupos_b, alfa, limiar_z)
+        return _finalizar(comparacao, pasta_a, pasta_b, salvar_csv)
+    except Exception as e:
+        print(f'Erro ao comparar pastas: {e}')
+        raise
+
+
+def comparar_campanhas(pasta_principal_a: str, pasta_principal_b: str, alfa: float = 0.05, limiar_z: float = 3.5,
+                       salvar_csv: bool = True) -> dict:
+    """
+    Compara duas campanhas inteiras (pastas principais com as mesmas subpastas de tratamento) ponto a ponto.
+    As subpastas que existem em apenas uma das campanhas aparecem como não pareadas no resumo.
+
+    Args:
+        pasta_principal_a (str): Campanha de referência (A).
+        pasta_principal_b (str): Campanha comparada (B).
+        alfa (float, opcional): Nível de significância. Padrão é 0.05.
+        limiar_z (float, opcional): |z| para marcar mudança local em um ponto. Padrão é 3.5.
+        salvar_csv (bool, opcional): Se True, salva 'comparacao_pontos.csv', 'comparacao_resumo.csv' e
+            'comparacao_comprimentos_onda.csv' na pasta principal B (ao lado do pacote, se B estiver empacotada).
+            Padrão é True.
+
+    Exemplo:
+        comparacao = comparar_campanhas('D:/campanha_2025_06', 'D:/campanha_2025_09')
+        print(comparacao['resumo'])
+    """
+    try:
+        colecao_a, grupos_a = _carregar_pastas(_subpastas(pasta_principal_a))
+        colecao_b, grupos_b = _carregar_pastas(_subpastas(pasta_principal_b))
+        comparacao = comparar_colecoes(colecao_a, grupos_a, colecao_b, grupos_b, alfa, limiar_z)
+        # O nome da subpasta não importa para o caminho de coordenadas.csv (um nível acima)
+        return _finalizar(comparacao, os.path.join(pasta_principal_a, 'subpasta'), pasta_principal_b, salvar_csv)
+    except Exception as e:
+        print(f'Erro ao comparar campanhas: {e}')
+        raise
+
+
+def plotar_surface_delta(comparacao: dict, grupo: str = None, variavel: str = 'delta_PPFD',
+                         interpolar: str = 'cubic') -> None:
+    """
+    Plota a superfície interpolada da diferença (ou razão) ponto a ponto de um grupo da comparação.
+
+    Args:
+        comparacao (dict): Resultado de comparar_pastas ou comparar_campanhas.
+        grupo (str, opcional): Grupo a plotar. Padrão é o primeiro grupo pareado.
+        variavel (str, opcional): 'delta_PPFD', 'delta_PFD', 'razao_PPFD', 'razao_PFD' ou 'z_razao'.
+            Padrão é 'delta_PPFD'.
+        interpolar (str, opcional): Método de interpolação. Padrão é 'cubic'.
+    """
+    pontos = comparacao['pontos']
+    if pontos.empty:
+        raise ValueError('Nenhum ponto pareado entre as duas campanhas.')
+    grupo = grupo if grupo is not None else pontos['grupo'].iloc[0]
+    fn.plotar_surface_ppfd(pontos[pontos['grupo'] == grupo], interpolar=interpolar, variavel=variavel)
+
+
+def plotar_espectros_delta(comparacao: dict, grupos: list = None) -> None:
+    """
+    Plota o espectro médio das diferenças (B - A, mW m⁻² nm⁻¹) de cada grupo, com faixa de ± 1 desvio padrão entre os
+    pontos e marcadores nos comprimentos de onda com mudança significativa (teste t pareado com correção de
+    Benjamini-Hochberg).
+    """
+    try:
+        tabela = comparacao['comprimentos_onda']
+        grupos = grupos if grupos is not None else list(dict.fromkeys(tabela['grupo']))
+        fig = go.Figure()
+        for grupo in grupos:
+            df_g = tabela[tabela['grupo'] == grupo]
+            cor = 'rgb({},{},{})'.format(*fn.CORES_GRUPOS.get(grupo, (60, 60, 60)))
+            nome = fn.NOMES_LEGENDA.get(grupo, grupo)
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([df_g['Wavelength(nm)'], df_g['Wavelength(nm)'][::-1]]),
+                y=np.concatenate([df_g['delta_medio'] + df_g['delta_desvio'],
+                                  (df_g['delta_medio'] - df_g['delta_desvio'])[::-1]]),
+                fill='toself', fillcolor=cor.replace('rgb', 'rgba').replace(')', ',0.2)'),
+                line=dict(width=0), hoverinfo='skip', legendgroup=grupo, showlegend=False))
+            fig.add_trace(go.Scatter(x=df_g['Wavelength(nm)'], y=df_g['delta_medio'], mode='lines',
+                                     line=dict(color=cor, width=2), name=nome, legendgroup=grupo))
+            sig = df_g[df_g['significativo']]
+            fig.add_trace(go.Scatter(x=sig['Wavelength(nm)'], y=sig['delta_medio'], mode='markers',
+                                     marker=dict(color=cor, size=4), name=f'{nome} (p ajustado < alfa)',
+                                     legendgroup=grupo))
+        fig.add_hline(y=0, line=dict(color='gray', dash='dot'))
+        fig.update_layout(
+            title='Diferença espectral média entre campanhas (B - A)',
+            xaxis_title='Comprimento de onda (nm)',
+            yaxis_title='Δ irradiância espectral (mW m⁻² nm⁻¹)',
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+            hovermode='x unified',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar espectros da diferença: {e}')
+        raise
@@ -0,0 +1,185 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import functions as fn
+
+# Limites padrão das verificações (podem ser alterados na chamada de verificar_pasta)
+LIMITES_QC = {
+    'n_comprimentos_onda': 401,     # bloco espectral esperado: 380–780 nm a cada 1 nm
+    'i_time_min': 2.0,              # ms; tempos muito curtos indicam possível saturação
+    'i_time_max': 5000.0,           # ms; tempos muito longos indicam sinal fraco ou sensor coberto
+    'ppfd_max': 3000.0,             # µmol m⁻² s⁻¹; acima disso o valor é implausível na sala
+    'negativo_tolerancia': -0.01,   # valores espectrais abaixo disso são considerados inválidos
+}
+
+
+def _problema(caminho, grupo, severidade, descricao):
+    return {'arquivo': os.path.basename(caminho), 'grupo': grupo, 'severidade': severidade,
+            'problema': descricao, 'caminho': caminho}
+
+
+def verificar_arquivo(caminho: str, grupo: str, limites: dict = None) -> tuple:
+    """
+    Verifica um único arquivo ESPD_ ou uMOL_ sem interromper em caso de erro.
+
+    Args:
+        caminho (str): Caminho do arquivo.
+        grupo (str): Subpasta (tratamento) do arquivo.
+        limites (dict, opcional): Limites das verificações. Padrão é LIMITES_QC.
+
+    Returns:
+        tuple: (informações do arquivo como dict, lista de problemas encontrados).
+    """
+    limites = {**LIMITES_QC, **(limites or {})}
+    nome = os.path.basename(caminho)
+    tipo = 'ESPD' if nome.startswith('ESPD_') else 'uMOL'
+    match = re.match(r'^(?:ESPD|uMOL)_(\d)(\d)', nome)
+    info = {'arquivo': nome, 'grupo': grupo, 'tipo': tipo,
+            'X': int(match.group(1)) if match else None,
+            'Y': int(match.group(2)) if match else None,
+            'PPFD': np.nan, 'PFD': np.nan, 'I-Time': np.nan, 'caminho': caminho}
+    problemas = []
+    if not match:
+        problemas.append(_problema(caminho, grupo, 'aviso', 'nome fora do padrão XY9IntensidadeCor'))
+    try:
+        if tipo == 'ESPD':
+            cabecalho, wl, espectro = fn.ler_arquivo_espd(caminho)
+            for chave in ('PPFD', 'PFD', 'I-Time'):
+                valor = cabecalho.get(chave)
+                if isinstance(valor, float):
+                    info[chave] = valor
+                else:
+                    problemas.append(_problema(caminho, grupo, 'erro', f'{chave} ausente no cabeçalho'))
+            if np.isfinite(info['PPFD']) and np.isfinite(info['PFD']):
+                if info['PPFD'] < 0 or info['PFD'] < 0:
+                    problemas.append(_problema(caminho, grupo, 'erro', 'PPFD ou PFD negativo'))
+                elif info['PPFD'] > info['PFD'] * 1.001:
+                    problemas.append(_problema(caminho, grupo, 'aviso', 'PPFD maior que PFD (400–700 nm > 380–780 nm)'))
+                if info['PPFD'] > limites['ppfd_max']:
+                    problemas.append(_problema(caminho, grupo, 'aviso', f"PPFD acima de {limites['ppfd_max']:g}"))
+            if np.isfinite(info['I-Time']):
+                if info['I-Time'] <= limites['i_time_min']:
+                    problemas.append(_problema(caminho, grupo, 'aviso',
+                                               f"I-Time de {info['I-Time']:g} ms: possível saturação"))
+                elif info['I-Time'] >= limites['i_time_max']:
+                    problemas.append(_problema(caminho, grupo, 'aviso',
+                                               f"I-Time de {info['I-Time']:g} ms: tempo de integração muito longo"))
+        else:
+            wl, espectro = fn.ler_espectro_umol(caminho)
+        if len(wl) != limites['n_comprimentos_onda']:
+            problemas.append(_problema(caminho, grupo, 'erro',
+                                       f"bloco espectral com {len(wl)} pontos (esperado {limites['n_comprimentos_onda']})"))
+        elif np.any(np.diff(wl) <= 0):
+            problemas.append(_problema(caminho, grupo, 'erro', 'comprimentos de onda fora de ordem ou repetidos'))
+        if len(espectro) and not np.all(np.isfinite(espectro)):
+            problemas.append(_problema(caminho, grupo, 'erro', 'valores espectrais não numéricos'))
+        elif len(espectro) and np.nanmin(espectro) < limites['negativo_tolerancia']:
+            problemas.append(_problema(caminho, grupo, 'aviso', 'valores espectrais negativos'))
+    except Exception as e:
+        problemas.append(_problema(caminho, grupo, 'erro', f'falha na leitura: {e}'))
+    return info, problemas
+
+
+def arquivos_em_quarentena(tarefas: list, limites: dict = None, max_workers: int = 8) -> set:
+    """
+    Caminhos que verificar_pasta poria em quarentena (erro de leitura, cabeçalho ou bloco espectral), para análises
+    que leem os arquivos por conta própria. Só as verificações de cada arquivo geram erro; as de tratamento
+    (posições repetidas, pontos faltando) são avisos.
+
+    Args:
+        tarefas (list): Pares (caminho, grupo).
+        limites (dict, opcional): Substitui valores de LIMITES_QC.
+        max_workers (int, opcional): Número de threads de leitura. Padrão é 8.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resultados = list(executor.map(lambda t: verificar_arquivo(t[0], t[1], limites), tarefas))
+    return {p['caminho'] for _, problemas in resultados for p in problemas if p['severidade'] == 'erro'}
+
+
+def verificar_pasta(pasta_principal: str, limites: dict = None, max_workers: int = 8,
+                    salvar_csv: bool = True) -> tuple:
+    """
+    Pré-varredura de qualidade de todos os arquivos ESPD_ e uMOL_ das subpastas, em paralelo, sem janelas de aviso.
+    Além das verificações por arquivo (estrutura, faixas de valores, I-Time), verifica por tratamento:
+    posições (X, Y) duplicadas, pontos da grade de coordenadas.csv sem medição e arquivos ESPD sem o uMOL_ correspondente.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        limites (dict, opcional): Substitui valores de LIMITES_QC.
+        max_workers (int, opcional): Número de threads de leitura. Padrão é 8.
+        salvar_csv (bool, opcional): Se True, salva 'relatorio_qc.csv' na pasta principal (ao lado
+            do pacote, se a campanha estiver empacotada). Padrão é True.
+
+    Returns:
+        tuple: (relatório com um problema por linha, lista de caminhos em quarentena (arquivos com erro),
+            tabela com as informações lidas de cada arquivo).
+
+    Exemplo:
+        relatorio, quarentena, arquivos = verificar_pasta('Caminho/para/pasta_principal')
+    """
+    try:
+        tarefas = []
+        for subpasta in sorted(fn.listar_pasta(pasta_principal)):
+            caminho_sub = os.path.join(pasta_principal, subpasta)
+            if not fn.eh_pasta(caminho_sub):
+                continue
+            for arquivo in sorted(fn.listar_pasta(caminho_sub)):
+                if arquivo.startswith(('ESPD_', 'uMOL_')) and arquivo.endswith('.txt'):
+                    tarefas.append((os.path.join(caminho_sub, arquivo), subpasta))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resultados = list(executor.map(lambda t: verificar_arquivo(t[0], t[1], limites), tarefas))
+
+        infos = [info for info, _ in resultados]
+        problemas = [p for _, lista in resultados for p in lista]
+        df_info = pd.DataFrame(infos, columns=['arquivo', 'grupo', 'tipo', 'X', 'Y', 'PPFD', 'PFD', 'I-Time', 'caminho'])
+
+        if not df_info.empty:
+            # Posições duplicadas por tratamento e tipo de arquivo: remedições são válidas e as análises usam a média
+            com_posicao = df_info.dropna(subset=['X', 'Y'])
+            duplicados = com_posicao[com_posicao.duplicated(['grupo', 'tipo', 'X', 'Y'], keep=False)]
+            for _, linha in duplicados.iterrows():
+                problemas.append(_problema(linha['caminho'], linha['grupo'], 'aviso',
+                                           f"posição ({int(linha['X'])}, {int(linha['Y'])}) medida mais de uma vez "
+                                           f"no tratamento (entra pela média)"))
+
+            # ESPD sem uMOL correspondente (mesmo sufixo de nome)
+            for grupo, df_g in df_info.groupby('grupo'):
+                sufixos_umol = {a[len('uMOL_'):] for a in df_g.loc[df_g['tipo'] == 'uMOL', 'arquivo']}
+                for _, linha in df_g[df_g['tipo'] == 'ESPD'].iterrows():
+                    if linha['arquivo'][len('ESPD_'):] not in sufixos_umol:
+                        problemas.append(_problema(linha['caminho'], grupo, 'aviso', 'arquivo uMOL_ correspondente ausente'))
+
+            # Pontos da grade sem medição
+            caminho_coordenadas = os.path.join(pasta_principal, 'coordenadas.csv')
+            if fn.existe(caminho_coordenadas):
+                df_coord = fn.ler_csv(caminho_coordenadas)
+                grade = set(zip(df_coord['x'].astype(int), df_coord['y'].astype(int)))
+                for grupo, df_g in com_posicao[com_posicao['tipo'] == 'ESPD'].groupby('grupo'):
+                    medidos = set(zip(df_g['X'].astype(int), df_g['Y'].astype(int)))
+                    for x, y in sorted(grade - medidos):
+                        problemas.append({'arquivo': None, 'grupo': grupo, 'severidade': 'aviso',
+                                          'problema': f'ponto ({x}, {y}) de coordenadas.csv sem medição ESPD',
+                                          'caminho': None})
+                    for x, y in sorted(medidos - grade):
+                        problemas.append({'arquivo': None, 'grupo': grupo, 'severidade': 'aviso',
+                                          'problema': f'posição ({x}, {y}) medida não existe em coordenadas.csv',
+                                          'caminho': None})
+
+        relatorio = pd.DataFrame(problemas, columns=['arquivo', 'grupo', 'severidade', 'problema', 'caminho'])
+        relatorio = relatorio.sort_values(['severidade', 'grupo', 'arquivo'], ascending=[False, True, True],
+                                          na_position='last').reset_index(drop=True)
+        quarentena = sorted(set(relatorio.loc[relatorio['severidade'] == 'erro', 'caminho'].dropna()))
+        if salvar_csv:
+            # Pacotes são somente leitura: o relatório fica ao lado do pacote
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta_principal, 'relatorio_qc.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: relatorio.to_csv(tmp, index=False))
+            print(f'Relatório de qualidade salvo em: {caminho_csv}')
+        print(f'{len(tarefas)} arquivos verificados: {len(relatorio)} problemas, {len(quarentena)} arquivos em quarentena.')
+        return relatorio, quarentena, df_info
+    except Exception as e:
+        print(f'Erro na verificação de qualidade: {e}')
+        raise
@@ -0,0 +1,419 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import functions as fn
+import controle_qualidade as qc
+
+# Intervalo sem medições que separa duas sessões de coleta
+INTERVALO_SESSAO_H = 2.0
+
+# Critérios para aceitar a deriva de um tratamento e sessão: número mínimo de repetições, intervalo mínimo entre
+# a referência e a repetição mais distante e deriva máxima plausível (% por hora); fora disso o fator fica em 1
+MIN_PARES_DERIVA = 3
+MIN_INTERVALO_DERIVA_H = 0.25
+MAX_DERIVA_PLAUSIVEL = 20.0
+
+# Pontos do espectro de referência abaixo desta fração do pico não entram na deriva espectral (razões instáveis)
+LIMIAR_ESPECTRAL = 0.01
+
+
+def _instante(valor) -> np.int64:
+    """Converte um instante (str no formato do LI-180 ou ISO, datetime, Timestamp ou datetime64) para segundos."""
+    if isinstance(valor, str):
+        valor = valor.replace('/', '-').replace('_', ' ')
+    return np.datetime64(pd.Timestamp(valor), 's').astype(np.int64)
+
+
+class IndiceTemporal:
+    """
+    Medições de uma ou mais campanhas ordenadas pelo campo Time do LI-180. As medições ficam em uma ColecaoMedicoes
+    (na ordem de leitura) e o índice guarda a ordem temporal (argsort) e os instantes ordenados em segundos, de modo
+    que a consulta por janela de tempo é uma busca binária (np.searchsorted, O(log n)) seguida de uma fatia.
+    Medições sem Time válido ficam fora do índice (contadas em 'n_sem_tempo').
+
+    As sessões são trechos contínuos de coleta: uma nova sessão começa sempre que o intervalo entre duas medições
+    consecutivas (em todas as pastas) passa de 'intervalo_sessao_h'.
+
+    Exemplo:
+        indice = IndiceTemporal.de_pastas(['D:/campanha_junho', 'D:/campanha_julho'])
+        df = indice.para_dataframe(indice.janela('2025/06/25_11:00:00', '2025/06/25_12:00:00'))
+    """
+
+    def __init__(self, colecao: fn.ColecaoMedicoes, campanhas: list, pastas: list, series: list,
+                 intervalo_sessao_h: float = INTERVALO_SESSAO_H):
+        self.colecao = colecao
+        self.campanhas = np.asarray(campanhas, dtype=object)
+        self.pastas = np.asarray(pastas, dtype=object)
+        self.series = np.asarray(series, dtype=object)
+        tempos = colecao.dados['Time']
+        validos = np.flatnonzero(~np.isnat(tempos))
+        self.ordem = validos[np.argsort(tempos[validos], kind='stable')]
+        self.tempos = tempos[self.ordem].astype(np.int64)
+        self.n_sem_tempo = len(colecao) - len(validos)
+        self.sessao = np.full(len(colecao), -1, dtype=np.int64)
+        self.sessao[self.ordem] = np.concatenate(
+            ([0], np.cumsum(np.diff(self.tempos) > intervalo_sessao_h * 3600))) if len(self.ordem) else []
+
+        self.quarentena = []
+
+    def __len__(self):
+        return len(self.ordem)
+
+    @classmethod
+    def de_pastas(cls, pastas_principais, espectros: bool = True,
+                  intervalo_sessao_h: float = INTERVALO_SESSAO_H, excluir_quarentena: bool = True) -> 'IndiceTemporal':
+        """
+        Lê os arquivos ESPD_ de uma ou mais pastas principais (ou pacotes de campanha). O grupo de cada medição é a
+        subpasta de tratamento; uma pasta sem subpastas é tratada como um único grupo.
+
+        Args:
+            pastas_principais (str ou list): Pasta(s) principal(is) das campanhas.
+            espectros (bool, opcional): Se True, guarda também os espectros (necessários para a deriva espectral).
+            intervalo_sessao_h (float, opcional): Intervalo que separa sessões, em horas. Padrão é 2.
+            excluir_quarentena (bool, opcional): Se True, os arquivos que controle_qualidade põe em quarentena
+                (erro de leitura, cabeçalho ou bloco espectral) ficam fora do índice, listados em 'quarentena'.
+        """
+        if isinstance(pastas_principais, str):
+            pastas_principais = [pastas_principais]
+        padrao = re.compile(r'^ESPD_(\d)(\d).*\.txt$')
+        colecao = fn.ColecaoMedicoes()
+        campanhas, pastas, series = [], [], []
+        tarefas = []
+        for pasta_principal in pastas_principais:
+            campanha = os.path.basename(os.path.normpath(pasta_principal))
+            if campanha.lower().endswith(fn.EXTENSAO_PACOTE):
+                campanha = campanha[:-len(fn.EXTENSAO_PACOTE)]
+            grupos = [(p, os.path.join(pasta_principal, p)) for p in sorted(fn.listar_pasta(pasta_principal))
+                      if fn.eh_pasta(os.path.join(pasta_principal, p))]
+            if not grupos:
+                grupos = [(campanha, pasta_principal)]
+            for grupo, pasta in grupos:
+                for arquivo in sorted(fn.listar_pasta(pasta)):
+                    match = padrao.match(arquivo)
+                    if match:
+                        tarefas.append((campanha, grupo, pasta, arquivo, match))
+        quarentena = qc.arquivos_em_quarentena([(os.path.join(t[2], t[3]), t[1]) for t in tarefas]) \
+            if excluir_quarentena else set()
+        for campanha, grupo, pasta, arquivo, match in tarefas:
+            caminho = os.path.join(pasta, arquivo)
+            if caminho in quarentena:
+                continue
+            cabecalho, wl, espectro = fn.ler_arquivo_espd(caminho)
+            colecao.adicionar(arquivo, grupo, int(match.group(1)), int(match.group(2)), cabecalho,
+                              wl if espectros else None, espectro if espectros else None)
+            campanhas.append(campanha)
+            pastas.append(pasta)
+            series.append(cabecalho.get('Serial Number'))
+        if quarentena:
+            print(f'{len(quarentena)} arquivo(s) em quarentena pelo controle de qualidade ficaram fora do índice.')
+        if not len(colecao):
+            raise ValueError('Nenhum arquivo ESPD_ encontrado nas pastas selecionadas.')
+        indice = cls(colecao, campanhas, pastas, series, intervalo_sessao_h)
+        indice.quarentena = sorted(quarentena)
+        return indice
+
+    def janela(self, inicio=None, fim=None) -> np.ndarray:
+        """
+        Medições com Time em [inicio, fim], em ordem temporal, como índices da coleção.
+        'inicio' e 'fim' aceitam o formato do LI-180 ('2025/06/25_15:17:17'), ISO, datetime ou datetime64.
+        """
+        esquerda = 0 if inicio is None else np.searchsorted(self.tempos, _instante(inicio), side='left')
+        direita = len(self.tempos) if fim is None else np.searchsorted(self.tempos, _instante(fim), side='right')
+        return self.ordem[esquerda:direita]
+
+    def para_dataframe(self, indices: np.ndarray = None) -> pd.DataFrame:
+        """
+        Tabela das medições em ordem temporal (ou das medições em 'indices', na ordem dada), com 'Time', 'campanha',
+        'ID' (tratamento), 'linha' e 'coluna' (posição na grade), 'PPFD', 'PFD', 'I-Time', 'serie', 'sessao',
+        'arquivo' e 'indice' (linha na coleção, para acessar o espectro).
+        """
+        indices = self.ordem if indices is None else np.asarray(indices, dtype=np.int64)
+        dados = self.colecao.dados[indices]
+        grupos = np.asarray(self.colecao.grupos, dtype=object)
+        return pd.DataFrame({
+            'Time': dados['Time'],
+            'campanha': self.campanhas[indices],
+            'ID': grupos[dados['grupo']],
+            'linha': dados['X'].astype(np.int64),
+            'coluna': dados['Y'].astype(np.int64),
+            'PPFD': dados['PPFD'],
+            'PFD': dados['PFD'],
+            'I-Time': dados['I-Time'],
+            'serie': self.series[indices],
+            'sessao': self.sessao[indices],
+            'arquivo': np.asarray(self.colecao.arquivos, dtype=object)[indices],
+            'indice': indices,
+        })
+
+
+def repeticoes(indice: IndiceTemporal, ponto_referencia: tuple = None, inicio=None, fim=None) -> pd.DataFrame:
+    """
+    Pares de medições repetidas: cada leitura de uma posição já medida no mesmo tratamento e sessão é comparada com a
+    primeira leitura daquela posição (a referência).
+
+    Args:
+        indice (IndiceTemporal): Índice das medições.
+        ponto_referencia (tuple, opcional): Posição (X, Y) da grade remedida periodicamente como referência. Padrão
+            é None (todas as posições repetidas).
+        inicio, fim (opcional): Janela de tempo considerada.
+
+    Returns:
+        pd.DataFrame: Uma linha por repetição com a chave ('campanha', 'ID', 'sessao', 'linha', 'coluna'), 'Time_ref',
+            'Time', 'dt_h', 'PPFD_ref', 'PPFD', 'razao_PPFD', 'indice_ref' e 'indice'.
+    """
+    df = indice.para_dataframe(indice.janela(inicio, fim))
+    if ponto_referencia is not None:
+        df = df[(df['linha'] == ponto_referencia[0]) & (df['coluna'] == ponto_referencia[1])]
+    chave = ['campanha', 'ID', 'sessao', 'linha', 'coluna']
+    # df já está em ordem temporal: a primeira linha de cada chave é a referência
+    primeira = df.groupby(chave, sort=False)['indice'].transform('first')
+    pares = df[df['indice'] != primeira].copy()
+    referencia = df.set_index('indice').loc[primeira[pares.index]]
+    pares['indice_ref'] = referencia.index.to_numpy()
+    pares['Time_ref'] = referencia['Time'].to_numpy()
+    pares['PPFD_ref'] = referencia['PPFD'].to_numpy()
+    pares['dt_h'] = (pares['Time'] - pares['Time_ref']).dt.total_seconds() / 3600
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pares['razao_PPFD'] = pares['PPFD'] / pares['PPFD_ref']
+    return pares[chave + ['Time_ref', 'Time', 'dt_h', 'PPFD_ref', 'PPFD', 'razao_PPFD', 'indice_ref', 'indice']] \
+        .reset_index(drop=True)
+
+
+def calcular_deriva(indice: IndiceTemporal, ponto_referencia: tuple = None, inicio=None, fim=None) -> dict:
+    """
+    Estima a deriva das lâmpadas em cada tratamento e sessão a partir das medições repetidas. Supondo deriva linear
+    no tempo, f(t) = 1 + a (t - t0), a razão entre uma leitura e sua referência é 1 + a dt; a inclinação 'a' é a
+    mediana das inclinações (razão - 1) / dt de cada par, robusta a uma repetição discrepante. O mesmo ajuste é
+    feito por comprimento de onda com as razões entre os espectros, de uma vez para todos os pares.
+
+    A deriva só é aceita ('deriva_valida') com pelo menos MIN_PARES_DERIVA repetições, a mais distante a
+    MIN_INTERVALO_DERIVA_H horas da referência, e com módulo até MAX_DERIVA_PLAUSIVEL % por hora; caso contrário
+    'motivo' explica a recusa e corrigir_deriva não corrige aquele tratamento e sessão.
+
+    Args:
+        indice (IndiceTemporal): Índice das medições.
+        ponto_referencia (tuple, opcional): Posição (X, Y) de referência. Padrão é None (todas as repetições).
+        inicio, fim (opcional): Janela de tempo considerada.
+
+    Returns:
+        dict: {'pares' (resultado de repeticoes), 'deriva' (DataFrame por 'campanha', 'ID' e 'sessao' com 'inicio',
+            'fim', 'duracao_h', 'n_medicoes', 'n_pares', 'intervalo_pares_h', 'deriva_%_h', 'deriva_total_%',
+            'diferenca_mediana_%' e 'diferenca_max_%' entre repetições, 'deriva_valida' e 'motivo'),
+            'deriva_espectral' (linhas de 'deriva' x wl, % por hora), 'wl'}.
+
+    Exemplo:
+        indice = IndiceTemporal.de_pastas('Caminho/para/pasta_principal')
+        deriva = calcular_deriva(indice, ponto_referencia=(5, 5))
+        print(deriva['deriva'])
+    """
+    try:
+        pares = repeticoes(indice, ponto_referencia, inicio, fim)
+        chave = ['campanha', 'ID', 'sessao']
+        df = indice.para_dataframe(indice.janela(inicio, fim))
+        deriva = df.groupby(chave, sort=False).agg(
+            inicio=('Time', 'min'), fim=('Time', 'max'), n_medicoes=('indice', 'size')).reset_index()
+        deriva['duracao_h'] = (deriva['fim'] - deriva['inicio']).dt.total_seconds() / 3600
+
+        codigo = pd.MultiIndex.from_frame(deriva[chave]).get_indexer(pd.MultiIndex.from_frame(pares[chave])) \
+            if len(pares) else np.zeros(0, dtype=np.int64)
+        dt = pares['dt_h'].to_numpy()
+        desvio = pares['razao_PPFD'].to_numpy() - 1
+        validos = np.isfinite(desvio) & (dt > 0)
+        n_grupos = len(deriva)
+        grupos_pares = codigo[validos]
+        inclinacoes = pd.Series(desvio[validos] / dt[validos]).groupby(grupos_pares)
+        deriva['n_pares'] = np.bincount(grupos_pares, minlength=n_grupos)
+        deriva['intervalo_pares_h'] = pd.Series(dt[validos]).groupby(grupos_pares).max() \
+            .reindex(range(n_grupos)).fillna(0.0).to_numpy()
+        deriva['deriva_%_h'] = 100 * inclinacoes.median().reindex(range(n_grupos)).to_numpy()
+        deriva['deriva_total_%'] = deriva['deriva_%_h'] * deriva['duracao_h']
+        diferencas = pd.Series(100 * np.abs(desvio[validos])).groupby(grupos_pares)
+        deriva['diferenca_mediana_%'] = diferencas.median().reindex(range(n_grupos)).to_numpy()
+        deriva['diferenca_max_%'] = diferencas.max().reindex(range(n_grupos)).to_numpy()
+        motivo = np.full(n_grupos, '', dtype=object)
+        motivo[np.abs(deriva['deriva_%_h'].to_numpy()) > MAX_DERIVA_PLAUSIVEL] = \
+            f'deriva acima de {MAX_DERIVA_PLAUSIVEL:g}%/h (implausível)'
+        motivo[deriva['intervalo_pares_h'].to_numpy() < MIN_INTERVALO_DERIVA_H] = \
+            f'repetições a menos de {MIN_INTERVALO_DERIVA_H:g} h da referência'
+        motivo[deriva['n_pares'].to_numpy() < MIN_PARES_DERIVA] = f'menos de {MIN_PARES_DERIVA} repetições'
+        deriva['deriva_valida'] = motivo == ''
+        deriva['motivo'] = motivo
+
+        wl, deriva_espectral = indice.colecao.wl, None
+        espectros = indice.colecao.espectros
+        if espectros is not None:
+            referencia = espectros[pares['indice_ref'].to_numpy()[validos]].astype(float)
+            atual = espectros[pares['indice'].to_numpy()[validos]].astype(float)
+            picos = np.nanmax(referencia, axis=1, keepdims=True) if len(referencia) else referencia
+            with np.errstate(divide='ignore', invalid='ignore'):
+                razao = np.where(referencia > LIMIAR_ESPECTRAL * picos, atual / referencia, np.nan) - 1
+            # Mediana por grupo das inclinações de todos os pares e comprimentos de onda de uma vez (NaN ignorados)
+            deriva_espectral = 100 * pd.DataFrame(razao / dt[validos][:, None]).groupby(grupos_pares).median() \
+                .reindex(range(n_grupos)).to_numpy()
+
+        sem_pares = (deriva['n_pares'] == 0).sum()
+        if sem_pares:
+            print(f'{sem_pares} tratamento(s)/sessão(ões) sem medições repetidas: deriva não estimada.')
+        recusadas = deriva[(deriva['n_pares'] > 0) & ~deriva['deriva_valida']]
+        for _, linha in recusadas.iterrows():
+            print(f"Aviso: deriva de {linha['campanha']} {linha['ID']} (sessão {linha['sessao']}) não usada "
+                  f"({linha['motivo']}; estimativa {linha['deriva_%_h']:+.1f}%/h com {linha['n_pares']} par(es)).")
+        return {'pares': pares, 'deriva': deriva, 'deriva_espectral': deriva_espectral, 'wl': wl}
+    except Exception as e:
+        print(f'Erro ao calcular a deriva: {e}')
+        raise
+
+
+def corrigir_deriva(indice: IndiceTemporal, deriva: dict, grupo: str = None, campanha: str = None) -> pd.DataFrame:
+    """
+    Corrige PPFD e PFD de cada medição para o nível do início da sessão, dividindo pelo fator 1 + a (t - t0) do seu
+    tratamento e sessão. Tratamentos sem deriva estimada ou com deriva recusada ('deriva_valida' falso) ficam sem
+    correção (fator 1), com um aviso. O resultado tem o formato de
+    extrair_coordenadas_e_valores_espd (com coordenadas reais, se houver coordenadas.csv) e pode ser passado
+    diretamente às funções de plotagem de superfícies.
+
+    Args:
+        indice (IndiceTemporal): Índice das medições.
+        deriva (dict): Resultado de calcular_deriva.
+        grupo (str, opcional): Tratamento a corrigir (ex: '0A'). Padrão é None (todos).
+        campanha (str, opcional): Campanha a corrigir, quando o índice tem mais de uma. Padrão é None (todas).
+
+    Returns:
+        pd.DataFrame: Medições com 'PPFD' e 'PFD' corrigidos, 'PPFD_medido', 'PFD_medido', 'fator_deriva' e 'Time'.
+
+    Exemplo:
+        df = corrigir_deriva(indice, deriva, grupo='0A')
+        fn.plotar_surface_ppfd(df)
+    """
+    try:
+        df = indice.para_dataframe()
+        if grupo is not None:
+            df = df[df['ID'] == grupo]
+        if campanha is not None:
+            df = df[df['campanha'] == campanha]
+        if df.empty:
+            raise ValueError('Nenhuma medição com Time válido para o tratamento/campanha selecionados.')
+        tabela = deriva['deriva'][['campanha', 'ID', 'sessao', 'inicio', 'deriva_%_h', 'deriva_valida', 'motivo']]
+        df = df.merge(tabela, on=['campanha', 'ID', 'sessao'], how='left')
+        recusadas = df.loc[df['deriva_%_h'].notna() & (df['deriva_valida'] != True),
+                           ['campanha', 'ID', 'sessao', 'motivo']].drop_duplicates()
+        for _, linha in recusadas.iterrows():
+            print(f"Aviso: {linha['campanha']} {linha['ID']} (sessão {linha['sessao']}) sem correção de deriva: "
+                  f"{linha['motivo']}.")
+        df.loc[df['deriva_valida'] != True, 'deriva_%_h'] = np.nan
+        horas = (df['Time'] - df['inicio']).dt.total_seconds() / 3600
+        df['fator_deriva'] = (1 + df['deriva_%_h'].fillna(0) / 100 * horas).fillna(1.0)
+        df['PPFD_medido'], df['PFD_medido'] = df['PPFD'], df['PFD']
+        df['PPFD'] = df['PPFD_medido'] / df['fator_deriva']
+        df['PFD'] = df['PFD_medido'] / df['fator_deriva']
+        df['pasta'] = indice.pastas[df['indice'].to_numpy()]
+        colunas = ['arquivo', 'ID', 'linha', 'coluna', 'PFD', 'PPFD', 'PFD_medido', 'PPFD_medido', 'fator_deriva',
+                   'Time', 'campanha', 'sessao']
+        partes = [fn.mesclar_coordenadas(parte[colunas].reset_index(drop=True), pasta)
+                  for pasta, parte in df.groupby('pasta', sort=False)]
+        return pd.concat(partes, ignore_index=True)
+    except Exception as e:
+        print(f'Erro ao corrigir a deriva: {e}')
+        raise
+
+
+def analisar_estabilidade(pastas_principais, ponto_referencia: tuple = None, inicio=None, fim=None,
+                          salvar_csv: bool = True, pasta_saida: str = None) -> dict:
+    """
+    Monta o índice temporal de uma ou mais campanhas, estima a deriva por tratamento e sessão e, com salvar_csv,
+    grava 'estabilidade_deriva.csv' e 'estabilidade_repeticoes.csv' em 'pasta_saida' (padrão: a primeira pasta
+    principal, ou a pasta do pacote).
+
+    Returns:
+        dict: {'indice', 'pares', 'deriva', 'deriva_espectral', 'wl'}.
+
+    Exemplo:
+        resultado = analisar_estabilidade('Caminho/para/pasta_principal')
+        plotar_linha_do_tempo(resultado)
+    """
+    try:
+        indice = IndiceTemporal.de_pastas(pastas_principais)
+        resultado = calcular_deriva(indice, ponto_referencia, inicio, fim)
+        resultado['indice'] = indice
+        deriva, pares = resultado['deriva'], resultado['pares']
+        if indice.n_sem_tempo:
+            print(f'{indice.n_sem_tempo} medição(ões) sem Time válido ficaram fora do índice.')
+        print(f'{len(indice)} medições em {indice.sessao.max() + 1} sessão(ões); {len(pares)} repetição(ões).')
+        for _, linha in deriva[deriva['deriva_valida']].iterrows():
+            print(f"{linha['campanha']} {fn.NOMES_LEGENDA.get(linha['ID'], linha['ID'])} (sessão {linha['sessao']}): "
+                  f"deriva de {linha['deriva_%_h']:+.2f}%/h, {linha['deriva_total_%']:+.2f}% na sessão; "
+                  f"diferença mediana entre repetições {linha['diferenca_mediana_%']:.2f}%")
+        if salvar_csv:
+            if pasta_saida is None:
+                primeira = pastas_principais if isinstance(pastas_principais, str) else pastas_principais[0]
+                pacote, _ = fn.localizar_pacote(primeira)
+                pasta_saida = os.path.dirname(pacote) if pacote else primeira
+            fn.gravar_atomico(os.path.join(pasta_saida, 'estabilidade_deriva.csv'),
+                              lambda tmp: deriva.to_csv(tmp, index=False))
+            fn.gravar_atomico(os.path.join(pasta_saida, 'estabilidade_repeticoes.csv'),
+                              lambda tmp: pares.to_csv(tmp, index=False))
+            print(f'Análise de estabilidade salva em: {pasta_saida}')
+        return resultado
+    except Exception as e:
+        print(f'Erro ao analisar a estabilidade temporal: {e}')
+        raise
+
+
+def plotar_linha_do_tempo(resultado: dict, variavel: str = 'PPFD') -> None:
+    """
+    Plota as medições em ordem temporal (uma cor por tratamento) e liga cada repetição à sua referência, para
+    visualizar a deriva ao longo das sessões.
+    """
+    try:
+        df = resultado['indice'].para_dataframe()
+        pares = resultado['pares']
+        rotulo = fn.ROTULOS_VARIAVEIS.get(variavel, variavel)
+        fig = go.Figure()
+        for grupo, df_g in df.groupby('ID', sort=False):
+            fig.add_trace(go.Scatter(
+                x=df_g['Time'], y=df_g[variavel], mode='markers', name=fn.NOMES_LEGENDA.get(grupo, grupo),
+                text=df_g['arquivo'],
+                hovertemplate='%{text}<br>%{x}<br>' + variavel + ': %{y:.2f}<extra></extra>'))
+        if len(pares) and variavel == 'PPFD':
+            x = np.column_stack([pares['Time_ref'], pares['Time'], np.full(len(pares), None)]).ravel()
+            y = np.column_stack([pares['PPFD_ref'], pares['PPFD'], np.full(len(pares), None)]).ravel()
+            fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='Repetições',
+                                     line=dict(color='black', width=1, dash='dot'), hoverinfo='skip'))
+        fig.update_layout(
+            title='Medições em ordem temporal',
+            xaxis_title='Time',
+            yaxis_title=rotulo,
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar a linha do tempo: {e}')
+        raise
+
+
+def plotar_deriva_espectral(resultado: dict) -> None:
+    """Plota a deriva por comprimento de onda (% por hora) de cada tratamento e sessão com deriva aceita."""
+    try:
+        if resultado['deriva_espectral'] is None:
+            raise ValueError('O índice não tem espectros: use IndiceTemporal.de_pastas(..., espectros=True).')
+        deriva = resultado['deriva']
+        fig = go.Figure()
+        for i in np.flatnonzero(deriva['deriva_valida'].to_numpy()):
+            linha = deriva.iloc[i]
+            fig.add_trace(go.Scatter(
+                x=resultado['wl'], y=resultado['deriva_espectral'][i], mode='lines',
+                name=f"{fn.NOMES_LEGENDA.get(linha['ID'], linha['ID'])} (sessão {linha['sessao']})"))
+        fig.update_layout(
+            title='Deriva espectral entre repetições',
+            xaxis_title='Comprimento de onda (nm)',
+            yaxis_title='Deriva (% por hora)',
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar a deriva espectral: {e}')
+        raise
@@ -18,6 +18,70 @@ from matplotlib.colors import ListedColormap
 from tkinter import filedialog, messagebox, ttk
 import matplotlib.cm as cm
 import math
+import base64
+import json
+import tempfile
+import io
+import time
+import stat
+import hashlib
+import zipfile
+import threading
+from scipy.interpolate import CloughTocher2DInterpolator
+from scipy.spatial import Delaunay, cKDTree
+from scipy import sparse
+
+# Mapeamento dos nomes das subpastas para exibição amigável
+NOMES_LEGENDA = {
+    '99100': 'RBW100%',
+    '0T':    'RBW15%',
+    '100V':  'R100%',
+    '100B':  'W100%',
+    '100A':  'B100%',
+    '0V':    'R15%',
+    '0B':    'W15%',
+    '0A':    'B15%'
+}
+
+# Terminações dos nomes de arquivo que identificam cada tratamento
+PADROES_TERMINACAO = {
+    '100A': r'.*100A\..*$',
+    '100V': r'.*100V\..*$',
+    '100B': r'.*100B\..*$',
+    '0A': r'.*0A\..*$',
+    '0B': r'.*0B\..*$',
+    '0V': r'.*0V\..*$',
+    '0T': r'.*0T\..*$',
+    '99100': r'.*99100\..*$'
+}
+
+# Cor base de cada grupo (início do degradê usado nas superfícies)
+CORES_GRUPOS = {
+    '99100': (120, 81, 169),
+    '0T':    (103, 58, 183),
+    '100B':  (80, 80, 80),
+    '0B':    (120, 120, 120),
+    '100V':  (183, 28, 28),
+    '0V':    (229, 57, 53),
+    '100A':  (13, 71, 161),
+    '0A':    (21, 101, 192)
+}
+
+# Rótulos dos eixos Z das variáveis que podem ser plotadas por ponto
+ROTULOS_VARIAVEIS = {
+    'PPFD': 'PPFD (umol m⁻² s⁻¹)',
+    'PFD': 'PFD (umol m⁻² s⁻¹)',
+    'YPF': 'YPF (umol m⁻² s⁻¹)',
+    'PSS': 'PSS (Pfr/Ptotal)',
+    'PSS_aprox': 'PSS aproximado (Pfr/Ptotal)',
+    'R:FR': 'R:FR (660/730 nm)',
+    'B:R': 'B:R',
+    'R:B': 'R:B',
+    'delta_PPFD': 'ΔPPFD (umol m⁻² s⁻¹)',
+    'delta_PFD': 'ΔPFD (umol m⁻² s⁻¹)',
+    'razao_PPFD': 'Razão de PPFD (B/A)',
+    'razao_PFD': 'Razão de PFD (B/A)'
+}
 
 
 def organizar_arquivos_por_padrao(pasta: str) -> None:
@@ -79,93 +143,754 @@ def extrair_coordenadas_e_valores_espd(pasta: str, salvar_csv: bool = False) ->
         df = extrair_coordenadas_e_valores_espd('Caminho/para/pasta', salvar_csv=True)
     """
     try:
-        padrao_nome = re.compile(r'^ESPD_(\d)(\d)')
-        padroes_terminacao = {
-            '100A': r'.*100A\..*$',
-            '100V': r'.*100V\..*$',
-            '100B': r'.*100B\..*$',
-            '0A': r'.*0A\..*$',
-            '0B': r'.*0B\..*$',
-            '0V': r'.*0V\..*$',
-            '0T': r'.*0T\..*$',
-            '99100': r'.*99100\..*$'
-        }
-        dados = []
-        terminacao_encontrada = None
-        for arquivo in os.listdir(pasta):
-            match = padrao_nome.match(arquivo)
-            if match:
-                x = int(match.group(1))
-                y = int(match.group(2))
-                pfd = None
-                ppfd = None
-                terminacao = None
-                for nome_terminacao, padrao in padroes_terminacao.items():
-                    if re.match(padrao, arquivo):
-                        terminacao = nome_terminacao
-                        break
-                if terminacao and not terminacao_encontrada:
-                    terminacao_encontrada = terminacao
-                with open(os.path.join(pasta, arquivo), encoding='utf-8') as f:
-                    for linha in f:
-                        if linha.startswith('PFD\t') or linha.startswith('PFD '):
-                            partes = re.split(r'\s+|\t+', linha.strip())
-                            if len(partes) > 1:
-                                pfd = float(partes[1].replace(',', '.'))
-                        if linha.startswith('PPFD\t') or linha.startswith('PPFD '):
-                            partes = re.split(r'\s+|\t+', linha.strip())
-                            if len(partes) > 1:
-                                ppfd = float(partes[1].replace(',', '.'))
-                dados.append({'arquivo': arquivo, 'ID': terminacao, 'linha': x,
-                             'coluna': y, 'PFD': pfd, 'PPFD': ppfd})
-        df = pd.DataFrame(dados)
-        for col in ['linha', 'coluna']:
-            if col not in df.columns:
-                df[col] = pd.Series(dtype=int)
-        caminho_coordenadas = os.path.join(pasta, '..', 'coordenadas.csv')
-        caminho_coordenadas = os.path.abspath(caminho_coordenadas)
-        if os.path.exists(caminho_coordenadas):
-            df_coord = pd.read_csv(caminho_coordenadas)
-            df = pd.merge(df, df_coord[['x', 'y', 'linha', 'coluna']], left_on=[
-                          'linha', 'coluna'], right_on=['x', 'y'], how='left')
-            df['X'] = df['linha_y']
-            df['Y'] = df['coluna_y']
-            df = df.drop(columns=['x', 'y', 'linha_y', 'coluna_y'])
-            df = df.rename(columns={'linha_x': 'linha', 'coluna_x': 'coluna'})
-            df = df.rename(
-                columns={'linha': 'X', 'coluna': 'Y', 'X': 'linha', 'Y': 'coluna'})
+        colecao = ColecaoMedicoes.de_pasta(pasta, espectros=False)
+        terminacao_encontrada = next(
+            (g for g in colecao.grupos_por_medicao() if g), None)
+        df = mesclar_coordenadas(colecao.para_dataframe(), pasta)
 
         if salvar_csv and terminacao_encontrada:
             nome_csv = f"df_all_files_{terminacao_encontrada}.csv"
             caminho_csv = os.path.join(pasta, nome_csv)
-            if os.path.exists(caminho_csv):
-                os.remove(caminho_csv)
-            df.to_csv(caminho_csv, index=False)
+            gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
         elif salvar_csv:
             caminho_csv = os.path.join(pasta, "df_all_files.csv")
-            if os.path.exists(caminho_csv):
-                os.remove(caminho_csv)
-            df.to_csv(caminho_csv, index=False)
+            gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
         return df
     except Exception as e:
         print(f'Erro ao extrair coordenadas e valores: {e}')
         raise
 
 
-def plotar_3d_ppfd(df: pd.DataFrame, usar_ppfd: bool = True) -> None:
+def mesclar_coordenadas(df: pd.DataFrame, pasta: str) -> pd.DataFrame:
+    """
+    Faz merge do DataFrame de medições (colunas 'linha' e 'coluna' com a posição na grade) com o arquivo
+    coordenadas.csv da pasta principal (um nível acima de 'pasta'), se existir. A posição na grade passa para
+    'X' e 'Y' e as coordenadas reais ficam em 'linha' e 'coluna'.
+    """
+    caminho_coordenadas = os.path.join(pasta, '..', 'coordenadas.csv')
+    caminho_coordenadas = os.path.abspath(caminho_coordenadas)
+    if existe(caminho_coordenadas):
+        df_coord = ler_csv(caminho_coordenadas)
+        df = pd.merge(df, df_coord[['x', 'y', 'linha', 'coluna']], left_on=[
+                      'linha', 'coluna'], right_on=['x', 'y'], how='left')
+        df['X'] = df['linha_y']
+        df['Y'] = df['coluna_y']
+        df = df.drop(columns=['x', 'y', 'linha_y', 'coluna_y'])
+        df = df.rename(columns={'linha_x': 'linha', 'coluna_x': 'coluna'})
+        df = df.rename(
+            columns={'linha': 'X', 'coluna': 'Y', 'X': 'linha', 'Y': 'coluna'})
+    return df
+
+
+# os.umask só pode ser lida trocando o valor; é lida uma vez aqui para não alterá-la com threads gravando
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def gravar_atomico(caminho: str, escrever) -> None:
+    """
+    Grava um arquivo de forma atômica: 'escrever' recebe um caminho temporário na mesma pasta e, se terminar sem erro,
+    o temporário substitui o destino com os.replace. Uma falha no meio da gravação nunca deixa o arquivo antigo apagado
+    nem um arquivo truncado no lugar.
+
+    Args:
+        caminho (str): Caminho final do arquivo.
+        escrever (callable): Função que grava o conteúdo no caminho recebido.
+
+    Exemplo:
+        gravar_atomico('saida.csv', lambda tmp: df.to_csv(tmp, index=False))
+    """
+    if localizar_pacote(os.path.dirname(os.path.abspath(caminho)))[0] is not None:
+        raise ValueError(f'Pacotes de campanha são somente leitura; grave fora do pacote: {caminho}')
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(
+        dir=pasta, prefix='.tmp_', suffix=os.path.splitext(caminho)[1])
+    os.close(fd)
+    try:
+        escrever(temporario)
+        # mkstemp cria o temporário com modo 0600: mantém o modo do destino ou o padrão da umask
+        if os.path.exists(caminho):
+            modo = stat.S_IMODE(os.stat(caminho).st_mode)
+        else:
+            modo = 0o666 & ~_UMASK
+        os.chmod(temporario, modo)
+        os.replace(temporario, caminho)
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+
+# Relatórios HTML: pasta padrão de saída e forma de carregar o plotly.js. No modo 'local' o bundle é gravado uma
+# única vez em <pasta dos relatórios>/assets/plotly-<versão>.min.js e referenciado por caminho relativo, de modo que
+# os relatórios abrem sem internet e continuam pequenos; 'cdn' e 'inline' mantêm os comportamentos do Plotly.
+PASTA_RELATORIOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'reports')
+MODO_PLOTLYJS = 'local'
+
+
+def preparar_plotlyjs(pasta_saida: str) -> str:
+    """
+    Garante que o bundle do plotly.js da versão instalada esteja em <pasta_saida>/assets e devolve o caminho relativo
+    usado na tag <script>. O arquivo tem a versão no nome e é reaproveitado entre execuções; só é gravado de novo
+    quando a versão do Plotly muda.
+    """
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+    relativo = f'assets/plotly-{get_plotlyjs_version()}.min.js'
+    caminho = os.path.join(pasta_saida, *relativo.split('/'))
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        def escrever(temporario):
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(get_plotlyjs())
+
+        gravar_atomico(caminho, escrever)
+        print(f'plotly.js gravado em: {caminho}')
+    return relativo
+
+
+def gravar_relatorio_html(fig, titulo: str, corpo: str, scripts: str, nome_arquivo: str, pasta_saida: str = None,
+                          modo_plotlyjs: str = None, abrir: bool = True) -> str:
+    """
+    Grava um relatório HTML interativo com a figura Plotly, o conteúdo acima dela ('corpo': títulos, seletores e
+    checkboxes) e os scripts da página ('scripts').
+
+    Args:
+        fig: Figura Plotly.
+        titulo (str): Título da página.
+        corpo (str): HTML exibido acima do gráfico.
+        scripts (str): Blocos <script> executados depois do gráfico.
+        nome_arquivo (str): Nome do arquivo .html.
+        pasta_saida (str, opcional): Pasta do relatório. Padrão é PASTA_RELATORIOS.
+        modo_plotlyjs (str, opcional): 'local' (bundle compartilhado em assets/), 'cdn' ou 'inline'.
+            Padrão é MODO_PLOTLYJS.
+        abrir (bool, opcional): Se True, abre o relatório no navegador. Padrão é True.
+
+    Returns:
+        str: Caminho do relatório gravado.
+    """
+    pasta_saida = os.path.abspath(pasta_saida or PASTA_RELATORIOS)
+    modo_plotlyjs = modo_plotlyjs or MODO_PLOTLYJS
+    if modo_plotlyjs not in ('local', 'cdn', 'inline'):
+        raise ValueError(f"Modo do plotly.js desconhecido: {modo_plotlyjs}. Use 'local', 'cdn' ou 'inline'.")
+    os.makedirs(pasta_saida, exist_ok=True)
+    cabecalho = ''
+    if modo_plotlyjs == 'local':
+        cabecalho = f"<script src='{preparar_plotlyjs(pasta_saida)}' charset='utf-8'></script>"
+    grafico = pio.to_html(fig, include_plotlyjs={'local': False, 'cdn': 'cdn', 'inline': True}[modo_plotlyjs],
+                          full_html=False, config={"displayModeBar": True})
+    html_final = f"""
+    <html><head><meta charset='utf-8'><title>{titulo}</title>{cabecalho}</head><body style='font-family:Segoe UI,Segoe,Arial;'>
+    {corpo}
+    {grafico}
+    {scripts}
+    </body></html>
+    """
+    saida = os.path.join(pasta_saida, nome_arquivo)
+
+    def escrever(temporario):
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(html_final)
+
+    gravar_atomico(saida, escrever)
+    if abrir:
+        webbrowser.open('file://' + saida)
+    return saida
+
+# Pacote de campanha: um único arquivo .zip com todos os arquivos da pasta principal (caminhos relativos, bytes
+# originais) e um índice com tamanho, SHA-256 e data de modificação de cada arquivo. Caminhos que atravessam o pacote
+# ('D:/campanha.zip/0A/ESPD_1190A.txt') são aceitos pelas funções de leitura por meio de listar_pasta, eh_pasta,
+# existe, abrir_texto e ler_csv.
+EXTENSAO_PACOTE = '.zip'
+INDICE_PACOTE = 'indice_pacote.json'
+_PACOTES_ABERTOS = {}
+
+
+class PacoteCampanha:
+    """
+    Leitura com acesso aleatório de um pacote de campanha. O zip é aberto uma única vez e o diretório central é
+    convertido em um índice de pastas em memória; listar uma pasta ou ler um arquivo não faz nenhuma chamada ao
+    sistema de arquivos além da leitura do próprio membro.
+
+    Exemplo:
+        pacote = abrir_pacote('D:/campanha.zip')
+        print(pacote.listar('0A')[:3])
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._zip = zipfile.ZipFile(caminho)
+        self._trava = threading.Lock()
+        self.pastas = {'': set()}
+        for nome in self._zip.namelist():
+            if nome == INDICE_PACOTE or nome.endswith('/'):
+                continue
+            partes = nome.split('/')
+            for i in range(len(partes)):
+                pai = '/'.join(partes[:i])
+                self.pastas.setdefault(pai, set()).add(partes[i])
+        self.pastas = {pasta: sorted(itens) for pasta, itens in self.pastas.items()}
+        self.arquivos = set(n for n in self._zip.namelist() if not n.endswith('/')) - {INDICE_PACOTE}
+
+    def listar(self, interno: str) -> list:
+        if interno not in self.pastas:
+            raise FileNotFoundError(f'Pasta não encontrada no pacote: {self.caminho}/{interno}')
+        return list(self.pastas[interno])
+
+    def ler_bytes(self, interno: str) -> bytes:
+        if interno not in self.arquivos:
+            raise FileNotFoundError(f'Arquivo não encontrado no pacote: {self.caminho}/{interno}')
+        with self._trava:
+            return self._zip.read(interno)
+
+    def indice(self) -> dict:
+        """Índice gravado por empacotar_campanha: {caminho relativo: {'tamanho', 'sha256', 'mtime'}}."""
+        with self._trava:
+            return json.loads(self._zip.read(INDICE_PACOTE).decode('utf-8'))
+
+    def fechar(self) -> None:
+        with self._trava:
+            self._zip.close()
+
+
+def abrir_pacote(caminho: str) -> PacoteCampanha:
+    """Abre um pacote de campanha, reaproveitando o já aberto na sessão."""
+    chave = os.path.abspath(caminho)
+    if chave not in _PACOTES_ABERTOS:
+        _PACOTES_ABERTOS[chave] = PacoteCampanha(chave)
+    return _PACOTES_ABERTOS[chave]
+
+
+def fechar_pacote(caminho: str) -> None:
+    """Fecha e remove da sessão o pacote aberto por abrir_pacote, se houver (necessário antes de regravá-lo)."""
+    pacote = _PACOTES_ABERTOS.pop(os.path.abspath(caminho), None)
+    if pacote is not None:
+        pacote.fechar()
+
+
+def localizar_pacote(caminho: str) -> tuple:
+    """
+    Separa um caminho que atravessa um pacote em (caminho do pacote, caminho interno com '/').
+
+    Returns:
+        tuple: (pacote, interno), ou (None, None) se o caminho é uma pasta ou arquivo comum.
+    """
+    caminho = os.path.normpath(os.path.abspath(caminho))
+    if EXTENSAO_PACOTE not in caminho.lower():
+        return None, None
+    partes = caminho.split(os.sep)
+    for i in range(len(partes), 0, -1):
+        prefixo = os.sep.join(partes[:i])
+        if prefixo.lower().endswith(EXTENSAO_PACOTE) and (prefixo in _PACOTES_ABERTOS or os.path.isfile(prefixo)):
+            return prefixo, '/'.join(partes[i:])
+    return None, None
+
+
+def listar_pasta(caminho: str) -> list:
+    """os.listdir que também lista pastas dentro de um pacote de campanha."""
+    pacote, interno = localizar_pacote(caminho)
+    return os.listdir(caminho) if pacote is None else abrir_pacote(pacote).listar(interno)
+
+
+def eh_pasta(caminho: str) -> bool:
+    """os.path.isdir que também reconhece pastas dentro de um pacote (e o próprio pacote como pasta)."""
+    pacote, interno = localizar_pacote(caminho)
+    return os.path.isdir(caminho) if pacote is None else interno in abrir_pacote(pacote).pastas
+
+
+def existe(caminho: str) -> bool:
+    """os.path.exists que também procura arquivos e pastas dentro de um pacote."""
+    pacote, interno = localizar_pacote(caminho)
+    if pacote is None:
+        return os.path.exists(caminho)
+    conteudo = abrir_pacote(pacote)
+    return interno in conteudo.arquivos or interno in conteudo.pastas
+
+
+def abrir_texto(caminho: str, encoding: str = 'utf-8'):
+    """open(caminho, encoding=...) para leitura de texto, de um arquivo comum ou de dentro de um pacote."""
+    pacote, interno = localizar_pacote(caminho)
+    if pacote is None:
+        return open(caminho, encoding=encoding)
+    return io.TextIOWrapper(io.BytesIO(abrir_pacote(pacote).ler_bytes(interno)), encoding=encoding)
+
+
+def ler_csv(caminho: str, **kwargs) -> pd.DataFrame:
+    """pd.read_csv de um arquivo comum ou de dentro de um pacote."""
+    pacote, interno = localizar_pacote(caminho)
+    if pacote is None:
+        return pd.read_csv(caminho, **kwargs)
+    return pd.read_csv(io.BytesIO(abrir_pacote(pacote).ler_bytes(interno)), **kwargs)
+
+
+def percorrer_pasta(caminho: str):
+    """os.walk (de cima para baixo, em ordem alfabética) para pastas comuns ou dentro de um pacote."""
+    pacote, interno = localizar_pacote(caminho)
+    if pacote is None:
+        for dirpath, dirnames, filenames in os.walk(caminho):
+            dirnames.sort()
+            yield dirpath, dirnames, sorted(filenames)
+        return
+    conteudo = abrir_pacote(pacote)
+    pendentes = [interno]
+    while pendentes:
+        atual = pendentes.pop(0)
+        itens = conteudo.pastas.get(atual, [])
+        prefixo = f'{atual}/' if atual else ''
+        subpastas = [i for i in itens if prefixo + i in conteudo.pastas]
+        yield (os.path.join(pacote, *atual.split('/')) if atual else pacote), subpastas, \
+            [i for i in itens if i not in subpastas]
+        pendentes.extend(prefixo + s for s in subpastas)
+
+
+def empacotar_campanha(pasta_principal: str, caminho_pacote: str = None, nivel: int = 9) -> str:
+    """
+    Grava todos os arquivos da pasta principal (subpastas de tratamento, coordenadas.csv e demais arquivos) em um único
+    pacote .zip comprimido, com um índice (indice_pacote.json) de tamanho, SHA-256 e data de modificação de cada
+    arquivo. Os bytes de cada arquivo são guardados sem alteração e podem ser restaurados com desempacotar_campanha.
+    As funções de leitura aceitam caminhos dentro do pacote ('campanha.zip/0A') como se fossem pastas.
+
+    Args:
+        pasta_principal (str): Pasta principal da campanha.
+        caminho_pacote (str, opcional): Arquivo de saída. Padrão é '<pasta_principal>.zip' ao lado da pasta.
+        nivel (int, opcional): Nível de compressão DEFLATE (0–9). Padrão é 9.
+
+    Returns:
+        str: Caminho do pacote gravado.
+
+    Exemplo:
+        pacote = empacotar_campanha('D:/campanha_2025_06')
+        df = extrair_coordenadas_e_valores_espd(os.path.join(pacote, '0A'))
+    """
+    try:
+        pasta_principal = os.path.abspath(pasta_principal)
+        caminho_pacote = os.path.abspath(caminho_pacote or pasta_principal.rstrip(os.sep) + EXTENSAO_PACOTE)
+        arquivos = []
+        for dirpath, dirnames, filenames in os.walk(pasta_principal):
+            dirnames.sort()
+            for nome in sorted(filenames):
+                caminho = os.path.join(dirpath, nome)
+                if caminho == caminho_pacote or nome.startswith('.tmp_'):
+                    continue
+                arquivos.append((os.path.relpath(caminho, pasta_principal).replace(os.sep, '/'), caminho))
+        if not arquivos:
+            raise ValueError(f'Nenhum arquivo encontrado em {pasta_principal}.')
+
+        def escrever(temporario):
+            indice = {}
+            with zipfile.ZipFile(temporario, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=nivel) as zf:
+                for relativo, caminho in arquivos:
+                    with open(caminho, 'rb') as f:
+                        conteudo = f.read()
+                    estado = os.stat(caminho)
+                    info = zipfile.ZipInfo(relativo, date_time=time.localtime(max(estado.st_mtime, 315532800))[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    zf.writestr(info, conteudo, compresslevel=nivel)
+                    indice[relativo] = {'tamanho': len(conteudo), 'sha256': hashlib.sha256(conteudo).hexdigest(),
+                                        'mtime': estado.st_mtime}
+                zf.writestr(INDICE_PACOTE, json.dumps(indice, ensure_ascii=False, indent=0))
+
+        # O zip em cache mantém o arquivo antigo aberto: no Windows o os.replace falharia e, nos demais sistemas,
+        # as leituras seguintes continuariam vendo o conteúdo antigo
+        fechar_pacote(caminho_pacote)
+        gravar_atomico(caminho_pacote, escrever)
+        tamanho_original = sum(os.path.getsize(c) for _, c in arquivos)
+        print(f'{len(arquivos)} arquivos ({tamanho_original / 1e6:.1f} MB) empacotados em {caminho_pacote} '
+              f'({os.path.getsize(caminho_pacote) / 1e6:.1f} MB).')
+        return caminho_pacote
+    except Exception as e:
+        print(f'Erro ao empacotar campanha: {e}')
+        raise
+
+
+def verificar_pacote(caminho_pacote: str) -> pd.DataFrame:
+    """
+    Confere cada arquivo do pacote com o índice gravado (tamanho e SHA-256).
+
+    Returns:
+        pd.DataFrame: Uma linha por arquivo com 'arquivo', 'tamanho', 'sha256' e 'ok'.
+    """
+    pacote = abrir_pacote(caminho_pacote)
+    linhas = []
+    for relativo, info in pacote.indice().items():
+        conteudo = pacote.ler_bytes(relativo)
+        linhas.append({'arquivo': relativo, 'tamanho': info['tamanho'], 'sha256': info['sha256'],
+                       'ok': len(conteudo) == info['tamanho'] and hashlib.sha256(conteudo).hexdigest() == info['sha256']})
+    return pd.DataFrame(linhas, columns=['arquivo', 'tamanho', 'sha256', 'ok'])
+
+
+def desempacotar_campanha(caminho_pacote: str, pasta_destino: str) -> int:
+    """
+    Restaura os arquivos originais de um pacote, byte a byte, com as datas de modificação originais.
+    Cada arquivo é conferido com o SHA-256 do índice antes de ser gravado.
+
+    Returns:
+        int: Número de arquivos restaurados.
+    """
+    try:
+        pacote = abrir_pacote(caminho_pacote)
+        indice = pacote.indice()
+        for relativo, info in indice.items():
+            conteudo = pacote.ler_bytes(relativo)
+            if hashlib.sha256(conteudo).hexdigest() != info['sha256']:
+                raise ValueError(f'Arquivo corrompido no pacote: {relativo}')
+            destino = os.path.join(pasta_destino, *relativo.split('/'))
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            with open(destino, 'wb') as f:
+                f.write(conteudo)
+            os.utime(destino, (info['mtime'], info['mtime']))
+        print(f'{len(indice)} arquivos restaurados em {pasta_destino}.')
+        return len(indice)
+    except Exception as e:
+        print(f'Erro ao desempacotar campanha: {e}')
+        raise
+
+
+def exportar_campanha(pasta_principal: str, pasta_saida: str = None, formato: str = 'parquet',
+                      espectros: str = 'largo', nome_campanha: str = None) -> dict:
+    """
+    Exporta uma campanha inteira (todas as subpastas de tratamento) para duas tabelas colunares:
+
+    - '<campanha>_medicoes.<ext>': uma linha por arquivo ESPD, com ID do tratamento (categórico), posição na grade,
+      coordenadas reais (coordenadas.csv), Time, Serial Number e todas as métricas numéricas do arquivo.
+    - '<campanha>_espectros.<ext>': irradiância espectral do bloco ESPD (mW m⁻² nm⁻¹) em float32, ligada às medições pela
+      coluna 'medicao'. No formato 'largo' há uma coluna por comprimento de onda ('380', '381', ...); no 'longo', uma linha
+      por medição e comprimento de onda.
+
+    As gravações são atômicas (arquivo temporário + substituição). Requer o pacote 'pyarrow'.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas ESPD.
+        pasta_saida (str, opcional): Pasta de destino. Padrão é a própria pasta principal.
+        formato (str, opcional): 'parquet' ou 'feather'. Padrão é 'parquet'.
+        espectros (str, opcional): 'largo' ou 'longo'. Padrão é 'largo'.
+        nome_campanha (str, opcional): Prefixo dos arquivos. Padrão é o nome da pasta principal.
+
+    Returns:
+        dict: {'medicoes': caminho, 'espectros': caminho}.
+
+    Exemplo:
+        caminhos = exportar_campanha('Caminho/para/pasta_principal', formato='feather')
+    """
+    try:
+        if formato not in ('parquet', 'feather'):
+            raise ValueError(
+                f"Formato desconhecido: {formato}. Use 'parquet' ou 'feather'.")
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "A exportação colunar requer o pacote 'pyarrow'. Instale com: pip install pyarrow")
+        pacote, _ = localizar_pacote(pasta_principal)
+        # Pacotes são somente leitura: a saída padrão fica ao lado do pacote
+        pasta_saida = pasta_saida or (os.path.dirname(pacote) if pacote else pasta_principal)
+        nome_campanha = nome_campanha or os.path.basename(
+            os.path.abspath(pasta_principal))
+        padrao_nome = re.compile(r'^ESPD_(\d)(\d)')
+
+        coordenadas = {}
+        caminho_coordenadas = os.path.join(pasta_principal, 'coordenadas.csv')
+        if existe(caminho_coordenadas):
+            df_coord = ler_csv(caminho_coordenadas)
+            for _, c in df_coord.iterrows():
+                coordenadas[(int(c['x']), int(c['y']))] = (
+                    c['linha'], c['coluna'])
+
+        registros = []
+        blocos = []
+        wl_ref = None
+        subpastas = sorted(p for p in listar_pasta(pasta_principal)
+                           if eh_pasta(os.path.join(pasta_principal, p)))
+        for subpasta in subpastas:
+            for arquivo in sorted(listar_pasta(os.path.join(pasta_principal, subpasta))):
+                match = padrao_nome.match(arquivo)
+                if not match or not arquivo.endswith('.txt'):
+                    continue
+                cabecalho, wl, espectro = ler_arquivo_espd(
+                    os.path.join(pasta_principal, subpasta, arquivo))
+                if wl_ref is None:
+                    wl_ref = wl
+                elif len(wl) != len(wl_ref) or not np.allclose(wl, wl_ref):
+                    espectro = np.interp(wl_ref, wl, espectro)
+                x, y = int(match.group(1)), int(match.group(2))
+                linha, coluna = coordenadas.get((x, y), (np.nan, np.nan))
+                registros.append({'medicao': len(registros), 'ID': subpasta, 'arquivo': arquivo, 'X': x, 'Y': y,
+                                  'linha': linha, 'coluna': coluna, **cabecalho})
+                blocos.append(espectro)
+        if not registros:
+            raise ValueError(
+                f"Nenhum arquivo ESPD encontrado nas subpastas de {pasta_principal}.")
+
+        df_med = pd.DataFrame(registros)
+        df_med['medicao'] = df_med['medicao'].astype(np.int32)
+        df_med['ID'] = pd.Categorical(df_med['ID'])
+        for col in ('X', 'Y'):
+            df_med[col] = df_med[col].astype(np.int8)
+        for col in ('Model Name', 'Serial Number'):
+            if col in df_med.columns:
+                df_med[col] = df_med[col].astype('category')
+        if 'Time' in df_med.columns:
+            df_med['Time'] = pd.to_datetime(
+                df_med['Time'], format='%Y/%m/%d_%H:%M:%S', errors='coerce')
+
+        matriz = np.vstack(blocos).astype(np.float32)
+        if espectros == 'largo':
+            df_esp = pd.DataFrame(matriz, columns=[f'{w:g}' for w in wl_ref])
+            df_esp.insert(0, 'medicao', df_med['medicao'].to_numpy())
+        elif espectros == 'longo':
+            df_esp = pd.DataFrame({
+                'medicao': np.repeat(df_med['medicao'].to_numpy(), len(wl_ref)),
+                'Wavelength(nm)': np.tile(wl_ref.astype(np.int16), len(matriz)),
+                'irradiancia': matriz.ravel(),
+            })
+        else:
+            raise ValueError(
+                f"Formato espectral desconhecido: {espectros}. Use 'largo' ou 'longo'.")
+
+        os.makedirs(pasta_saida, exist_ok=True)
+        extensao = 'parquet' if formato == 'parquet' else 'feather'
+        caminhos = {}
+        for chave, tabela in (('medicoes', df_med), ('espectros', df_esp)):
+            caminho = os.path.join(
+                pasta_saida, f'{nome_campanha}_{chave}.{extensao}')
+            if formato == 'parquet':
+                gravar_atomico(caminho, lambda tmp, t=tabela: t.to_parquet(
+                    tmp, index=False, compression='zstd'))
+            else:
+                gravar_atomico(caminho, lambda tmp, t=tabela: t.to_feather(
+                    tmp, compression='zstd'))
+            caminhos[chave] = caminho
+            print(f'Exportado: {caminho}')
+        return caminhos
+    except Exception as e:
+        print(f'Erro ao exportar campanha: {e}')
+        raise
+
+
+def carregar_campanha(caminho_medicoes: str, caminho_espectros: str = None) -> tuple:
+    """
+    Carrega as tabelas gravadas por exportar_campanha (Parquet ou Feather, pela extensão).
+
+    Args:
+        caminho_medicoes (str): Caminho da tabela de medições.
+        caminho_espectros (str, opcional): Caminho da tabela espectral. Se None, é deduzido do caminho das medições.
+
+    Returns:
+        tuple: (DataFrame de medições, DataFrame de espectros).
+    """
+    if caminho_espectros is None:
+        caminho_espectros = caminho_medicoes.replace(
+            '_medicoes.', '_espectros.')
+
+    def ler(caminho):
+        if caminho.endswith('.feather'):
+            return pd.read_feather(caminho)
+        return pd.read_parquet(caminho)
+    return ler(caminho_medicoes), ler(caminho_espectros)
+
+
+def ler_arquivo_espd(arquivo: str) -> tuple:
+    """
+    Lê um arquivo ESPD_*.txt completo: cabeçalho (PPFD, PFD, Time, I-Time, ...), bloco espectral
+    (linhas '380nm', '381nm', ...) e métricas finais (CCT, Duv, CRI, R1–R15, ...).
+
+    Args:
+        arquivo (str): Caminho do arquivo ESPD_*.txt.
+
+    Returns:
+        tuple: (cabecalho, comprimentos de onda, irradiância espectral em mW m⁻² nm⁻¹).
+            O cabeçalho é um dict; valores numéricos são convertidos para float e os demais ficam como texto.
+
+    Exemplo:
+        cabecalho, wl, espectro = ler_arquivo_espd('0A/ESPD_1190A.txt')
+        print(cabecalho['PPFD'], cabecalho['Time'])
+    """
+    padrao_nm = re.compile(r'^(\d+(?:\.\d+)?)nm$')
+    cabecalho = {}
+    wl = []
+    valores = []
+    with abrir_texto(arquivo) as f:
+        for linha in f:
+            partes = linha.strip().split('\t')
+            if len(partes) < 2:
+                partes = re.split(r'\s+', linha.strip(), maxsplit=1)
+            if len(partes) < 2:
+                continue
+            chave = partes[0].strip()
+            valor = partes[1].strip()
+            match = padrao_nm.match(chave)
+            if match:
+                wl.append(float(match.group(1)))
+                valores.append(float(valor.replace(',', '.')))
+                continue
+            try:
+                cabecalho[chave] = float(valor.replace(',', '.'))
+            except ValueError:
+                cabecalho[chave] = valor
+    return cabecalho, np.array(wl), np.array(valores)
+
+
+class ColecaoMedicoes:
+    """
+    Coleção compacta de medições do LI-180. Os valores escalares ficam em um array estruturado do NumPy e os espectros
+    em um único bloco 2D float32 pré-alocado (medições x comprimentos de onda), que cresce por duplicação.
+    Cada medição ocupa aproximadamente o tamanho dos dados brutos (~1,6 KB para 401 comprimentos de onda), em vez de um
+    dict e um DataFrame por arquivo. A conversão para DataFrame é feita apenas na saída (para_dataframe).
+
+    Exemplo:
+        colecao = ColecaoMedicoes.de_pasta('Caminho/para/0A')
+        df = colecao.para_dataframe()
+        matriz = colecao.espectros  # (n, 401) float32
+    """
+
+    __slots__ = ('_dados', '_espectros', 'wl', 'arquivos', 'grupos', 'n')
+
+    DTYPE = np.dtype([('grupo', np.int16), ('X', np.int8), ('Y', np.int8), ('PFD', np.float64),
+                      ('PPFD', np.float64), ('I-Time', np.float32), ('Time', 'datetime64[s]')])
+
+    def __init__(self, capacidade: int = 64, wl: np.ndarray = None):
+        self._dados = np.zeros(capacidade, dtype=self.DTYPE)
+        self.wl = None if wl is None else np.asarray(wl, dtype=float)
+        self._espectros = None if wl is None else np.full(
+            (capacidade, len(self.wl)), np.nan, dtype=np.float32)
+        self.arquivos = []
+        self.grupos = []
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def _crescer(self):
+        capacidade = max(2 * len(self._dados), 1)
+        self._dados = np.resize(self._dados, capacidade)
+        if self._espectros is not None:
+            novo = np.full((capacidade, self._espectros.shape[1]), np.nan, dtype=np.float32)
+            novo[:self.n] = self._espectros[:self.n]
+            self._espectros = novo
+
+    def adicionar(self, arquivo: str, grupo: str, x: int, y: int, cabecalho: dict,
+                  wl: np.ndarray = None, espectro: np.ndarray = None) -> None:
+        """
+        Adiciona uma medição. 'cabecalho' é o dict retornado por ler_arquivo_espd (PFD, PPFD, I-Time e Time são
+        copiados). Se houver espectro, ele é gravado na grade de comprimentos de onda da coleção (reamostrado se preciso).
+        """
+        if self.n == len(self._dados):
+            self._crescer()
+        if grupo not in self.grupos:
+            self.grupos.append(grupo)
+        registro = self._dados[self.n]
+        registro['grupo'] = self.grupos.index(grupo)
+        registro['X'] = x if x is not None else -1
+        registro['Y'] = y if y is not None else -1
+        for campo in ('PFD', 'PPFD', 'I-Time'):
+            valor = cabecalho.get(campo)
+            registro[campo] = valor if isinstance(valor, float) else np.nan
+        registro['Time'] = _converter_time(cabecalho.get('Time'))
+        if espectro is not None:
+            if self._espectros is None:
+                self.wl = np.asarray(wl, dtype=float)
+                self._espectros = np.full(
+                    (len(self._dados), len(self.wl)), np.nan, dtype=np.float32)
+            elif len(wl) != len(self.wl) or not np.allclose(wl, self.wl):
+                espectro = np.interp(self.wl, wl, espectro, left=np.nan, right=np.nan)
+            self._espectros[self.n] = espectro
+        self.arquivos.append(arquivo)
+        self.n += 1
+
+    @property
+    def dados(self) -> np.ndarray:
+        """Array estruturado com os valores escalares das medições (visão, sem cópia)."""
+        return self._dados[:self.n]
+
+    @property
+    def espectros(self) -> np.ndarray:
+        """Bloco (medições x comprimentos de onda) float32 com os espectros (visão, sem cópia), ou None."""
+        return None if self._espectros is None else self._espectros[:self.n]
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays da coleção, em bytes."""
+        total = self._dados.nbytes
+        if self._espectros is not None:
+            total += self._espectros.nbytes
+        return total
+
+    def grupos_por_medicao(self) -> list:
+        """Nome do grupo de cada medição, na ordem de inserção."""
+        return [self.grupos[i] for i in self.dados['grupo']]
+
+    def para_dataframe(self, incluir_espectros: bool = False) -> pd.DataFrame:
+        """
+        Converte a coleção para o DataFrame usado pelas funções de plotagem: 'arquivo', 'ID', 'linha' e 'coluna'
+        (posição na grade), 'PFD' e 'PPFD'. Com incluir_espectros=True, acrescenta uma coluna por comprimento de onda.
+        """
+        dados = self.dados
+        df = pd.DataFrame({
+            'arquivo': self.arquivos,
+            'ID': self.grupos_por_medicao(),
+            'linha': dados['X'].astype(np.int64),
+            'coluna': dados['Y'].astype(np.int64),
+            'PFD': dados['PFD'],
+            'PPFD': dados['PPFD'],
+        })
+        if incluir_espectros and self._espectros is not None:
+            df = pd.concat([df, pd.DataFrame(self.espectros, columns=[f'{w:g}nm' for w in self.wl])], axis=1)
+        return df
+
+    @classmethod
+    def de_pasta(cls, pasta: str, espectros: bool = True, colecao: 'ColecaoMedicoes' = None) -> 'ColecaoMedicoes':
+        """
+        Lê os arquivos ESPD_XY* de uma pasta para uma coleção (nova, ou 'colecao' se informada).
+        O grupo de cada medição é a terminação do nome (PADROES_TERMINACAO), como em extrair_coordenadas_e_valores_espd.
+
+        Args:
+            pasta (str): Pasta com os arquivos ESPD_*.
+            espectros (bool, opcional): Se True, guarda também o bloco espectral de cada arquivo. Padrão é True.
+            colecao (ColecaoMedicoes, opcional): Coleção existente à qual as medições são acrescentadas.
+        """
+        padrao_nome = re.compile(r'^ESPD_(\d)(\d)')
+        colecao = colecao if colecao is not None else cls()
+        for arquivo in listar_pasta(pasta):
+            match = padrao_nome.match(arquivo)
+            if not match:
+                continue
+            terminacao = None
+            for nome_terminacao, padrao in PADROES_TERMINACAO.items():
+                if re.match(padrao, arquivo):
+                    terminacao = nome_terminacao
+                    break
+            cabecalho, wl, espectro = ler_arquivo_espd(os.path.join(pasta, arquivo))
+            colecao.adicionar(arquivo, terminacao, int(match.group(1)), int(match.group(2)), cabecalho,
+                              wl if espectros else None, espectro if espectros else None)
+        return colecao
+
+
+def _converter_time(valor) -> np.datetime64:
+    """Converte o campo Time do LI-180 ('2025/06/25_15:17:17') para datetime64; NaT se ausente ou inválido."""
+    if not isinstance(valor, str):
+        return np.datetime64('NaT')
+    try:
+        return np.datetime64(valor.replace('/', '-').replace('_', 'T'), 's')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def plotar_3d_ppfd(df: pd.DataFrame, usar_ppfd: bool = True, variavel: str = None) -> None:
     """
     Plota um gráfico 3D de pontos usando Plotly, com linha (X), coluna (Y) e PPFD ou PFD (Z).
 
     Args:
         df (pd.DataFrame): DataFrame com colunas 'linha', 'coluna', 'PPFD', 'PFD'.
         usar_ppfd (bool, opcional): Se True, plota PPFD; se False, plota PFD. Padrão é True.
+        variavel (str, opcional): Outra coluna do DataFrame para o eixo Z (ex: 'YPF', 'R:FR'); ignora usar_ppfd.
 
     Exemplo:
         plotar_3d_ppfd(df, usar_ppfd=True)
     """
     try:
-        z_col = 'PPFD' if usar_ppfd else 'PFD'
-        z_label = 'PPFD (umol m⁻² s⁻¹)' if usar_ppfd else 'PFD (umol m⁻² s⁻¹)'
+        z_col = variavel or ('PPFD' if usar_ppfd else 'PFD')
+        z_label = ROTULOS_VARIAVEIS.get(z_col, z_col)
 
         fig = go.Figure(data=[go.Scatter3d(
             x=df['linha'],
@@ -209,7 +934,73 @@ def plotar_3d_ppfd(df: pd.DataFrame, usar_ppfd: bool = True) -> None:
         raise
 
 
-def plotar_surface_ppfd(df: pd.DataFrame, usar_ppfd: bool = True, interpolar: str = 'cubic') -> None:
+def calcular_pesos_interpolacao(x, y, xi: np.ndarray, yi: np.ndarray) -> dict:
+    """
+    Pré-calcula os pesos de interpolação de um conjunto de pontos medidos para uma grade, uma única vez.
+    Os pesos dependem apenas da geometria (pontos e grade), e podem ser reaproveitados para qualquer variável
+    (PPFD, PFD, cada comprimento de onda, ...) com interpolar_com_pesos, com o mesmo resultado do griddata.
+
+    Args:
+        x, y: Coordenadas dos pontos medidos.
+        xi (np.ndarray): Coordenadas X da grade (2D, como retornado por np.meshgrid).
+        yi (np.ndarray): Coordenadas Y da grade (2D).
+
+    Returns:
+        dict: 'tri' (triangulação de Delaunay), 'alvo' (pontos da grade),
+            'linear' (matriz esparsa grade x pontos com os pesos baricêntricos),
+            'fora' (máscara dos pontos da grade fora do fecho convexo), 'nearest' (índice do ponto mais próximo) e 'forma'.
+    """
+    pontos = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+    alvo = np.column_stack([xi.ravel(), yi.ravel()])
+    tri = Delaunay(pontos)
+    simplex = tri.find_simplex(alvo)
+    fora = simplex < 0
+    transformacao = tri.transform[simplex]
+    bary = np.einsum('ijk,ik->ij', transformacao[:, :2],
+                     alvo - transformacao[:, 2])
+    bary = np.column_stack([bary, 1 - bary.sum(axis=1)])
+    vertices = tri.simplices[simplex]
+    bary[fora] = 0.0
+    linhas = np.repeat(np.arange(len(alvo)), 3)
+    linear = sparse.csr_matrix((bary.ravel(), (linhas, vertices.ravel())),
+                               shape=(len(alvo), len(pontos)))
+    _, nearest = cKDTree(pontos).query(alvo)
+    return {'tri': tri, 'alvo': alvo, 'linear': linear, 'fora': fora, 'nearest': nearest, 'forma': xi.shape}
+
+
+def interpolar_com_pesos(pesos: dict, z, metodo: str = 'cubic') -> np.ndarray:
+    """
+    Interpola valores medidos na grade usando pesos pré-calculados por calcular_pesos_interpolacao.
+    'z' pode ser um vetor (um valor por ponto) ou uma matriz (pontos x variáveis, ex: um espectro por ponto).
+
+    Args:
+        pesos (dict): Resultado de calcular_pesos_interpolacao.
+        z: Valores nos pontos medidos.
+        metodo (str, opcional): 'cubic', 'linear' ou 'nearest'. Padrão é 'cubic'.
+
+    Returns:
+        np.ndarray: Grade interpolada (forma da grade, mais a dimensão das variáveis se 'z' for 2D). NaN fora do fecho convexo
+            para 'linear' e 'cubic'.
+    """
+    z = np.asarray(z, dtype=float)
+    forma = pesos['forma'] + z.shape[1:]
+    if metodo == 'nearest':
+        return z[pesos['nearest']].reshape(forma)
+    if metodo == 'linear':
+        zi = pesos['linear'] @ z
+    elif metodo == 'cubic':
+        # Reaproveita a triangulação; apenas os gradientes nos vértices dependem de z
+        zi = CloughTocher2DInterpolator(pesos['tri'], z)(pesos['alvo'])
+    else:
+        raise ValueError(
+            f"Método de interpolação desconhecido: {metodo}. Use 'cubic', 'linear' ou 'nearest'.")
+    zi = np.array(zi, dtype=float)
+    zi[pesos['fora']] = np.nan
+    return zi.reshape(forma)
+
+
+def plotar_surface_ppfd(df: pd.DataFrame, usar_ppfd: bool = True, interpolar: str = 'cubic',
+                        variavel: str = None) -> None:
     """
     Plota um gráfico Surface 3D interpolado com contornos usando Plotly.
     Permite escolher entre PPFD ou PFD via argumento.
@@ -219,13 +1010,15 @@ def plotar_surface_ppfd(df: pd.DataFrame, usar_ppfd: bool = True, interpolar: st
         df (pd.DataFrame): DataFrame com colunas 'linha', 'coluna', 'PPFD', 'PFD'.
         usar_ppfd (bool, opcional): Se True, plota PPFD; se False, plota PFD. Padrão é True.
         interpolar (str, opcional): Método de interpolação. Padrão é 'cubic'.
+        variavel (str, opcional): Outra coluna do DataFrame para o eixo Z (ex: 'YPF', 'R:FR' calculados por
+            metricas_fotobiologicas.metricas_por_ponto); ignora usar_ppfd.
 
     Exemplo:
         plotar_surface_ppfd(df, usar_ppfd=False, interpolar='linear')
     """
     try:
-        z_col = 'PPFD' if usar_ppfd else 'PFD'
-        z_label = 'PPFD (umol m⁻² s⁻¹)' if usar_ppfd else 'PFD (umol m⁻² s⁻¹)'
+        z_col = variavel or ('PPFD' if usar_ppfd else 'PFD')
+        z_label = ROTULOS_VARIAVEIS.get(z_col, z_col)
 
         x = df['linha']
         y = df['coluna']
@@ -278,10 +1071,19 @@ def plotar_surface_ppfd(df: pd.DataFrame, usar_ppfd: bool = True, interpolar: st
         raise
 
 
-def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True, interpolar: str = 'cubic') -> None:
+def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True, interpolar: str = 'cubic',
+                                 todas_combinacoes: bool = False, pasta_saida: str = None,
+                                 nome_campanha: str = None) -> None:
     """
     Plota múltiplas superfícies 3D interpoladas de PPFD ou PFD em um único gráfico Plotly.
     Permite seleção dinâmica dos grupos (superfícies) via checkboxes na página HTML, igual à função plot_spectral.
+
+    Com todas_combinacoes=True, todas as grades (PPFD/PFD x cúbica/linear/mais próxima x grupo) são calculadas uma única
+    vez, com os pesos de interpolação de cada grupo reaproveitados entre as variáveis, e embutidas no HTML em float32
+    (base64). Listas de seleção na página trocam a variável e o método no próprio navegador, sem refazer o gráfico.
+
+    A página é gravada em 'pasta_saida' (padrão: PASTA_RELATORIOS) por gravar_relatorio_html, como
+    'multiplas_surfaces_interativo_<nome_campanha>.html' (padrão do nome: os grupos plotados, unidos por '-').
     """
     try:
         # Paletas de degradê personalizadas conforme solicitado
@@ -295,16 +1097,6 @@ def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True,
             '100A':  [[0, 'rgb(13,71,161)'], [1, 'rgb(100,181,246)']],
             '0A':    [[0, 'rgb(21,101,192)'], [1, 'rgb(144,202,249)']]
         }
-        nomes_legenda = {
-            '99100': 'RBW100%',
-            '0T':    'RBW15%',
-            '100V':  'R100%',
-            '100B':  'W100%',
-            '100A':  'B100%',
-            '0V':    'R15%',
-            '0B':    'W15%',
-            '0A':    'B15%'
-        }
 
         def escolher_cores(nome):
             for chave, cores in cores_por_nome.items():
@@ -313,7 +1105,7 @@ def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True,
             return [[0, 'rgb(200,200,200)'], [1, 'rgb(80,80,80)']]
 
         def nome_legenda_grupo(nome):
-            for chave, valor in nomes_legenda.items():
+            for chave, valor in NOMES_LEGENDA.items():
                 if chave in nome:
                     return valor
             return nome
@@ -321,6 +1113,9 @@ def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True,
         z_label = 'PPFD (umol m⁻² s⁻¹)' if usar_ppfd else 'PFD (umol m⁻² s⁻¹)'
         fig = go.Figure()
         grupos_legenda = []
+        variaveis = ['PPFD', 'PFD']
+        metodos = ['cubic', 'linear', 'nearest']
+        grades = {v: {m: [] for m in metodos} for v in variaveis}
         for idx, (df, nome) in enumerate(zip(dfs, nomes)):
             x = df['linha']
             y = df['coluna']
@@ -328,7 +1123,18 @@ def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True,
             xi = np.linspace(x.min(), x.max(), 50)
             yi = np.linspace(y.min(), y.max(), 50)
             xi, yi = np.meshgrid(xi, yi)
-            zi = griddata((x, y), z, (xi, yi), method=interpolar)
+            if todas_combinacoes:
+                pesos = calcular_pesos_interpolacao(x, y, xi, yi)
+                for v in variaveis:
+                    for m in metodos:
+                        grade = interpolar_com_pesos(
+                            pesos, df[v].to_numpy(dtype=float), m)
+                        grades[v][m].append(base64.b64encode(
+                            grade.astype('<f4').tobytes()).decode('ascii'))
+                zi = interpolar_com_pesos(
+                    pesos, z.to_numpy(dtype=float), interpolar)
+            else:
+                zi = griddata((x, y), z, (xi, yi), method=interpolar)
             nome_leg = nome_legenda_grupo(nome)
             grupos_legenda.append(nome_leg)
             fig.add_trace(go.Surface(
@@ -382,31 +1188,260 @@ def plotar_multiple_surface_ppfd(dfs: list, nomes: list, usar_ppfd: bool = True,
         }
         document.querySelectorAll('.grupo-cb').forEach(cb => cb.addEventListener('change', updateGroups));
         </script>'''
+        seletores = ''
+        if todas_combinacoes:
+            rotulos_metodo = {'cubic': 'Cúbica',
+                              'linear': 'Linear', 'nearest': 'Mais próxima'}
+            opcoes_var = "".join(
+                f'<option value="{v}"{" selected" if v == z_col else ""}>{v}</option>' for v in variaveis)
+            opcoes_met = "".join(
+                f'<option value="{m}"{" selected" if m == interpolar else ""}>{rotulos_metodo[m]}</option>' for m in metodos)
+            seletores = f'''<div style='margin-bottom:12px;font-size:15px;'>
+            <label style="margin-right:18px;">Variável: <select id="sel-variavel">{opcoes_var}</select></label>
+            <label>Interpolação: <select id="sel-metodo">{opcoes_met}</select></label></div>'''
+            js += '''<script>
+            var GRADES = %s;
+            var FORMA = [50, 50];
+            var NOMES = %s;
+            var ROTULOS_METODO = %s;
+            var cacheGrades = {};
+            function decodificarGrade(b64) {
+                var bin = atob(b64);
+                var bytes = new Uint8Array(bin.length);
+                for (var i = 0; i < bin.length; i++) { bytes[i] = bin.charCodeAt(i); }
+                var valores = new Float32Array(bytes.buffer);
+                var linhas = [];
+                for (var r = 0; r < FORMA[0]; r++) {
+                    var linha = [];
+                    for (var c = 0; c < FORMA[1]; c++) {
+                        var v = valores[r * FORMA[1] + c];
+                        linha.push(isNaN(v) ? null : v);
+                    }
+                    linhas.push(linha);
+                }
+                return linhas;
+            }
+            function updateSurface() {
+                var variavel = document.getElementById('sel-variavel').value;
+                var metodo = document.getElementById('sel-metodo').value;
+                var chave = variavel + '|' + metodo;
+                if (!cacheGrades[chave]) { cacheGrades[chave] = GRADES[variavel][metodo].map(decodificarGrade); }
+                var rotulo = variavel + ' (umol m⁻² s⁻¹)';
+                var plot = document.querySelector('.js-plotly-plot');
+                var hover = NOMES.map(n => n + '<br>Linha (Y): %%{y}<br>Coluna (X): %%{x}<br>' + rotulo + ': %%{z:.2f}<extra></extra>');
+                Plotly.restyle(plot, {z: cacheGrades[chave], hovertemplate: hover});
+                Plotly.restyle(plot, {'colorbar.title.text': rotulo}, [0]);
+                Plotly.relayout(plot, {'scene.zaxis.title.text': rotulo});
+                document.getElementById('titulo-surfaces').textContent = 'Múltiplas Superfícies 3D Interpoladas (' + ROTULOS_METODO[metodo] + ')';
+            }
+            document.getElementById('sel-variavel').addEventListener('change', updateSurface);
+            document.getElementById('sel-metodo').addEventListener('change', updateSurface);
+            </script>''' % (json.dumps(grades), json.dumps(grupos_legenda), json.dumps(rotulos_metodo))
 
-        html = pio.to_html(fig, include_plotlyjs='cdn',
-                           full_html=False, config={"displayModeBar": True})
-        html_final = f"""
-        <html><head><meta charset='utf-8'><title>Múltiplas Superfícies 3D</title></head><body style='font-family:Segoe UI,Segoe,Arial;'>
-        <h2 style='font-family:Segoe UI,Segoe,Arial;'>Múltiplas Superfícies 3D Interpoladas ({interpolar})</h2>
+        corpo = f"""
+        <h2 id='titulo-surfaces' style='font-family:Segoe UI,Segoe,Arial;'>Múltiplas Superfícies 3D Interpoladas ({interpolar})</h2>
+        {seletores}
         <div style='margin-bottom:12px;'>{checkboxes}</div>
-        {html}
-        {js}
-        </body></html>
         """
-
-        saida = os.path.join(os.getcwd(), "multiplas_surfaces_interativo.html")
-        with open(saida, 'w', encoding='utf-8') as f:
-            f.write(html_final)
-        webbrowser.open('file://' + os.path.abspath(saida))
+        nome_relatorio = f"multiplas_surfaces_interativo_{nome_campanha or '-'.join(nomes)}.html"
+        saida = gravar_relatorio_html(fig, 'Múltiplas Superfícies 3D', corpo, js, nome_relatorio, pasta_saida)
+        print(f'Relatório salvo em: {saida}')
     except Exception as e:
         print(f'Erro ao plotar múltiplas superfícies: {e}')
         raise
 
 
-def plot_spectral():
+def ler_espectro_umol(arquivo: str) -> tuple:
+    """
+    Lê um arquivo uMOL_*.txt e retorna os comprimentos de onda e os valores de PFD.
+
+    Args:
+        arquivo (str): Caminho do arquivo uMOL_*.txt.
+
+    Returns:
+        tuple: (comprimentos de onda, PFD) como arrays NumPy de float.
+
+    Raises:
+        ValueError: Se o arquivo não segue o padrão de colunas ('Wavelength(nm)' e 'PFD ... umol').
+
+    Exemplo:
+        wl, pfd = ler_espectro_umol('0A/uMOL_1190A.txt')
+    """
+    with abrir_texto(arquivo) as f:
+        cabecalho = f.readline()
+        colunas = cabecalho.strip().split('\t')
+        col_pfd = next((i for i, col in enumerate(colunas)
+                       if 'PFD' in col and 'umol' in col), None)
+        if 'Wavelength(nm)' not in colunas or col_pfd is None:
+            raise ValueError(
+                f"O arquivo {os.path.basename(arquivo)} não segue o padrão esperado de colunas ('Wavelength(nm)' e 'PFD ... umol').")
+        valores = np.loadtxt(f, comments='#', ndmin=2,
+                             converters=lambda v: float(v.replace(',', '.')))
+    if valores.size == 0:
+        return np.array([]), np.array([])
+    return valores[:, colunas.index('Wavelength(nm)')], valores[:, col_pfd]
+
+
+def listar_arquivos_umol(pasta_principal: str) -> dict:
+    """
+    Lista os arquivos uMOL_*.txt agrupados por subpasta.
+    Se a pasta não possuir subpastas, todos os arquivos dela formam o grupo "Selecionada".
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas (ou uma subpasta).
+
+    Returns:
+        dict: {grupo: [caminhos dos arquivos]}, com os arquivos em ordem alfabética.
+    """
+    grupos_dict = {}
+    subpastas = [d for d in listar_pasta(pasta_principal)
+                 if eh_pasta(os.path.join(pasta_principal, d))]
+    if subpastas:
+        for dirpath, _, filenames in percorrer_pasta(pasta_principal):
+            subpasta = os.path.relpath(dirpath, pasta_principal)
+            if subpasta == ".":
+                continue
+            for f in sorted(filenames):
+                if f.startswith('uMOL_') and f.endswith('.txt'):
+                    grupos_dict.setdefault(subpasta, []).append(
+                        os.path.join(dirpath, f))
+    else:
+        for f in sorted(listar_pasta(pasta_principal)):
+            if f.startswith('uMOL_') and f.endswith('.txt'):
+                grupos_dict.setdefault("Selecionada", []).append(
+                    os.path.join(pasta_principal, f))
+    return grupos_dict
+
+
+def empilhar_espectros(arquivos: list) -> tuple:
+    """
+    Lê vários arquivos uMOL_*.txt e empilha os espectros em uma matriz 2D (arquivos x comprimentos de onda).
+    Espectros com passo de comprimento de onda diferente são reamostrados na grade do primeiro arquivo válido.
+    Arquivos que não puderem ser lidos são ignorados (o erro é exibido no terminal).
+
+    Args:
+        arquivos (list): Caminhos dos arquivos uMOL_*.txt.
+
+    Returns:
+        tuple: (comprimentos de onda, matriz de PFD, lista dos arquivos efetivamente empilhados).
+    """
+    wl_ref = None
+    linhas = []
+    validos = []
+    for arquivo in arquivos:
+        try:
+            wl, pfd = ler_espectro_umol(arquivo)
+        except Exception as e:
+            print(f'Erro ao ler {arquivo}: {e}')
+            continue
+        if len(wl) < 2:
+            continue
+        if wl_ref is None:
+            wl_ref = wl
+        elif len(wl) != len(wl_ref) or not np.allclose(wl, wl_ref):
+            pfd = np.interp(wl_ref, wl, pfd, left=np.nan, right=np.nan)
+        linhas.append(pfd)
+        validos.append(arquivo)
+    if wl_ref is None:
+        return np.array([]), np.empty((0, 0)), []
+    return wl_ref, np.vstack(linhas), validos
+
+
+def agregar_espectros(matriz: np.ndarray, percentis: tuple = (5, 25, 50, 75, 95), limiar_outlier: float = 3.0) -> dict:
+    """
+    Calcula o envelope espectral de um grupo (média, desvio padrão, mínimo, máximo e percentis por comprimento de onda)
+    em uma única redução vetorizada sobre a matriz empilhada, e identifica espectros atípicos.
+
+    Um espectro é atípico quando sua distância euclidiana à mediana do grupo excede
+    mediana(distâncias) + limiar_outlier * 1.4826 * MAD(distâncias).
+
+    Args:
+        matriz (np.ndarray): Matriz (arquivos x comprimentos de onda), como retornada por empilhar_espectros.
+        percentis (tuple, opcional): Percentis a calcular. Padrão é (5, 25, 50, 75, 95).
+        limiar_outlier (float, opcional): Número de MADs para considerar um espectro atípico. Padrão é 3.0.
+
+    Returns:
+        dict: Chaves 'n', 'media', 'desvio', 'minimo', 'maximo', 'p<percentil>' (arrays) e 'outliers' (índices das linhas).
+    """
+    resultado = {
+        'n': matriz.shape[0],
+        'media': np.nanmean(matriz, axis=0),
+        'desvio': np.nanstd(matriz, axis=0, ddof=1) if matriz.shape[0] > 1 else np.zeros(matriz.shape[1]),
+        'minimo': np.nanmin(matriz, axis=0),
+        'maximo': np.nanmax(matriz, axis=0),
+    }
+    valores_percentis = np.nanpercentile(matriz, percentis, axis=0)
+    for p, valores in zip(percentis, valores_percentis):
+        resultado[f'p{p:g}'] = valores
+    mediana = np.nanmedian(matriz, axis=0)
+    distancias = np.sqrt(np.nansum((matriz - mediana) ** 2, axis=1))
+    mad = np.median(np.abs(distancias - np.median(distancias)))
+    if mad > 0:
+        limite = np.median(distancias) + limiar_outlier * 1.4826 * mad
+        resultado['outliers'] = np.flatnonzero(distancias > limite)
+    else:
+        resultado['outliers'] = np.array([], dtype=int)
+    return resultado
+
+
+def exportar_espectros_agregados(wl: np.ndarray, agregados: dict, caminho_csv: str) -> pd.DataFrame:
+    """
+    Exporta os envelopes espectrais de vários grupos em formato longo (uma linha por grupo e comprimento de onda).
+
+    Args:
+        wl (np.ndarray): Comprimentos de onda comuns aos grupos.
+        agregados (dict): {grupo: resultado de agregar_espectros}.
+        caminho_csv (str): Caminho do arquivo CSV de saída.
+
+    Returns:
+        pd.DataFrame: Tabela exportada.
+    """
+    tabelas = []
+    for grupo, estat in agregados.items():
+        colunas = {'grupo': grupo, 'nome': NOMES_LEGENDA.get(grupo, grupo),
+                   'Wavelength(nm)': wl, 'n': estat['n']}
+        for chave, valores in estat.items():
+            if chave not in ('n', 'outliers'):
+                colunas[chave] = valores
+        tabelas.append(pd.DataFrame(colunas))
+    df = pd.concat(tabelas, ignore_index=True) if tabelas else pd.DataFrame()
+    gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+    return df
+
+
+def _agregar_grupos(grupos_dict: dict, percentis: tuple) -> tuple:
+    """Empilha e agrega os espectros de cada grupo. Retorna (wl, {grupo: estatísticas}, {grupo: (matriz, arquivos)})."""
+    wl_comum = None
+    agregados = {}
+    pilhas = {}
+    for grupo, arquivos in grupos_dict.items():
+        wl, matriz, validos = empilhar_espectros(arquivos)
+        if not validos:
+            continue
+        if wl_comum is None:
+            wl_comum = wl
+        elif len(wl) != len(wl_comum) or not np.allclose(wl, wl_comum):
+            matriz = np.vstack([np.interp(wl_comum, wl, linha, left=np.nan, right=np.nan)
+                                for linha in matriz])
+        agregados[grupo] = agregar_espectros(matriz, percentis)
+        pilhas[grupo] = (matriz, validos)
+    return wl_comum, agregados, pilhas
+
+
+def plot_spectral(agregar: bool = False, percentis: tuple = (5, 25, 50, 75, 95), mostrar_outliers: bool = True,
+                  pasta_saida: str = None):
     """
     Permite ao usuário selecionar uma pasta principal, busca recursivamente todos os arquivos uMOL_*.txt nas subpastas,
     plota todas as curvas em um único gráfico interativo com Plotly, e permite selecionar quais subpastas visualizar via checkboxes na própria página HTML.
+
+    Com agregar=True, plota apenas o envelope de cada grupo (faixa entre o menor e o maior percentil, faixa média ± desvio
+    e linha da média), e opcionalmente os espectros atípicos. Os envelopes são exportados em 'espectros_agregados.csv'.
+
+    Args:
+        agregar (bool, opcional): Se True, usa o modo agregado por grupo. Padrão é False.
+        percentis (tuple, opcional): Percentis calculados no modo agregado. Padrão é (5, 25, 50, 75, 95).
+        mostrar_outliers (bool, opcional): Se True, plota os espectros atípicos no modo agregado. Padrão é True.
+        pasta_saida (str, opcional): Pasta da página HTML. Padrão é PASTA_RELATORIOS.
     """
 
     root = tk.Tk()
@@ -430,67 +1465,108 @@ def plot_spectral():
         messagebox.showwarning(
             "Aviso", "Nenhum arquivo uMOL_*.txt encontrado nas subpastas.")
         return
-    # Mapeamento dos nomes para exibição amigável
-    nomes_legenda = {
-        '99100': 'RBW100%',
-        '0T':    'RBW15%',
-        '100V':  'R100%',
-        '100B':  'W100%',
-        '100A':  'B100%',
-        '0V':    'R15%',
-        '0B':    'W15%',
-        '0A':    'B15%'
-    }
+    # Arquivos em quarentena pelo controle de qualidade ficam fora do gráfico; os problemas de leitura são acumulados e
+    # exibidos em um único aviso no final, sem travar o laço
+    import controle_qualidade as qc  # importado aqui: controle_qualidade depende deste módulo
+    quarentena = qc.arquivos_em_quarentena(list(zip(arquivos_umol, grupos)))
+    avisos = [f"{os.path.basename(a)}: em quarentena pelo controle de qualidade."
+              for a in arquivos_umol if a in quarentena]
+    grupos = [g for a, g in zip(arquivos_umol, grupos) if a not in quarentena]
+    arquivos_umol = [a for a in arquivos_umol if a not in quarentena]
     fig = go.Figure()
     grupo_set = set()
     grupo_legenda_map = {}
-    for arquivo, grupo in zip(arquivos_umol, grupos):
-        try:
-            try:
-                df = pd.read_csv(arquivo, sep=r'\t|\s+',
-                                 engine='python', comment='#')
-            except pd.errors.ParserError:
-                messagebox.showwarning(
-                    "Aviso", f"O arquivo {os.path.basename(arquivo)} não pôde ser lido como CSV padrão (tab ou espaço).")
-                continue
-            if 'Wavelength(nm)' not in df.columns or not any('PFD' in col and 'umol' in col for col in df.columns):
-                messagebox.showwarning(
-                    "Aviso", f"O arquivo {os.path.basename(arquivo)} não segue o padrão esperado de colunas ('Wavelength(nm)' e 'PFD ... umol').")
-                continue
-            col_wave = 'Wavelength(nm)'
-            col_pfd = None
-            for col in df.columns:
-                if 'PFD' in col and 'umol' in col:
-                    col_pfd = col
-            if col_wave not in df.columns or col_pfd is None:
-                continue
-            x = df[col_wave].values
-            y = df[col_pfd].values
-            if len(x) == 0 or len(y) == 0:
-                continue
-            nome_legenda = nomes_legenda.get(grupo, grupo)
-            fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=f"{nome_legenda}", legendgroup=nome_legenda, visible=True,
-                                     customdata=[[nome_legenda]]*len(x),
-                                     hovertemplate=f"Grupo: {nome_legenda}<br>Arquivo: {os.path.basename(arquivo)}<br>Wavelength: %{{x}}<br>PFD: %{{y}}<extra></extra>"))
-            # Detecção de picos usando scipy.signal.find_peaks
-            try:
-                peaks, _ = find_peaks(y, prominence=0.05 * np.max(y))
-                if len(peaks) > 0:
-                    fig.add_trace(go.Scatter(
-                        x=x[peaks], y=y[peaks],
-                        mode='markers',
-                        marker=dict(symbol='x', size=10, color='red'),
-                        name=f"Picos {nome_legenda}",
-                        legendgroup=nome_legenda,
-                        showlegend=False,
-                        hovertemplate=f"<b>Pico</b><br>Grupo: {nome_legenda}<br>Arquivo: {os.path.basename(arquivo)}<br>Wavelength: %{{x}}<br>PFD: %{{y}}<extra></extra>"
-                    ))
-            except Exception as e:
-                print(f"Erro ao detectar picos em {arquivo}: {e}")
+    if agregar:
+        grupos_dict = {}
+        for arquivo, grupo in zip(arquivos_umol, grupos):
+            grupos_dict.setdefault(grupo, []).append(arquivo)
+        wl, agregados, pilhas = _agregar_grupos(grupos_dict, percentis)
+        p_inf, p_sup = f'p{min(percentis):g}', f'p{max(percentis):g}'
+        for grupo, estat in agregados.items():
+            nome_legenda = NOMES_LEGENDA.get(grupo, grupo)
+            r, g, b = CORES_GRUPOS.get(grupo, (80, 80, 80))
+            faixas = [(estat[p_inf], estat[p_sup], 0.15, f'P{min(percentis):g}–P{max(percentis):g}'),
+                      (estat['media'] - estat['desvio'], estat['media'] + estat['desvio'], 0.30, 'Média ± DP')]
+            for inferior, superior, alfa, rotulo in faixas:
+                fig.add_trace(go.Scatter(x=wl, y=superior, mode='lines', line=dict(width=0),
+                                         legendgroup=nome_legenda, showlegend=False, hoverinfo='skip'))
+                fig.add_trace(go.Scatter(x=wl, y=inferior, mode='lines', line=dict(width=0),
+                                         fill='tonexty', fillcolor=f'rgba({r},{g},{b},{alfa})',
+                                         name=f"{nome_legenda} {rotulo}", legendgroup=nome_legenda,
+                                         showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=wl, y=estat['media'], mode='lines', line=dict(color=f'rgb({r},{g},{b})', width=2),
+                                     name=f"{nome_legenda} (n={estat['n']})", legendgroup=nome_legenda,
+                                     customdata=np.column_stack([estat['desvio'], estat[p_inf], estat[p_sup]]),
+                                     hovertemplate=f"Grupo: {nome_legenda}<br>Wavelength: %{{x}}<br>Média: %{{y:.4f}}<br>DP: %{{customdata[0]:.4f}}"
+                                     f"<br>{p_inf.upper()}: %{{customdata[1]:.4f}}<br>{p_sup.upper()}: %{{customdata[2]:.4f}}<extra></extra>"))
+            if mostrar_outliers:
+                matriz, arquivos_validos = pilhas[grupo]
+                for i in estat['outliers']:
+                    fig.add_trace(go.Scatter(x=wl, y=matriz[i], mode='lines', line=dict(color=f'rgb({r},{g},{b})', width=1, dash='dot'),
+                                             name=f"Atípico {nome_legenda}", legendgroup=nome_legenda, showlegend=False,
+                                             hovertemplate=f"<b>Atípico</b><br>Grupo: {nome_legenda}<br>Arquivo: {os.path.basename(arquivos_validos[i])}<br>Wavelength: %{{x}}<br>PFD: %{{y}}<extra></extra>"))
             grupo_set.add(grupo)
             grupo_legenda_map[grupo] = nome_legenda
-        except Exception as e:
-            print(f'Erro ao ler {arquivo}: {e}')
+        if agregados:
+            saida_csv = os.path.join(
+                pasta_principal, "espectros_agregados.csv")
+            exportar_espectros_agregados(wl, agregados, saida_csv)
+            print(f'Espectros agregados exportados em: {saida_csv}')
+    else:
+        for arquivo, grupo in zip(arquivos_umol, grupos):
+            try:
+                try:
+                    df = pd.read_csv(arquivo, sep=r'\t|\s+',
+                                     engine='python', comment='#')
+                except pd.errors.ParserError:
+                    avisos.append(
+                        f"{os.path.basename(arquivo)}: não pôde ser lido como CSV padrão (tab ou espaço).")
+                    continue
+                if 'Wavelength(nm)' not in df.columns or not any('PFD' in col and 'umol' in col for col in df.columns):
+                    avisos.append(
+                        f"{os.path.basename(arquivo)}: não segue o padrão esperado de colunas ('Wavelength(nm)' e 'PFD ... umol').")
+                    continue
+                col_wave = 'Wavelength(nm)'
+                col_pfd = None
+                for col in df.columns:
+                    if 'PFD' in col and 'umol' in col:
+                        col_pfd = col
+                if col_wave not in df.columns or col_pfd is None:
+                    continue
+                x = df[col_wave].values
+                y = df[col_pfd].values
+                if len(x) == 0 or len(y) == 0:
+                    continue
+                nome_legenda = NOMES_LEGENDA.get(grupo, grupo)
+                fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=f"{nome_legenda}", legendgroup=nome_legenda, visible=True,
+                                         customdata=[[nome_legenda]]*len(x),
+                                         hovertemplate=f"Grupo: {nome_legenda}<br>Arquivo: {os.path.basename(arquivo)}<br>Wavelength: %{{x}}<br>PFD: %{{y}}<extra></extra>"))
+                # Detecção de picos usando scipy.signal.find_peaks
+                try:
+                    peaks, _ = find_peaks(y, prominence=0.05 * np.max(y))
+                    if len(peaks) > 0:
+                        fig.add_trace(go.Scatter(
+                            x=x[peaks], y=y[peaks],
+                            mode='markers',
+                            marker=dict(symbol='x', size=10, color='red'),
+                            name=f"Picos {nome_legenda}",
+                            legendgroup=nome_legenda,
+                            showlegend=False,
+                            hovertemplate=f"<b>Pico</b><br>Grupo: {nome_legenda}<br>Arquivo: {os.path.basename(arquivo)}<br>Wavelength: %{{x}}<br>PFD: %{{y}}<extra></extra>"
+                        ))
+                except Exception as e:
+                    print(f"Erro ao detectar picos em {arquivo}: {e}")
+                grupo_set.add(grupo)
+                grupo_legenda_map[grupo] = nome_legenda
+            except Exception as e:
+                print(f'Erro ao ler {arquivo}: {e}')
+    if avisos:
+        print("\n".join(avisos))
+        resumo = "\n".join(avisos[:15])
+        if len(avisos) > 15:
+            resumo += f"\n... e mais {len(avisos) - 15} (veja o terminal)."
+        messagebox.showwarning(
+            "Aviso", f"{len(avisos)} arquivo(s) ignorado(s):\n{resumo}")
     fig.update_layout(
         title='',
         xaxis_title='Wavelength (nm)',
@@ -501,9 +1577,9 @@ def plot_spectral():
         font=dict(family='Segoe UI, Segoe, Arial', size=14)
     )
     # Gera HTML com checkboxes para grupos (usando nomes amigáveis) - agora acima do gráfico, em linha
-    grupos_ordenados = sorted(grupo_set, key=lambda g: nomes_legenda.get(g, g))
+    grupos_ordenados = sorted(grupo_set, key=lambda g: NOMES_LEGENDA.get(g, g))
     checkboxes = "".join([
-        f'<label style="margin-right:18px;font-family:Segoe UI,Segoe,Arial;font-size:15px;"><input type="checkbox" class="grupo-cb" value="{nomes_legenda.get(g, g)}" checked> {nomes_legenda.get(g, g)}</label>'
+        f'<label style="margin-right:18px;font-family:Segoe UI,Segoe,Arial;font-size:15px;"><input type="checkbox" class="grupo-cb" value="{NOMES_LEGENDA.get(g, g)}" checked> {NOMES_LEGENDA.get(g, g)}</label>'
         for g in grupos_ordenados
     ])
     js = '''<script>
@@ -520,23 +1596,16 @@ def plot_spectral():
     }
     document.querySelectorAll('.grupo-cb').forEach(cb => cb.addEventListener('change', updateGroups));
     </script>'''
-    html = pio.to_html(fig, include_plotlyjs='cdn',
-                       full_html=False, config={"displayModeBar": True})
-    html_final = f"""
-    <html><head><meta charset='utf-8'><title>Espectros uMOL_ por grupo</title></head><body style='font-family:Segoe UI,Segoe,Arial;'>
+    corpo = f"""
     <h2 style='font-family:Segoe UI,Segoe,Arial;'>Espectros de arquivos uMOL</h2>
     <div style='margin-bottom:12px;'>{checkboxes}</div>
-    {html}
-    {js}
-    </body></html>
     """
-    saida = os.path.join(pasta_principal, "espectros_umol_interativo.html")
-    with open(saida, 'w', encoding='utf-8') as f:
-        f.write(html_final)
-    webbrowser.open('file://' + os.path.abspath(saida))
+    nome_relatorio = f"espectros_umol_interativo_{os.path.basename(os.path.normpath(pasta_principal))}.html"
+    saida = gravar_relatorio_html(fig, 'Espectros uMOL_ por grupo', corpo, js, nome_relatorio, pasta_saida)
+    print(f'Relatório salvo em: {saida}')
 
 
-def plot_spectral_matplotlib():
+def plot_spectral_matplotlib(agregar: bool = False, percentis: tuple = (5, 25, 50, 75, 95), mostrar_outliers: bool = True):
     """
     Plota todos os espectros uMOL_ encontrados nas subpastas, usando matplotlib,
     com linhas multicoloridas conforme o comprimento de onda (Wavelength),
@@ -546,6 +1615,14 @@ def plot_spectral_matplotlib():
     As cores seguem o degradê espectral solicitado.
     Layout ajustado conforme solicitado.
     Se o usuário selecionar uma subpasta (sem subpastas), plota um único gráfico com todos os arquivos dessa subpasta.
+
+    Com agregar=True, cada painel mostra apenas o envelope do grupo (faixas de percentis e média ± desvio, com a média
+    em degradê espectral) e, opcionalmente, os espectros atípicos. Os envelopes são exportados em 'espectros_agregados.csv'.
+
+    Args:
+        agregar (bool, opcional): Se True, usa o modo agregado por grupo. Padrão é False.
+        percentis (tuple, opcional): Percentis calculados no modo agregado. Padrão é (5, 25, 50, 75, 95).
+        mostrar_outliers (bool, opcional): Se True, plota os espectros atípicos no modo agregado. Padrão é True.
     """
 
     # Função para mapear comprimento de onda para cor RGB com degradê suave entre as faixas
@@ -612,17 +1689,6 @@ def plot_spectral_matplotlib():
             "Aviso", "Nenhum arquivo uMOL_*.txt encontrado.")
         return
 
-    nomes_legenda = {
-        '99100': 'RBW100%',
-        '0T':    'RBW15%',
-        '100V':  'R100%',
-        '100B':  'W100%',
-        '100A':  'B100%',
-        '0V':    'R15%',
-        '0B':    'W15%',
-        '0A':    'B15%'
-    }
-
     # Agrupa arquivos por grupo
     grupos_dict = {}
     for arquivo, grupo in zip(arquivos_umol, grupos):
@@ -637,6 +1703,62 @@ def plot_spectral_matplotlib():
     grupos_lista = list(grupos_dict.keys())
     n_grupos = len(grupos_lista)
 
+    if agregar:
+        wl, agregados, pilhas = _agregar_grupos(grupos_dict, percentis)
+        if not agregados:
+            messagebox.showwarning(
+                "Aviso", "Nenhum espectro válido encontrado.")
+            return
+        saida_csv = os.path.join(pasta_principal, "espectros_agregados.csv")
+        exportar_espectros_agregados(wl, agregados, saida_csv)
+        print(f'Espectros agregados exportados em: {saida_csv}')
+        grupos_agregados = list(agregados.keys())
+        ncols = min(3, len(grupos_agregados))
+        nrows = math.ceil(len(grupos_agregados) / ncols)
+        fig, axs = plt.subplots(nrows=nrows, ncols=ncols, figsize=(7*ncols, 4*nrows),
+                                dpi=100, squeeze=False)
+        axs = axs.flatten()
+        p_inf, p_sup = f'p{min(percentis):g}', f'p{max(percentis):g}'
+        cores_media = [wavelength_to_rgb(w) for w in wl[:-1]]
+        for idx, grupo in enumerate(grupos_agregados):
+            ax = axs[idx]
+            estat = agregados[grupo]
+            ax.fill_between(wl, estat[p_inf], estat[p_sup], color='0.6', alpha=0.25, linewidth=0,
+                            label=f'P{min(percentis):g}–P{max(percentis):g}')
+            ax.fill_between(wl, estat['media'] - estat['desvio'], estat['media'] + estat['desvio'],
+                            color='0.4', alpha=0.35, linewidth=0, label='Média ± DP')
+            pontos = np.array([wl, estat['media']]).T.reshape((-1, 1, 2))
+            segmentos = np.concatenate([pontos[:-1], pontos[1:]], axis=1)
+            ax.add_collection(LineCollection(
+                segmentos, colors=cores_media, linewidth=2))
+            if mostrar_outliers:
+                matriz, _ = pilhas[grupo]
+                for i in estat['outliers']:
+                    ax.plot(wl, matriz[i], color='k', linewidth=0.8,
+                            linestyle=':', alpha=0.8)
+            ax.set_xlim(380, 780)
+            y_max = np.nanmax(estat['maximo'])
+            if y_max > 0:
+                ax.set_ylim(0, y_max * 1.05)
+            ax.set_xticks(np.arange(380, 781, 50))
+            if idx % ncols == 0:
+                ax.set_ylabel("PFD (μmol m⁻² s⁻¹)", fontsize=12)
+            if idx // ncols == nrows - 1:
+                ax.set_xlabel("Wavelength, λ (nm)", fontsize=12)
+            titulo = NOMES_LEGENDA.get(grupo, grupo)
+            if titulo == "Selecionada":
+                titulo = "Arquivos da pasta selecionada"
+            ax.set_title(f"Grupo: {titulo} (n={estat['n']})", fontsize=12)
+            ax.legend(loc='upper right', fontsize=9)
+            ax.grid(True, alpha=0.3)
+        for j in range(len(grupos_agregados), len(axs)):
+            fig.delaxes(axs[j])
+        fig.subplots_adjust(left=0.060, top=0.95, right=0.975,
+                            wspace=0.15, hspace=0.350, bottom=0.08)
+        plt.show()
+        plt.ioff()
+        return
+
     # Se for só um grupo (caso subpasta), plota um único gráfico
     if n_grupos == 1:
         fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
@@ -696,8 +1818,8 @@ def plot_spectral_matplotlib():
         ax.set_ylabel("PFD (μmol m⁻² s⁻¹)", fontsize=12)
         ax.set_xlabel("Wavelength, λ (nm)", fontsize=12)
         titulo = grupos_lista[0]
-        if titulo in nomes_legenda:
-            titulo = nomes_legenda[titulo]
+        if titulo in NOMES_LEGENDA:
+            titulo = NOMES_LEGENDA[titulo]
         elif titulo == "Selecionada":
             titulo = "Arquivos da pasta selecionada"
         ax.set_title(f"Grupo: {titulo}", fontsize=13)
@@ -787,7 +1909,7 @@ def plot_spectral_matplotlib():
             ax.set_xlabel("Wavelength, λ (nm)", fontsize=12)
         else:
             ax.set_xlabel("")
-        ax.set_title(f"Grupo: {nomes_legenda.get(grupo, grupo)}", fontsize=12)
+        ax.set_title(f"Grupo: {NOMES_LEGENDA.get(grupo, grupo)}", fontsize=12)
         ax.grid(True, alpha=0.3)
 
     # Remove subplots vazios
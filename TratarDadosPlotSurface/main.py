@@ -1,11 +1,27 @@
 import functions as fn
+import controle_qualidade as qc
+import comparacao_campanhas as cmp
+import modelo_dimerizacao as md
+import planejamento_amostragem as pa
+import estabilidade_temporal as et
+import biblioteca_referencia as br
+import volume_luz as vl
+import mapa_espectral as me
+import similaridade as sim
+import metricas_fotobiologicas as mf
+import colorimetria as cor
+import otimizacao_luminarias as ol
 import os
+import re
+import numpy as np
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-from tkinter import filedialog, messagebox, ttk, scrolledtext
+from tkinter import filedialog, messagebox, ttk, scrolledtext, simpledialog
 import sys
 import threading
 import tkinter as tk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 
 class ToolTip:
@@ -74,12 +90,259 @@ class ToolTip:
             self.tipwindow = None
 
 
+class NavegadorEspectros:
+    """
+    Painel de navegação rápida pelos espectros ESPD_ de uma pasta principal (ou de uma pasta de tratamento), embutido
+    na janela principal ao lado dos botões.
+    A lista de arquivos é montada apenas com os nomes; cada arquivo é lido na primeira vez em que é exibido e fica
+    guardado em uma ColecaoMedicoes, que serve de cache. A troca de espectro usa blitting do matplotlib: só a linha,
+    o texto e o marcador do mapa são redesenhados sobre o fundo salvo, e o redesenho completo acontece apenas quando
+    muda a escala do eixo Y ou o tratamento exibido no mapa.
+
+    Navegação: lista de arquivos, filtro por tratamento, barra deslizante, setas (→ e ↓ avançam, ← e ↑ voltam),
+    Page Up/Page Down (10 em 10) e clique em um ponto do mapa da grade.
+    """
+
+    def __init__(self, master, pasta_principal: str):
+        self.arquivos, self.grupos, self.posicoes = self._listar_arquivos(pasta_principal)
+        if not self.arquivos:
+            raise ValueError("Nenhum arquivo ESPD_ encontrado na pasta selecionada.")
+        self.cache = fn.ColecaoMedicoes()
+        self.linha_cache = np.full(len(self.arquivos), -1, dtype=np.int64)
+        self.visiveis = np.arange(len(self.arquivos))
+        self.atual = None
+        self.grupo_mapa = None
+        self._fundo = None
+        self._atualizando = False
+
+        self.quadro = tb.Labelframe(master, text=f"Navegador de espectros | {pasta_principal}", bootstyle="info")
+        self._criar_lista()
+        self._criar_grafico()
+        # As teclas valem com o foco em qualquer parte do painel; "break" evita o passo duplo da Listbox
+        teclas = (("<Right>", 1), ("<Down>", 1), ("<Left>", -1), ("<Up>", -1), ("<Next>", 10), ("<Prior>", -10))
+        for widget in (self.quadro, self.lista, self.canvas.get_tk_widget(), self.escala):
+            for tecla, passo in teclas:
+                widget.bind(tecla, lambda event, p=passo: self.avancar(p))
+        self.selecionar(0)
+        self.lista.focus_set()
+
+    def fechar(self):
+        janela = self.quadro.winfo_toplevel()
+        self.quadro.destroy()
+        janela.geometry("")
+
+    @staticmethod
+    def _listar_arquivos(pasta_principal):
+        padrao = re.compile(r'^ESPD_(\d)(\d).*\.txt$')
+        pastas = [(os.path.basename(os.path.normpath(pasta_principal)), pasta_principal)]
+        if not any(padrao.match(a) for a in fn.listar_pasta(pasta_principal)):
+            pastas = [(p, os.path.join(pasta_principal, p)) for p in sorted(fn.listar_pasta(pasta_principal))
+                      if fn.eh_pasta(os.path.join(pasta_principal, p))]
+        arquivos, grupos, posicoes = [], [], []
+        for grupo, pasta in pastas:
+            for arquivo in sorted(fn.listar_pasta(pasta)):
+                match = padrao.match(arquivo)
+                if match:
+                    arquivos.append(os.path.join(pasta, arquivo))
+                    grupos.append(grupo)
+                    posicoes.append((int(match.group(1)), int(match.group(2))))
+        return arquivos, np.array(grupos, dtype=object), np.array(posicoes, dtype=np.int64).reshape(-1, 2)
+
+    def _criar_lista(self):
+        frame = tb.Frame(self.quadro)
+        frame.pack(side='left', fill='y', padx=(8, 4), pady=8)
+        self.filtro = tb.StringVar(value="Todos")
+        combo = tb.Combobox(frame, textvariable=self.filtro, state="readonly",
+                            values=["Todos"] + list(dict.fromkeys(self.grupos)))
+        combo.pack(fill='x', pady=(0, 6))
+        combo.bind("<<ComboboxSelected>>", lambda event: self.filtrar())
+        tb.Button(frame, text="Fechar navegador", bootstyle="secondary",
+                  command=self.fechar).pack(side='bottom', fill='x', pady=(6, 0))
+        self.normalizar = tb.BooleanVar(value=False)
+        tb.Checkbutton(frame, text="Normalizar pelo pico", variable=self.normalizar, bootstyle="info",
+                       command=self._ao_mudar_normalizacao).pack(anchor='w', pady=(0, 6))
+        self.lista = tk.Listbox(frame, width=34, exportselection=False, activestyle='none')
+        barra = tb.Scrollbar(frame, orient='vertical', command=self.lista.yview)
+        self.lista.configure(yscrollcommand=barra.set)
+        self.lista.pack(side='left', fill='y')
+        barra.pack(side='left', fill='y')
+        self.lista.bind("<<ListboxSelect>>", self._ao_selecionar_lista)
+        self._preencher_lista()
+
+    def _criar_grafico(self):
+        frame = tb.Frame(self.quadro)
+        frame.pack(side='left', fill='both', expand=True, padx=(4, 8), pady=8)
+        self.figura = Figure(figsize=(9, 5.5), dpi=100)
+        grade = self.figura.add_gridspec(1, 2, width_ratios=(3, 1))
+        self.ax_espectro = self.figura.add_subplot(grade[0])
+        self.ax_mapa = self.figura.add_subplot(grade[1])
+        self.ax_espectro.set_xlabel('Comprimento de onda (nm)')
+        self.ax_espectro.set_ylabel('Irradiância espectral (mW m⁻² nm⁻¹)')
+        self.ax_espectro.set_xlim(380, 780)
+        self.ax_espectro.set_ylim(0, 1)
+        self.ax_espectro.grid(True, alpha=0.3)
+        self.ax_mapa.set_xlabel('Linha (X)')
+        self.ax_mapa.set_ylabel('Coluna (Y)')
+        self.ax_mapa.set_title('Clique para selecionar', fontsize=9)
+        # Artistas animados: redesenhados por blitting sobre o fundo salvo
+        self.linha, = self.ax_espectro.plot([], [], lw=1.6, animated=True)
+        self.texto = self.ax_espectro.text(0.02, 0.97, '', transform=self.ax_espectro.transAxes, va='top',
+                                           fontsize=10, animated=True)
+        self.marcador, = self.ax_mapa.plot([], [], 'o', ms=14, mfc='none', mec='red', mew=2, animated=True)
+        self.pontos_mapa = self.ax_mapa.scatter([], [], s=40, c='lightgray', edgecolors='gray')
+        self.figura.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.figura, master=frame)
+        self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.canvas.mpl_connect('draw_event', self._ao_desenhar)
+        self.canvas.mpl_connect('button_press_event', self._ao_clicar_mapa)
+        self.escala = tb.Scale(frame, from_=0, to=max(len(self.visiveis) - 1, 0), orient='horizontal',
+                               command=self._ao_mover_escala)
+        self.escala.pack(fill='x', pady=(6, 0))
+
+    def _preencher_lista(self):
+        self.lista.delete(0, 'end')
+        self.lista.insert('end', *[f"{self.grupos[i]}  {os.path.basename(self.arquivos[i])}" for i in self.visiveis])
+
+    def filtrar(self):
+        grupo = self.filtro.get()
+        self.visiveis = (np.arange(len(self.arquivos)) if grupo == "Todos"
+                         else np.nonzero(self.grupos == grupo)[0])
+        self._preencher_lista()
+        self.escala.configure(to=max(len(self.visiveis) - 1, 0))
+        self.selecionar(0)
+
+    def _carregar(self, indice):
+        """Lê o arquivo na primeira exibição e devolve (wl, espectro, linha na coleção de cache)."""
+        if self.linha_cache[indice] < 0:
+            cabecalho, wl, espectro = fn.ler_arquivo_espd(self.arquivos[indice])
+            if not len(wl):
+                # Um arquivo sem bloco espectral fixaria uma grade vazia no cache e esconderia todos os seguintes
+                raise ValueError("arquivo sem bloco espectral")
+            x, y = self.posicoes[indice]
+            self.cache.adicionar(os.path.basename(self.arquivos[indice]), self.grupos[indice], int(x), int(y),
+                                 cabecalho, wl, espectro)
+            self.linha_cache[indice] = len(self.cache) - 1
+        linha = self.linha_cache[indice]
+        return self.cache.wl, self.cache.espectros[linha], linha
+
+    def selecionar(self, posicao_lista):
+        if not len(self.visiveis):
+            return
+        posicao_lista = int(np.clip(posicao_lista, 0, len(self.visiveis) - 1))
+        indice = self.visiveis[posicao_lista]
+        self.atual = posicao_lista
+        self._atualizando = True
+        try:
+            self.lista.selection_clear(0, 'end')
+            self.lista.selection_set(posicao_lista)
+            self.lista.see(posicao_lista)
+            self.escala.set(posicao_lista)
+        finally:
+            self._atualizando = False
+        self._exibir(indice)
+
+    def avancar(self, passo):
+        if self.atual is not None:
+            self.selecionar(self.atual + passo)
+        return "break"
+
+    def _exibir(self, indice):
+        try:
+            wl, espectro, linha = self._carregar(indice)
+        except Exception as e:
+            # Sem linha nem marcador, para não deixar o espectro anterior sob a mensagem de erro
+            self.linha.set_data([], [])
+            self.marcador.set_data([], [])
+            self.texto.set_text(f"Erro ao ler {os.path.basename(self.arquivos[indice])}: {e}")
+            if self._fundo is None:
+                self.canvas.draw()
+            else:
+                self._blit()
+            return
+        dados = self.cache.dados[linha]
+        grupo = self.grupos[indice]
+        self.linha.set_color('#{:02x}{:02x}{:02x}'.format(*fn.CORES_GRUPOS.get(grupo, (60, 60, 60))))
+        self.texto.set_text(f"{os.path.basename(self.arquivos[indice])} ({fn.NOMES_LEGENDA.get(grupo, grupo)})\n"
+                            f"PPFD = {dados['PPFD']:.1f}   PFD = {dados['PFD']:.1f} µmol m⁻² s⁻¹")
+        self.marcador.set_data([self.posicoes[indice, 0]], [self.posicoes[indice, 1]])
+
+        redesenhar = False
+        maximo = float(np.nanmax(espectro)) if np.any(np.isfinite(espectro)) else 1.0
+        if self.normalizar.get():
+            espectro = espectro / max(maximo, 1e-12)
+            maximo = 1.0
+        self.linha.set_data(wl, espectro)
+        # A escala do eixo Y só cresce dentro de um tratamento (e volta ao trocar de tratamento), para que a maior
+        # parte das trocas seja feita só com blitting
+        if maximo > self.ax_espectro.get_ylim()[1] or grupo != self.grupo_mapa:
+            self.ax_espectro.set_ylim(0, max(maximo, 1e-6) * 1.1)
+            redesenhar = True
+        if grupo != self.grupo_mapa:
+            membros = self.grupos == grupo
+            self.pontos_mapa.set_offsets(self.posicoes[membros])
+            self.ax_mapa.set_xlim(self.posicoes[membros, 0].min() - 0.5, self.posicoes[membros, 0].max() + 0.5)
+            self.ax_mapa.set_ylim(self.posicoes[membros, 1].min() - 0.5, self.posicoes[membros, 1].max() + 0.5)
+            self.ax_mapa.set_title(fn.NOMES_LEGENDA.get(grupo, grupo), fontsize=9)
+            self.grupo_mapa = grupo
+            redesenhar = True
+        if redesenhar or self._fundo is None:
+            self.canvas.draw()
+        else:
+            self._blit()
+
+    def _ao_mudar_normalizacao(self):
+        self.grupo_mapa = None
+        if self.atual is not None:
+            self._exibir(self.visiveis[self.atual])
+
+    def _ao_desenhar(self, event):
+        self._fundo = self.canvas.copy_from_bbox(self.figura.bbox)
+        self._desenhar_animados()
+
+    def _desenhar_animados(self):
+        self.ax_espectro.draw_artist(self.linha)
+        self.ax_espectro.draw_artist(self.texto)
+        self.ax_mapa.draw_artist(self.marcador)
+
+    def _blit(self):
+        self.canvas.restore_region(self._fundo)
+        self._desenhar_animados()
+        self.canvas.blit(self.figura.bbox)
+
+    def _ao_selecionar_lista(self, event):
+        if self._atualizando:
+            return
+        selecao = self.lista.curselection()
+        if selecao:
+            self.selecionar(selecao[0])
+
+    def _ao_mover_escala(self, valor):
+        if self._atualizando:
+            return
+        posicao = int(round(float(valor)))
+        if posicao != self.atual:
+            self.selecionar(posicao)
+
+    def _ao_clicar_mapa(self, event):
+        if event.inaxes is not self.ax_mapa or self.grupo_mapa is None or event.xdata is None:
+            return
+        candidatos = np.nonzero(self.grupos[self.visiveis] == self.grupo_mapa)[0]
+        if not len(candidatos):
+            return
+        posicoes = self.posicoes[self.visiveis[candidatos]]
+        distancia = np.hypot(posicoes[:, 0] - event.xdata, posicoes[:, 1] - event.ydata)
+        self.selecionar(candidatos[int(np.argmin(distancia))])
+
+
 class App(tb.Window):
     def __init__(self):
         super().__init__(themename="flatly")
         self.title("Trabalhar dados do LI-180 | Platar pontos")
         self.resizable(True, True)
         self.usar_ppfd = tb.BooleanVar(value=True)
+        self.agregar_espectros = tb.BooleanVar(value=False)
+        self.todas_combinacoes = tb.BooleanVar(value=False)
         self._create_main_interface()
         self.update_idletasks()
         self.geometry("")  # Ajusta ao conteúdo
@@ -96,11 +359,15 @@ class App(tb.Window):
         self.geometry(f"{width}x{height}+{x}+{y}")
 
     def _create_main_interface(self):
-        self._create_widgets(self)
-        self._create_bottom_buttons()
+        # Botões à esquerda; o navegador de espectros ocupa o espaço à direita quando aberto
+        self.coluna_controles = tb.Frame(self)
+        self.coluna_controles.pack(side='left', fill='y')
+        self.navegador = None
+        self._create_widgets(self.coluna_controles)
+        self._create_bottom_buttons(self.coluna_controles)
 
-    def _create_bottom_buttons(self):
-        bottom_btn_frame = tb.Frame(self)
+    def _create_bottom_buttons(self, parent):
+        bottom_btn_frame = tb.Frame(parent)
         bottom_btn_frame.pack(pady=(0, 8))
         help_button = tb.Button(
             bottom_btn_frame, text="Ajuda", bootstyle=INFO, command=self.open_help_window)
@@ -156,6 +423,36 @@ class App(tb.Window):
         btn_ext.pack(pady=4, padx=8)
         ToolTip(
             btn_ext, "Extrai coordenadas e valores PPFD e PFD dos arquivos nas subpastas e gera arquivos CSV.")
+        btn_qc = tb.Button(frame_acao, text="Verificar qualidade dos arquivos", width=28, bootstyle=PRIMARY,
+                           command=self.verificar_qualidade)
+        btn_qc.pack(pady=4, padx=8)
+        ToolTip(
+            btn_qc, "Verifica todos os arquivos ESPD_ e uMOL_ das subpastas e gera 'relatorio_qc.csv', sem interromper a cada problema.")
+        btn_anom = tb.Button(frame_acao, text="Revisar espectros atípicos", width=28, bootstyle=PRIMARY,
+                             command=self.revisar_espectros)
+        btn_anom.pack(pady=4, padx=8)
+        ToolTip(
+            btn_anom, "Compara a forma e a intensidade de todos os espectros uMOL_ e gera 'revisao_espectros.csv' com os arquivos atípicos ou que parecem pertencer a outro tratamento.")
+        btn_cor = tb.Button(frame_acao, text="Colorimetria e etiquetas", width=28, bootstyle=PRIMARY,
+                            command=self.verificar_colorimetria)
+        btn_cor.pack(pady=4, padx=8)
+        ToolTip(
+            btn_cor, "Recalcula CCT, Duv, CRI e coordenadas de cor a partir dos espectros ESPD_, compara com o cabeçalho do LI-180 e gera as etiquetas de cada tratamento.")
+        btn_plan = tb.Button(frame_acao, text="Sugerir próximos pontos", width=28, bootstyle=PRIMARY,
+                             command=self.sugerir_pontos)
+        btn_plan.pack(pady=4, padx=8)
+        ToolTip(
+            btn_plan, "Ajusta um modelo de krigagem aos pontos já medidos de um tratamento e sugere onde medir a seguir para reduzir a incerteza da superfície.")
+        btn_exp = tb.Button(frame_acao, text="Exportar campanha (Parquet)", width=28, bootstyle=PRIMARY,
+                            command=self.exportar_campanha)
+        btn_exp.pack(pady=4, padx=8)
+        ToolTip(
+            btn_exp, "Gera uma tabela de medições e uma tabela de espectros (Parquet) para toda a campanha. Requer o pacote pyarrow.")
+        btn_pac = tb.Button(frame_acao, text="Empacotar campanha", width=28, bootstyle=PRIMARY,
+                            command=self.empacotar_campanha)
+        btn_pac.pack(pady=4, padx=8)
+        ToolTip(
+            btn_pac, "Grava toda a pasta principal em um único arquivo .zip comprimido, com índice e verificação, que pode ser lido diretamente pelas funções de análise.")
 
     def _create_plotagem(self, parent):
         frame_plot = tb.Labelframe(
@@ -176,16 +473,61 @@ class App(tb.Window):
         btn_mult.pack(pady=4, padx=8)
         ToolTip(
             btn_mult, "Plota múltiplas superfícies 3D para todas as subpastas encontradas.")
+        btn_comp = tb.Button(frame_plot, text="Comparar duas campanhas/pastas", width=28, bootstyle=PRIMARY,
+                             command=self.comparar_campanhas)
+        btn_comp.pack(pady=4, padx=8)
+        ToolTip(
+            btn_comp, "Alinha duas campanhas (ou duas pastas de tratamento) pela posição na grade e plota as superfícies e espectros das diferenças (B - A).")
+        btn_dim = tb.Button(frame_plot, text="Prever nível de dimerização", width=28, bootstyle=PRIMARY,
+                            command=self.prever_dimerizacao)
+        btn_dim.pack(pady=4, padx=8)
+        ToolTip(
+            btn_dim, "Ajusta a resposta de cada ponto entre os níveis medidos (ex: 0A e 100A) e plota a superfície e os espectros previstos em um nível intermediário.")
+        btn_tempo = tb.Button(frame_plot, text="Estabilidade temporal", width=28, bootstyle=PRIMARY,
+                              command=self.analisar_estabilidade)
+        btn_tempo.pack(pady=4, padx=8)
+        ToolTip(
+            btn_tempo, "Ordena as medições pelo horário do LI-180 e estima a deriva das lâmpadas em cada sessão a partir dos pontos medidos mais de uma vez.")
+        btn_ref = tb.Button(frame_plot, text="Comparar com referências", width=28, bootstyle=PRIMARY,
+                            command=self.comparar_referencias)
+        btn_ref.pack(pady=4, padx=8)
+        ToolTip(
+            btn_ref, "Compara a forma de todos os espectros uMOL da campanha com a biblioteca de referência (luz solar e LEDs monocromáticos).")
+        btn_vol = tb.Button(frame_plot, text="Volume de luz (alturas)", width=28, bootstyle=PRIMARY,
+                            command=self.plotar_volume_luz)
+        btn_vol.pack(pady=4, padx=8)
+        ToolTip(
+            btn_vol, "Monta o volume de PPFD a partir dos planos medidos em alturas diferentes (alturas.csv), plota as fatias e as isosuperfícies e mostra a superfície em uma altura qualquer.")
+        btn_metr = tb.Button(frame_plot, text="Métricas fotobiológicas", width=28, bootstyle=PRIMARY,
+                             command=self.plotar_metricas_fotobiologicas)
+        btn_metr.pack(pady=4, padx=8)
+        ToolTip(
+            btn_metr, "Calcula YPF, R:FR, B:R e as integrais por faixa de cada ponto de um tratamento e plota a superfície da métrica escolhida.")
+        btn_otim = tb.Button(frame_plot, text="Otimizar ajustes das luminárias", width=28, bootstyle=PRIMARY,
+                             command=self.otimizar_luminarias)
+        btn_otim.pack(pady=4, padx=8)
+        ToolTip(
+            btn_otim, "Combina os canais medidos a 100% (100A, 100V, 100B, 99100) e sugere o ajuste de cada um para atingir a PPFD média e, opcionalmente, a razão R:B desejadas.")
+        btn_mapa = tb.Button(frame_plot, text="Mapa espectral", width=28, bootstyle=PRIMARY,
+                             command=self.plotar_mapa_espectral)
+        btn_mapa.pack(pady=4, padx=8)
+        ToolTip(
+            btn_mapa, "Interpola o espectro completo sobre a bancada de um tratamento, plota a superfície das razões entre faixas (R:B, R:FR, ...) e mostra o espectro da célula sob o cursor.")
         btn_umol = tb.Button(frame_plot, text="Plotar espectros uMOL (Plotly)", width=28, bootstyle=PRIMARY,
-                             command=fn.plot_spectral)
+                             command=lambda: fn.plot_spectral(agregar=self.agregar_espectros.get()))
         btn_umol.pack(pady=4, padx=8)
         ToolTip(
             btn_umol, "Plota todos os espectros de arquivos uMOL encontrados nas subpastas (Plotly interativo).")
         btn_umol_mat = tb.Button(frame_plot, text="Plotar espectros uMOL (Matplotlib)", width=28, bootstyle=PRIMARY,
-                                 command=fn.plot_spectral_matplotlib)
+                                 command=lambda: fn.plot_spectral_matplotlib(agregar=self.agregar_espectros.get()))
         btn_umol_mat.pack(pady=4, padx=8)
         ToolTip(
             btn_umol_mat, "Plota todos os espectros de arquivos uMOL encontrados nas subpastas com linhas multicoloridas (Matplotlib).")
+        btn_nav = tb.Button(frame_plot, text="Navegador de espectros", width=28, bootstyle=PRIMARY,
+                            command=self.abrir_navegador)
+        btn_nav.pack(pady=4, padx=8)
+        ToolTip(
+            btn_nav, "Percorre os espectros ESPD_ um a um (lista, barra, setas do teclado ou clique no mapa da grade), lendo cada arquivo só quando exibido.")
 
     def _create_opcoes_graficos(self, parent):
         frame_opts = tb.Labelframe(
@@ -193,6 +535,8 @@ class App(tb.Window):
         frame_opts.pack(pady=(16, 8), padx=18, fill='x')
         self._create_tipo_valor(frame_opts)
         self._create_interpolacao(frame_opts)
+        self._create_modo_espectros(frame_opts)
+        self._create_pasta_relatorios(frame_opts)
 
     def _create_tipo_valor(self, parent):
         frame_tipo = tb.Labelframe(
@@ -218,6 +562,36 @@ class App(tb.Window):
                        value="linear", bootstyle="info").pack(side='left', padx=(0, 16))
         tb.Radiobutton(interp_radio_frame, text="Mais próxima", variable=self.interpolar_var,
                        value="nearest", bootstyle="info").pack(side='left')
+        chk_todas = tb.Checkbutton(frame_interp, text="Múltiplas superfícies: incluir todas as variáveis e interpolações no HTML",
+                                   variable=self.todas_combinacoes, bootstyle="info")
+        chk_todas.pack(anchor='w', padx=8, pady=(4, 2))
+        ToolTip(chk_todas, "Calcula PPFD/PFD com as três interpolações uma única vez e permite trocar entre elas na própria página HTML.")
+
+    def _create_modo_espectros(self, parent):
+        frame_esp = tb.Labelframe(
+            parent, text="Espectros uMOL", bootstyle="info")
+        frame_esp.pack(fill='x', padx=8, pady=(8, 4))
+        chk_agregar = tb.Checkbutton(frame_esp, text="Agregar por grupo (média, desvio e percentis)",
+                                     variable=self.agregar_espectros, bootstyle="info")
+        chk_agregar.pack(anchor='w', padx=8, pady=(6, 2))
+        ToolTip(chk_agregar, "Plota apenas o envelope de cada grupo e os espectros atípicos, e exporta 'espectros_agregados.csv'.")
+
+    def _create_pasta_relatorios(self, parent):
+        frame_rel = tb.Labelframe(
+            parent, text="Relatórios HTML", bootstyle="info")
+        frame_rel.pack(fill='x', padx=8, pady=(8, 4))
+        self.rotulo_relatorios = tb.Label(frame_rel, text=fn.PASTA_RELATORIOS, wraplength=260)
+        self.rotulo_relatorios.pack(anchor='w', padx=8, pady=(6, 2))
+        btn_rel = tb.Button(frame_rel, text="Escolher pasta dos relatórios", bootstyle="info",
+                            command=self.escolher_pasta_relatorios)
+        btn_rel.pack(anchor='w', padx=8, pady=(2, 6))
+        ToolTip(btn_rel, "Pasta onde as páginas HTML interativas são gravadas. O plotly.js é copiado uma única vez para 'assets' nessa pasta, e as páginas abrem sem internet.")
+
+    def escolher_pasta_relatorios(self):
+        pasta = filedialog.askdirectory(title="Selecione a pasta dos relatórios HTML")
+        if pasta:
+            fn.PASTA_RELATORIOS = pasta
+            self.rotulo_relatorios.configure(text=pasta)
 
     def organizar_arquivos(self):
         if not messagebox.askyesno(
@@ -269,6 +643,142 @@ class App(tb.Window):
             self.after(0, lambda: messagebox.showerror(
                 "Erro ao extrair coordenadas e valores", str(e)))
 
+    def verificar_qualidade(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas ESPD")
+        if pasta_principal:
+            threading.Thread(target=self._verificar_qualidade_thread, args=(
+                pasta_principal,), daemon=True).start()
+
+    def _verificar_qualidade_thread(self, pasta_principal):
+        try:
+            print(f'Verificando qualidade dos arquivos em: {pasta_principal}')
+            relatorio, quarentena, _ = qc.verificar_pasta(pasta_principal)
+            if not relatorio.empty:
+                print(relatorio.drop(columns=['caminho']).to_string())
+            msg = (f"{len(relatorio)} problema(s) encontrado(s), {len(quarentena)} arquivo(s) em quarentena.\n"
+                   "Detalhes em 'relatorio_qc.csv' na pasta principal e no terminal.")
+            self.after(0, lambda: messagebox.showinfo(
+                "Verificação concluída", msg))
+        except Exception as e:
+            print(f'Erro na verificação de qualidade: {e}')
+            msg = str(e)
+            self.after(0, lambda m=msg: messagebox.showerror(
+                "Erro na verificação de qualidade", m))
+
+    def revisar_espectros(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas uMOL")
+        if not pasta_principal:
+            return
+        try:
+            revisao = sim.detectar_anomalias(pasta_principal)
+            marcados = revisao[revisao['revisar']] if not revisao.empty else revisao
+            linhas = "\n".join(f"{l['arquivo']} ({fn.NOMES_LEGENDA.get(l['grupo'], l['grupo'])}): {l['motivo']}"
+                                for _, l in marcados.head(15).iterrows())
+            if len(marcados) > 15:
+                linhas += f"\n... e mais {len(marcados) - 15}."
+            messagebox.showinfo(
+                "Revisão de espectros",
+                f"{len(marcados)} de {len(revisao)} arquivo(s) para revisar.\n{linhas}"
+                "\nDetalhes em 'revisao_espectros.csv'.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao revisar os espectros", str(e))
+
+    def verificar_colorimetria(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas ESPD")
+        if not pasta_principal:
+            return
+        try:
+            _, resumo = cor.verificar_colorimetria(pasta_principal)
+            etiquetas = cor.rotular_tratamentos(pasta_principal)
+            diferencas = resumo.set_index('grandeza')['maximo_abs']
+            # LambdaD negativo indica púrpura (comprimento de onda complementar)
+            linhas = "\n".join(
+                f"{l['tratamento']}: LambdaD {abs(l['LambdaD']):.0f} nm" + (" (complementar)" if l['LambdaD'] < 0 else "")
+                + (f", CCT {l['CCT']:.0f} K, CRI {l['CRI']:.0f}" if np.isfinite(l['CCT']) else "")
+                for _, l in etiquetas.iterrows())
+            messagebox.showinfo(
+                "Colorimetria",
+                f"{linhas}\n\nMaior diferença em relação ao LI-180: "
+                + ", ".join(f"{g} {diferencas[g]:.3g}" for g in ('CCT', 'Duv', 'CRI') if g in diferencas)
+                + "\nDetalhes em 'verificacao_colorimetria.csv' e 'etiquetas_colorimetria.csv'.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao verificar a colorimetria", str(e))
+
+    def sugerir_pontos(self):
+        pasta = filedialog.askdirectory(
+            title="Selecione a pasta do tratamento em medição")
+        if not pasta:
+            return
+        n_sugestoes = simpledialog.askinteger(
+            "Próximos pontos", "Quantas posições sugerir?", initialvalue=5, minvalue=1, maxvalue=30, parent=self)
+        if n_sugestoes is None:
+            return
+        try:
+            variavel = 'PPFD' if self.usar_ppfd.get() else 'PFD'
+            plano = pa.planejar_amostragem(pasta, n_sugestoes, variavel, salvar_csv=True)
+            pa.plotar_incerteza(plano, variavel)
+            if plano['parar']:
+                situacao = "A superfície já está dentro da tolerância: a coleta pode parar."
+            elif plano['pontos_para_tolerancia'] is not None:
+                situacao = f"Estimativa: {plano['pontos_para_tolerancia']} ponto(s) a mais para atingir a tolerância."
+            else:
+                situacao = "A tolerância não é atingida com até 30 pontos a mais."
+            linhas = "\n".join(f"{int(s['ordem'])}. linha {s['linha']:.0f}, coluna {s['coluna']:.0f} (perto de {s['perto_de']})"
+                               for _, s in plano['sugestoes'].iterrows())
+            messagebox.showinfo(
+                "Próximos pontos",
+                f"Incerteza média: {100 * plano['incerteza_relativa']:.1f}% agora, "
+                f"{100 * plano['incerteza_apos']:.1f}% após as sugestões.\n{situacao}\n\n{linhas}\n\n"
+                "Sugestões salvas em 'sugestoes_amostragem.csv' na pasta do tratamento.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao sugerir pontos", str(e))
+
+    def exportar_campanha(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas ESPD")
+        if pasta_principal:
+            threading.Thread(target=self._exportar_campanha_thread, args=(
+                pasta_principal,), daemon=True).start()
+
+    def _exportar_campanha_thread(self, pasta_principal):
+        try:
+            print(f'Exportando campanha: {pasta_principal}')
+            caminhos = fn.exportar_campanha(pasta_principal)
+            self.after(0, lambda: messagebox.showinfo(
+                "Concluído", "Campanha exportada:\n" + "\n".join(caminhos.values())))
+        except Exception as e:
+            print(f'Erro ao exportar campanha: {e}')
+            msg = str(e)
+            self.after(0, lambda m=msg: messagebox.showerror(
+                "Erro ao exportar campanha", m))
+
+    def empacotar_campanha(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal da campanha a empacotar")
+        if pasta_principal:
+            threading.Thread(target=self._empacotar_campanha_thread, args=(
+                pasta_principal,), daemon=True).start()
+
+    def _empacotar_campanha_thread(self, pasta_principal):
+        try:
+            caminho = fn.empacotar_campanha(pasta_principal)
+            verificacao = fn.verificar_pacote(caminho)
+            if not verificacao['ok'].all():
+                raise ValueError(f"{(~verificacao['ok']).sum()} arquivo(s) não conferem com o índice do pacote.")
+            self.after(0, lambda: messagebox.showinfo(
+                "Concluído", f"Campanha empacotada e verificada ({len(verificacao)} arquivos):\n{caminho}"))
+        except Exception as e:
+            print(f'Erro ao empacotar campanha: {e}')
+            msg = str(e)
+            self.after(0, lambda m=msg: messagebox.showerror(
+                "Erro ao empacotar campanha", m))
+
     def plotar_3d_simples(self):
         pasta = filedialog.askdirectory(
             title="Selecione a pasta para gráfico 3D PPFD/PFD")
@@ -320,7 +830,8 @@ class App(tb.Window):
                     metodo = self.interpolar_var.get()
                     print(f"Método de interpolação selecionado: {metodo}")
                     fn.plotar_multiple_surface_ppfd(
-                        dfs, nomes, self.usar_ppfd.get(), metodo)
+                        dfs, nomes, self.usar_ppfd.get(), metodo, self.todas_combinacoes.get(),
+                        nome_campanha=os.path.basename(os.path.normpath(pasta_principal)))
                 else:
                     messagebox.showwarning(
                         "Aviso", "Nenhum dado encontrado nas subpastas. Garanta que foi escolhida uma pasta que contenha as subpastas com arquivos válidos.")
@@ -328,6 +839,224 @@ class App(tb.Window):
                 messagebox.showerror(
                     "Erro ao plotar múltiplas superfícies", str(e))
 
+    def comparar_campanhas(self):
+        pasta_a = filedialog.askdirectory(
+            title="Selecione a campanha ou pasta de referência (A)")
+        if not pasta_a:
+            return
+        pasta_b = filedialog.askdirectory(
+            title="Selecione a campanha ou pasta a comparar (B)")
+        if not pasta_b:
+            return
+        try:
+            # Pastas com arquivos ESPD_ diretamente são tratamentos; caso contrário, pastas principais de campanha
+            if any(a.startswith('ESPD_') for a in os.listdir(pasta_a)):
+                comparacao = cmp.comparar_pastas(pasta_a, pasta_b)
+            else:
+                comparacao = cmp.comparar_campanhas(pasta_a, pasta_b)
+            if comparacao['pontos'].empty:
+                messagebox.showwarning(
+                    "Aviso", "Nenhuma posição em comum entre as duas seleções. Verifique se as pastas correspondem.")
+                return
+            resumo = comparacao['resumo']
+            pontos = comparacao['pontos']
+            significativos = resumo.loc[resumo['significativo'], 'grupo'].tolist()
+            locais = int(pontos['mudanca_local'].sum())
+            # Em campanhas inteiras, abre apenas as superfícies dos grupos que mudaram
+            alterados = set(significativos) | set(pontos.loc[pontos['mudanca_local'], 'grupo'])
+            variavel = 'delta_PPFD' if self.usar_ppfd.get() else 'delta_PFD'
+            metodo = self.interpolar_var.get()
+            for grupo in resumo['grupo']:
+                if len(resumo) == 1 or grupo in alterados:
+                    cmp.plotar_surface_delta(comparacao, grupo, variavel, metodo)
+            cmp.plotar_espectros_delta(comparacao)
+            messagebox.showinfo(
+                "Comparação concluída",
+                f"{int(resumo['n_pares'].sum())} pontos pareados em {len(resumo)} grupo(s).\n"
+                f"Mudança significativa de PPFD: {', '.join(significativos) if significativos else 'nenhum grupo'}.\n"
+                f"Pontos com mudança local: {locais}. Detalhes no terminal.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao comparar campanhas", str(e))
+
+    def prever_dimerizacao(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas de tratamento")
+        if not pasta_principal:
+            return
+        nivel = simpledialog.askfloat(
+            "Nível de dimerização", "Nível a prever (%):", minvalue=0.0, maxvalue=100.0, parent=self)
+        if nivel is None:
+            return
+        try:
+            resultado = md.ajustar_campanha(pasta_principal)
+            for modelo in resultado['modelos'].values():
+                md.plotar_surface_prevista(modelo, nivel, self.usar_ppfd.get(), self.interpolar_var.get())
+                md.plotar_espectros_previstos(modelo, [nivel])
+            resumo = resultado['resumo']
+            erros = resumo.groupby('serie')['erro_PPFD_medio_%'].mean()
+            messagebox.showinfo(
+                "Previsão concluída",
+                f"Séries ajustadas: {', '.join(resultado['modelos'])}.\n"
+                + "\n".join(f"{serie}: erro médio de PPFD na validação {erro:.1f}%" for serie, erro in erros.items())
+                + "\nDetalhes em 'validacao_dimerizacao.csv'.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao prever nível de dimerização", str(e))
+
+    def analisar_estabilidade(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas de tratamento")
+        if not pasta_principal:
+            return
+        try:
+            resultado = et.analisar_estabilidade(pasta_principal)
+            et.plotar_linha_do_tempo(resultado)
+            deriva = resultado['deriva']
+            estimadas = deriva[deriva['deriva_valida']]
+            recusadas = deriva[(deriva['n_pares'] > 0) & ~deriva['deriva_valida']]
+            avisos = "".join(f"\n{fn.NOMES_LEGENDA.get(l['ID'], l['ID'])} (sessão {l['sessao']}): não estimada, "
+                             f"{l['motivo']}" for _, l in recusadas.iterrows())
+            if estimadas.empty:
+                messagebox.showinfo(
+                    "Estabilidade temporal",
+                    "Não há repetições suficientes na mesma sessão para estimar a deriva.\n"
+                    "Remeça um ponto de referência algumas vezes ao longo da coleta para acompanhar a deriva."
+                    + avisos)
+                return
+            et.plotar_deriva_espectral(resultado)
+            messagebox.showinfo(
+                "Estabilidade temporal",
+                "\n".join(f"{fn.NOMES_LEGENDA.get(l['ID'], l['ID'])} (sessão {l['sessao']}): "
+                          f"{l['deriva_%_h']:+.2f}%/h, {l['deriva_total_%']:+.2f}% na sessão"
+                          for _, l in estimadas.iterrows())
+                + avisos + "\nDetalhes em 'estabilidade_deriva.csv'.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao analisar a estabilidade temporal", str(e))
+
+    def comparar_referencias(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas uMOL")
+        if not pasta_principal:
+            return
+        try:
+            df = br.comparar_campanha(pasta_principal)
+            br.plotar_correspondencias(pasta_principal)
+            resumo = df.groupby('ID')['referencia_1'].agg(lambda s: s.mode()[0])
+            messagebox.showinfo(
+                "Comparação com referências",
+                "\n".join(f"{fn.NOMES_LEGENDA.get(g, g)}: mais parecido com {r}" for g, r in resumo.items())
+                + "\nDetalhes em 'correspondencia_referencias.csv'.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao comparar com as referências", str(e))
+
+    def plotar_volume_luz(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas dos planos e o alturas.csv")
+        if not pasta_principal:
+            return
+        try:
+            volume = vl.volume_campanha(pasta_principal)
+            variavel = 'PPFD' if self.usar_ppfd.get() else 'PFD'
+            vl.plotar_fatias(volume, variavel=variavel)
+            vl.plotar_isosuperficies(volume, variavel=variavel)
+            z_min, z_max = float(volume['z'][0]), float(volume['z'][-1])
+            altura = simpledialog.askfloat(
+                "Volume de luz", f"Altura a consultar (cm, de {z_min:g} a {z_max:g}):",
+                minvalue=z_min, maxvalue=z_max, parent=self)
+            if altura is None:
+                return
+            df = vl.plano_na_altura(volume, altura)
+            fn.plotar_surface_ppfd(df, self.usar_ppfd.get(), 'linear')
+            messagebox.showinfo(
+                "Volume de luz",
+                f"{variavel} a {altura:g} cm: média {df[variavel].mean():.1f}, "
+                f"mínimo {df[variavel].min():.1f}, máximo {df[variavel].max():.1f} µmol m⁻² s⁻¹.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao montar o volume de luz", str(e))
+
+    def plotar_metricas_fotobiologicas(self):
+        pasta = filedialog.askdirectory(
+            title="Selecione a pasta do tratamento com os arquivos ESPD_")
+        if not pasta:
+            return
+        try:
+            df = mf.metricas_por_ponto(pasta, salvar_csv=True)
+            variavel = simpledialog.askstring(
+                "Métricas fotobiológicas", "Métrica para o eixo Z (ex: YPF, R:FR, B:R, PFD-FR):",
+                initialvalue="YPF", parent=self)
+            if not variavel:
+                return
+            if variavel not in df.columns:
+                messagebox.showerror(
+                    "Métricas fotobiológicas",
+                    f"Métrica desconhecida: {variavel}.\nDisponíveis: "
+                    + ", ".join(c for c in df.columns if c not in ('arquivo', 'ID', 'linha', 'coluna', 'X', 'Y', 'x', 'y')))
+                return
+            fn.plotar_surface_ppfd(df, interpolar=self.interpolar_var.get(), variavel=variavel)
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao calcular as métricas fotobiológicas", str(e))
+
+    def otimizar_luminarias(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal com as subpastas dos canais a 100%")
+        if not pasta_principal:
+            return
+        ppfd_alvo = simpledialog.askfloat(
+            "Otimizar luminárias", "PPFD média desejada (µmol m⁻² s⁻¹):", minvalue=0.0, parent=self)
+        if ppfd_alvo is None:
+            return
+        texto_rb = simpledialog.askstring(
+            "Otimizar luminárias", "Razão R:B desejada (deixe vazio para não impor):", parent=self)
+        if texto_rb is None:
+            return
+        try:
+            razao_rb = float(texto_rb.replace(',', '.')) if texto_rb.strip() else None
+            resultado = ol.otimizar_campanha(pasta_principal, ppfd_alvo, razao_rb)
+            ol.plotar_surface_otimizada(resultado, self.usar_ppfd.get(), self.interpolar_var.get())
+            resumo = resultado['resumo']
+            messagebox.showinfo(
+                "Otimização concluída",
+                "\n".join(f"{fn.NOMES_LEGENDA.get(c, c)}: {v:.1f}%" for c, v in resultado['ajustes'].items())
+                + f"\n\nPPFD média prevista {resumo['PPFD_media']:.1f}, mínimo/média "
+                f"{resumo['uniformidade_min_media']:.2f}, R:B {resumo['R:B_medio']:.2f}."
+                "\nDetalhes em 'otimizacao_ajustes.csv' e 'otimizacao_pontos.csv'.")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao otimizar as luminárias", str(e))
+
+    def plotar_mapa_espectral(self):
+        pasta = filedialog.askdirectory(
+            title="Selecione a pasta do tratamento com os arquivos ESPD_")
+        if not pasta:
+            return
+        try:
+            mapa = me.MapaEspectral.de_pasta(pasta, metodo=self.interpolar_var.get())
+            me.plotar_mapa_espectral(
+                mapa, titulo=f"Mapa espectral - {fn.NOMES_LEGENDA.get(os.path.basename(pasta), os.path.basename(pasta))}")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao plotar o mapa espectral", str(e))
+
+    def abrir_navegador(self):
+        pasta_principal = filedialog.askdirectory(
+            title="Selecione a pasta principal (ou de um tratamento) com os arquivos ESPD_")
+        if not pasta_principal:
+            return
+        try:
+            if self.navegador is not None and self.navegador.quadro.winfo_exists():
+                self.navegador.fechar()
+            self.navegador = NavegadorEspectros(self, pasta_principal)
+            self.navegador.quadro.pack(side='left', fill='both', expand=True, padx=(0, 18), pady=18)
+            self.geometry("")
+        except Exception as e:
+            messagebox.showerror(
+                "Erro ao abrir o navegador de espectros", str(e))
+
     def confirmar_sair(self):
         if messagebox.askyesno("Confirmação", "Deseja realmente sair do programa?"):
             self.destroy()
@@ -0,0 +1,329 @@
+import json
+import base64
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from scipy.interpolate import CloughTocher2DInterpolator
+import functions as fn
+import metricas_fotobiologicas as mf
+import modelo_dimerizacao as md
+
+# Razões entre faixas (nomes de metricas_fotobiologicas.FAIXAS) oferecidas no mapa espectral
+RAZOES_PADRAO = {
+    'R:B': ('PFD-R', 'PFD-B'),
+    'B:R': ('PFD-B', 'PFD-R'),
+    'R:FR': ('R660', 'FR730'),
+    'B:G': ('PFD-B', 'PFD-G'),
+    'R:G': ('PFD-R', 'PFD-G'),
+}
+
+
+class MapaEspectral:
+    """
+    Espectro completo (380–780 nm) interpolado sobre a grade da bancada, avaliado sob demanda.
+
+    Os pesos de interpolação (calcular_pesos_interpolacao) são calculados uma única vez. O cubo grade x comprimento de
+    onda nunca é montado de uma vez: o espectro de uma célula é a linha correspondente da matriz de pesos aplicada aos
+    espectros medidos, e os mapas de faixas integram os espectros nos pontos medidos e interpolam só as integrais, em
+    um único produto matricial. Na interpolação linear (e na do mais próximo) isso é idêntico a integrar o cubo
+    interpolado. Quando o cubo inteiro é necessário, materializar() o grava em um .npy lido por memória mapeada.
+
+    Atributos:
+        wl, espectros (pontos x wl, mW m⁻² nm⁻¹), pontos (DataFrame com posição e coordenadas de cada ponto),
+        x, y (eixos da grade), forma (linhas x colunas da grade), metodo, pesos.
+    """
+
+    def __init__(self, wl, espectros, pontos: pd.DataFrame, resolucao: int = 50, metodo: str = 'linear'):
+        if metodo not in ('linear', 'cubic', 'nearest'):
+            raise ValueError(f"Método de interpolação desconhecido: {metodo}. Use 'cubic', 'linear' ou 'nearest'.")
+        self.wl = np.asarray(wl, dtype=float)
+        self.espectros = np.asarray(espectros, dtype=np.float32)
+        self.pontos = pontos
+        self.metodo = metodo
+        x, y = pontos['linha'].to_numpy(dtype=float), pontos['coluna'].to_numpy(dtype=float)
+        self.x = np.linspace(x.min(), x.max(), resolucao)
+        self.y = np.linspace(y.min(), y.max(), resolucao)
+        xi, yi = np.meshgrid(self.x, self.y)
+        self.pesos = fn.calcular_pesos_interpolacao(x, y, xi, yi)
+        self.forma = self.pesos['forma']
+        self._interpolador = None
+        self._cubo = None
+        self._integrais = {}
+
+    @classmethod
+    def de_pasta(cls, pasta: str, resolucao: int = 50, metodo: str = 'linear') -> 'MapaEspectral':
+        """Monta o mapa a partir dos arquivos ESPD_ de uma pasta de tratamento (ou de um pacote de campanha)."""
+        try:
+            cubo = md.carregar_cubo([pasta])
+            pontos = pd.DataFrame({'linha': cubo['X'].astype(np.int64), 'coluna': cubo['Y'].astype(np.int64)})
+            pontos = fn.mesclar_coordenadas(pontos, pasta)
+            pontos['PPFD'] = cubo['medidos'][0, :, -2]
+            pontos['PFD'] = cubo['medidos'][0, :, -1]
+            return cls(cubo['wl'], cubo['medidos'][0, :, :len(cubo['wl'])], pontos, resolucao, metodo)
+        except Exception as e:
+            print(f'Erro ao montar o mapa espectral: {e}')
+            raise
+
+    def __len__(self) -> int:
+        return int(np.prod(self.forma))
+
+    def _avaliar(self, celulas: np.ndarray) -> np.ndarray:
+        """Espectros interpolados (células x wl) das células de índice plano 'celulas'."""
+        if self._cubo is not None:
+            return np.asarray(self._cubo[celulas], dtype=np.float32)
+        if self.metodo == 'nearest':
+            return self.espectros[self.pesos['nearest'][celulas]]
+        if self.metodo == 'linear':
+            espectros = np.asarray(self.pesos['linear'][celulas] @ self.espectros, dtype=np.float32)
+        else:
+            if self._interpolador is None:
+                # Os gradientes nos vértices são estimados uma única vez, para todos os comprimentos de onda
+                self._interpolador = CloughTocher2DInterpolator(self.pesos['tri'], self.espectros)
+            espectros = np.asarray(self._interpolador(self.pesos['alvo'][celulas]), dtype=np.float32)
+        espectros[self.pesos['fora'][celulas]] = np.nan
+        return espectros
+
+    def celula(self, x: float, y: float) -> tuple:
+        """(linha, coluna) da célula da grade mais próxima das coordenadas (x, y)."""
+        return int(np.abs(self.y - y).argmin()), int(np.abs(self.x - x).argmin())
+
+    def espectro(self, i: int, j: int, fotons: bool = False) -> np.ndarray:
+        """
+        Espectro interpolado da célula (i, j) da grade (i ao longo de y, j ao longo de x), calculado só para ela.
+        Com fotons=True, em µmol m⁻² s⁻¹ nm⁻¹; senão, em mW m⁻² nm⁻¹.
+        """
+        if not (0 <= i < self.forma[0] and 0 <= j < self.forma[1]):
+            raise IndexError(f'Célula ({i}, {j}) fora da grade {self.forma[0]} x {self.forma[1]}.')
+        espectro = self._avaliar(np.array([i * self.forma[1] + j]))[0]
+        return mf.converter_para_fotons(self.wl, espectro) if fotons else espectro
+
+    def integrais(self, faixas: dict = None) -> dict:
+        """
+        Mapas das integrais em fótons (µmol m⁻² s⁻¹) de cada faixa ({nome: (início, fim)} em nm; padrão
+        metricas_fotobiologicas.FAIXAS), guardados no mapa.
+
+        Returns:
+            dict: {nome: grade (linhas x colunas)}.
+        """
+        faixas = mf.FAIXAS if faixas is None else faixas
+        novas = {nome: faixa for nome, faixa in faixas.items() if (nome, tuple(faixa)) not in self._integrais}
+        if novas:
+            pesos_faixas, nomes = mf.montar_matriz_pesos(self.wl, acao=pd.DataFrame(), faixas=novas)
+            nos_pontos = mf.converter_para_fotons(self.wl, self.espectros) @ pesos_faixas
+            grades = fn.interpolar_com_pesos(self.pesos, nos_pontos, metodo=self.metodo)
+            for k, nome in enumerate(nomes):
+                self._integrais[(nome, tuple(novas[nome]))] = grades[..., k]
+        return {nome: self._integrais[(nome, tuple(faixa))] for nome, faixa in faixas.items()}
+
+    def mapa_razao(self, numerador, denominador) -> np.ndarray:
+        """
+        Mapa da razão entre duas faixas, dadas pelo nome (ex: 'PFD-R', de metricas_fotobiologicas.FAIXAS) ou por
+        (início, fim) em nm. NaN onde o denominador é zero ou fora do fecho dos pontos medidos.
+
+        Exemplo:
+            razao_rb = mapa.mapa_razao('PFD-R', 'PFD-B')
+            razao_rfr = mapa.mapa_razao((655, 665), (725, 735))
+        """
+        faixas = {}
+        for faixa in (numerador, denominador):
+            if isinstance(faixa, str):
+                if faixa not in mf.FAIXAS:
+                    raise ValueError(f"Faixa desconhecida: {faixa}. Use um nome de FAIXAS ou (início, fim) em nm.")
+                faixas[faixa] = mf.FAIXAS[faixa]
+            else:
+                faixas[f'{faixa[0]:g}-{faixa[1]:g} nm'] = tuple(faixa)
+        grades = list(self.integrais(faixas).values())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            razao = grades[0] / grades[-1]
+        razao[~np.isfinite(razao)] = np.nan
+        return razao
+
+    def materializar(self, caminho: str, bloco: int = 4096) -> np.ndarray:
+        """
+        Calcula o cubo inteiro (linhas x colunas x wl, float32, mW m⁻² nm⁻¹) em blocos de células e o grava em um .npy,
+        devolvido como memória mapeada somente leitura; as consultas seguintes ao mapa passam a ler desse arquivo.
+        O arquivo fica a cargo de quem chama (o mapa o mantém aberto enquanto existir).
+
+        Args:
+            caminho (str): Arquivo .npy de destino.
+            bloco (int, opcional): Células calculadas por vez. Padrão é 4096.
+        """
+        try:
+            n = len(self)
+
+            def escrever(tmp):
+                cubo = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(n, len(self.wl)))
+                for inicio in range(0, n, bloco):
+                    cubo[inicio:inicio + bloco] = self._avaliar(np.arange(inicio, min(inicio + bloco, n)))
+                cubo.flush()
+                del cubo
+
+            fn.gravar_atomico(caminho, escrever)
+            self._cubo = np.load(caminho, mmap_mode='r')
+            return self._cubo.reshape(self.forma + (len(self.wl),))
+        except Exception as e:
+            print(f'Erro ao materializar o mapa espectral: {e}')
+            raise
+
+    def operador_celulas(self, metodo: str = None) -> tuple:
+        """
+        Forma compacta do mapa para avaliação fora do Python: (base, indices, pesos), com o espectro da célula c igual a
+        sum(pesos[c, k] * base[indices[c, k]]) e a base sempre igual aos espectros medidos. Na interpolação linear cada
+        célula combina os três vértices do seu triângulo; na do mais próximo, um único ponto. A cúbica não tem essa
+        forma (cada célula depende dos gradientes estimados em todos os pontos) e é recusada.
+
+        Args:
+            metodo (str, opcional): 'linear' ou 'nearest'. Padrão é o método do mapa.
+        """
+        metodo = self.metodo if metodo is None else metodo
+        if metodo not in ('linear', 'nearest'):
+            raise ValueError(f"O método '{metodo}' não tem forma compacta por célula. Use 'linear' ou 'nearest'.")
+        n = len(self)
+        indices = np.zeros((n, 3), dtype=np.int32)
+        pesos = np.zeros((n, 3), dtype=np.float32)
+        if metodo == 'nearest':
+            indices[:, 0] = self.pesos['nearest']
+            pesos[:, 0] = 1.0
+        else:
+            linear = self.pesos['linear'].tocsr()
+            for k in range(3):
+                # Cada linha tem exatamente três entradas (vértices do triângulo), zeradas fora do fecho
+                indices[:, k] = linear.indices[linear.indptr[:-1] + k]
+                pesos[:, k] = linear.data[linear.indptr[:-1] + k]
+            pesos[self.pesos['fora']] = np.nan
+        return self.espectros, indices, pesos
+
+
+def _base64(matriz: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(matriz).tobytes()).decode('ascii')
+
+
+def plotar_mapa_espectral(mapa: MapaEspectral, razoes: dict = None, titulo: str = None, pasta_saida: str = None,
+                          nome_arquivo: str = 'mapa_espectral_interativo.html') -> str:
+    """
+    Grava um relatório HTML com a superfície de uma razão entre faixas (lista de seleção com as razões em 'razoes',
+    padrão RAZOES_PADRAO) e o espectro da célula sob o cursor. O espectro é montado no navegador só para a célula
+    apontada, a partir dos espectros medidos e dos pesos da célula (operador_celulas); clicar fixa a célula para
+    comparação. Com o mapa em interpolação cúbica, as superfícies são cúbicas e o espectro da célula é linear entre
+    os pontos medidos: o cubo cúbico não é embutido na página.
+
+    Returns:
+        str: Caminho do relatório gravado (em 'pasta_saida', padrão functions.PASTA_RELATORIOS).
+
+    Exemplo:
+        mapa = MapaEspectral.de_pasta('Caminho/para/pasta_principal/100A')
+        plotar_mapa_espectral(mapa)
+    """
+    try:
+        razoes = RAZOES_PADRAO if razoes is None else razoes
+        grades = {nome: mapa.mapa_razao(*faixas) for nome, faixas in razoes.items()}
+        primeira = next(iter(grades))
+        metodo_espectro = 'linear' if mapa.metodo == 'cubic' else mapa.metodo
+        base, indices, pesos = mapa.operador_celulas(metodo_espectro)
+        fator = (mapa.wl / mf.FATOR_FOTONS).astype(np.float32)
+        centro = (mapa.forma[0] // 2) * mapa.forma[1] + mapa.forma[1] // 2
+        espectro_centro = (pesos[centro, :, None] * base[indices[centro]]).sum(axis=0) * fator
+
+        fig = make_subplots(rows=1, cols=2, column_widths=[0.55, 0.45],
+                            specs=[[{'type': 'surface'}, {'type': 'xy'}]])
+        fig.add_trace(go.Surface(
+            x=mapa.x, y=mapa.y, z=grades[primeira], colorscale='Viridis', colorbar=dict(title=primeira, x=0.5),
+            hovertemplate='Linha (X): %{x:.1f}<br>Coluna (Y): %{y:.1f}<br>Razão: %{z:.3f}<extra></extra>'),
+            row=1, col=1)
+        fig.add_trace(go.Scatter(x=mapa.wl, y=espectro_centro, mode='lines', name='Célula sob o cursor',
+                                 line=dict(color='black')), row=1, col=2)
+        fig.add_trace(go.Scatter(x=mapa.wl, y=np.full(len(mapa.wl), np.nan), mode='lines', name='Célula fixada',
+                                 line=dict(color='firebrick', dash='dash')), row=1, col=2)
+        fig.update_layout(
+            scene=dict(xaxis_title='Linha (X)', yaxis_title='Coluna (Y)', zaxis_title='Razão'),
+            xaxis_title='Comprimento de onda (nm)',
+            yaxis_title='PFD (µmol m⁻² s⁻¹ nm⁻¹)',
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+            legend=dict(x=0.6, y=1.0),
+            uirevision='manter_rotacao',
+        )
+
+        opcoes = "".join(f'<option value="{nome}">{nome}</option>' for nome in grades)
+        titulo = titulo or 'Mapa espectral'
+        nota = ('Superfície por interpolação cúbica; espectro da célula por interpolação linear entre os pontos '
+                'medidos.' if metodo_espectro != mapa.metodo else '')
+        corpo = f"""
+        <h2 style='font-family:Segoe UI,Segoe,Arial;'>{titulo}</h2>
+        <div style='margin-bottom:12px;font-size:15px;font-family:Segoe UI,Segoe,Arial;'>
+        <label style="margin-right:18px;">Razão: <select id="sel-razao">{opcoes}</select></label>
+        <span id="info-celula"></span><div style='font-size:13px;color:#666;'>{nota}</div></div>
+        """
+        js = '''<script>
+        function decodificar(b64, Tipo) {
+            var bin = atob(b64);
+            var bytes = new Uint8Array(bin.length);
+            for (var i = 0; i < bin.length; i++) { bytes[i] = bin.charCodeAt(i); }
+            return new Tipo(bytes.buffer);
+        }
+        var FORMA = %s, NWL = %d, X = %s, Y = %s;
+        var RAZOES = %s;
+        var BASE = decodificar('%s', Float32Array);
+        var INDICES = decodificar('%s', Int32Array);
+        var PESOS = decodificar('%s', Float32Array);
+        var FATOR = decodificar('%s', Float32Array);
+        var cacheRazoes = {};
+        var plot = document.querySelector('.js-plotly-plot');
+        function grade(nome) {
+            if (!cacheRazoes[nome]) {
+                var valores = decodificar(RAZOES[nome], Float32Array), linhas = [];
+                for (var r = 0; r < FORMA[0]; r++) {
+                    var linha = [];
+                    for (var c = 0; c < FORMA[1]; c++) { var v = valores[r * FORMA[1] + c]; linha.push(isNaN(v) ? null : v); }
+                    linhas.push(linha);
+                }
+                cacheRazoes[nome] = linhas;
+            }
+            return cacheRazoes[nome];
+        }
+        function espectroCelula(celula) {
+            var espectro = new Array(NWL).fill(0);
+            for (var k = 0; k < 3; k++) {
+                var p = PESOS[celula * 3 + k], base = INDICES[celula * 3 + k] * NWL;
+                if (p === 0) { continue; }
+                for (var w = 0; w < NWL; w++) { espectro[w] += p * BASE[base + w]; }
+            }
+            return espectro.map((v, w) => isNaN(v) ? null : v * FATOR[w]);
+        }
+        function indiceMaisProximo(eixo, valor) {
+            var passo = (eixo[eixo.length - 1] - eixo[0]) / (eixo.length - 1);
+            return Math.min(eixo.length - 1, Math.max(0, Math.round((valor - eixo[0]) / passo)));
+        }
+        function celulaDoEvento(ev) {
+            var ponto = ev.points[0];
+            if (ponto.curveNumber !== 0) { return null; }
+            var i = indiceMaisProximo(Y, ponto.y), j = indiceMaisProximo(X, ponto.x);
+            return {i: i, j: j, indice: i * FORMA[1] + j, x: X[j], y: Y[i]};
+        }
+        plot.on('plotly_hover', function(ev) {
+            var c = celulaDoEvento(ev);
+            if (!c) { return; }
+            Plotly.restyle(plot, {y: [espectroCelula(c.indice)]}, [1]);
+            document.getElementById('info-celula').textContent = 'Célula (' + c.x.toFixed(1) + ', ' + c.y.toFixed(1) + ')';
+        });
+        plot.on('plotly_click', function(ev) {
+            var c = celulaDoEvento(ev);
+            if (!c) { return; }
+            Plotly.restyle(plot, {y: [espectroCelula(c.indice)],
+                                  name: ['Célula fixada (' + c.x.toFixed(1) + ', ' + c.y.toFixed(1) + ')']}, [2]);
+        });
+        document.getElementById('sel-razao').addEventListener('change', function() {
+            var nome = this.value;
+            Plotly.restyle(plot, {z: [grade(nome)], 'colorbar.title.text': nome}, [0]);
+        });
+        </script>''' % (json.dumps(list(mapa.forma)), len(mapa.wl), json.dumps(mapa.x.tolist()),
+                         json.dumps(mapa.y.tolist()),
+                         json.dumps({nome: _base64(g.astype(np.float32)) for nome, g in grades.items()}),
+                         _base64(base), _base64(indices), _base64(pesos), _base64(fator))
+        saida = fn.gravar_relatorio_html(fig, titulo, corpo, js, nome_arquivo, pasta_saida)
+        print(f'Relatório salvo em: {saida}')
+        return saida
+    except Exception as e:
+        print(f'Erro ao plotar o mapa espectral: {e}')
+        raise
@@ -0,0 +1,216 @@
+import os
+import numpy as np
+import pandas as pd
+import functions as fn
+
+# Tabela de espectros de ação/absorção em grade de 1 nm (380–780 nm):
+#   - McCree: eficiência quântica relativa média de McCree (1972), digitalizada a cada 10 nm e interpolada;
+#   - Phytochrome Pr/Pfr, Cryptochrome, LOV, Chlorophyll a/b: absorbância relativa dos espectros de referência do
+#     LI-180 (plot_spectra/dados/spectros_referencia.xlsx), zerada fora da faixa tabelada.
+# Outras colunas podem ser acrescentadas ao CSV (ou passadas em 'acao') e viram integrais ponderadas automaticamente.
+CAMINHO_ESPECTROS_ACAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'espectros_acao.csv')
+
+# PSS do fitocromo. O cálculo de Sager et al. (1988) usa as seções de choque de fotoconversão do Pr e do Pfr; quando a
+# tabela de ação tiver essas colunas (COLUNAS_SIGMA), a métrica 'PSS' sai delas. A tabela distribuída só tem as
+# absorbâncias relativas Pr/Pfr do LI-180, que não são seções de choque: com elas sai apenas 'PSS_aprox', com a curva do
+# Pfr escalada por ESCALA_SIGMA_PFR para que 660 nm dê 0,89 como em Sager. Fora desse ponto a aproximação se afasta
+# dos valores publicados (~0,06 em 730 nm, contra ~0,1) e não deve ser tratada como PSS.
+COLUNAS_SIGMA = ('Sigma Pr', 'Sigma Pfr')
+ESCALA_SIGMA_PFR = 0.335
+
+# h·c·N_A nas unidades do LI-180: µmol m⁻² s⁻¹ nm⁻¹ = mW m⁻² nm⁻¹ · λ(nm) / FATOR_FOTONS
+FATOR_FOTONS = 119626.6
+
+# Faixas integradas (nm, início inclusivo e fim exclusivo; a última faixa inclui 780 nm), como no cabeçalho do ESPD
+FAIXAS = {
+    'PFD': (380, 781),
+    'PPFD': (400, 700),
+    'PFD-UV': (380, 400),
+    'PFD-B': (400, 500),
+    'PFD-G': (500, 600),
+    'PFD-R': (600, 700),
+    'PFD-FR': (700, 781),
+    'R660': (655, 665),
+    'FR730': (725, 735),
+}
+
+
+def converter_para_fotons(wl: np.ndarray, espectros: np.ndarray) -> np.ndarray:
+    """
+    Converte irradiância espectral (mW m⁻² nm⁻¹, bloco dos arquivos ESPD_) para fluxo de fótons
+    (µmol m⁻² s⁻¹ nm⁻¹, mesma unidade dos arquivos uMOL_). Aceita um espectro ou uma matriz (espectros x wl).
+    """
+    return np.asarray(espectros, dtype=float) * np.asarray(wl, dtype=float) / FATOR_FOTONS
+
+
+def carregar_espectros_acao(caminho: str = None) -> pd.DataFrame:
+    """
+    Lê a tabela de espectros de ação/absorção (uma coluna por espectro, índice = comprimento de onda em nm).
+
+    Args:
+        caminho (str, opcional): CSV com a coluna 'Wavelength(nm)' e uma coluna por espectro.
+            Padrão é CAMINHO_ESPECTROS_ACAO.
+    """
+    tabela = pd.read_csv(caminho or CAMINHO_ESPECTROS_ACAO)
+    if 'Wavelength(nm)' not in tabela.columns:
+        raise ValueError("A tabela de espectros de ação precisa da coluna 'Wavelength(nm)'.")
+    return tabela.set_index('Wavelength(nm)').sort_index()
+
+
+def montar_matriz_pesos(wl: np.ndarray, acao: pd.DataFrame = None, faixas: dict = None) -> tuple:
+    """
+    Monta a matriz de pesos W (comprimentos de onda x integrais) para que todas as integrais de todos os espectros
+    saiam de um único produto matricial: integrais = espectros @ W. Cada coluna é um espectro de ação reamostrado para
+    'wl' (zero fora da faixa da tabela) ou o indicador de uma faixa, já multiplicado pela largura de cada intervalo.
+
+    Returns:
+        tuple: (W como np.ndarray, lista com o nome de cada coluna).
+    """
+    wl = np.asarray(wl, dtype=float)
+    acao = carregar_espectros_acao() if acao is None else acao
+    faixas = FAIXAS if faixas is None else faixas
+    delta = np.gradient(wl) if len(wl) > 1 else np.ones(1)
+    colunas, nomes = [], []
+    for nome in acao.columns:
+        colunas.append(np.interp(wl, acao.index.to_numpy(dtype=float), acao[nome].to_numpy(dtype=float),
+                                 left=0.0, right=0.0))
+        nomes.append(nome)
+    for nome, (inicio, fim) in faixas.items():
+        colunas.append(((wl >= inicio) & (wl < fim)).astype(float))
+        nomes.append(nome)
+    return np.column_stack(colunas) * delta[:, None], nomes
+
+
+def calcular_metricas(wl: np.ndarray, espectros: np.ndarray, unidade: str = 'umol', acao: pd.DataFrame = None,
+                      faixas: dict = None) -> pd.DataFrame:
+    """
+    Calcula as métricas fotobiológicas de todos os espectros de uma vez (um produto matricial para todas as integrais).
+
+    Métricas:
+        - integrais por faixa (PFD, PPFD, PFD-UV, PFD-B, PFD-G, PFD-R, PFD-FR);
+        - YPF: fluxo de fótons ponderado pela eficiência quântica relativa de McCree (µmol m⁻² s⁻¹);
+        - PSS: estado fotoestacionário do fitocromo, Σφ·σPr / Σφ·(σPr + σPfr), calculado só quando a tabela de ação
+          traz as seções de choque de fotoconversão (colunas COLUNAS_SIGMA, Sager et al., 1988);
+        - PSS_aprox: a mesma razão com as absorbâncias relativas Pr/Pfr e a do Pfr escalada por ESCALA_SIGMA_PFR
+          (exata apenas em 660 nm; aproximação, não o PSS de Sager);
+        - R:FR (655–665 / 725–735 nm) e B:R (PFD-B / PFD-R);
+        - uma integral ponderada por coluna da tabela de ação (ex: 'Cryptochrome'), em µmol m⁻² s⁻¹ relativos.
+
+    Args:
+        wl (np.ndarray): Comprimentos de onda (nm).
+        espectros (np.ndarray): Um espectro ou matriz (espectros x wl). Valores ausentes (NaN) contam como zero.
+        unidade (str, opcional): 'umol' para fluxo de fótons (uMOL_) ou 'energia' para mW m⁻² nm⁻¹ (ESPD_).
+            Padrão é 'umol'.
+        acao (pd.DataFrame, opcional): Tabela de espectros de ação. Padrão é a tabela de CAMINHO_ESPECTROS_ACAO.
+        faixas (dict, opcional): Faixas integradas. Padrão é FAIXAS.
+
+    Returns:
+        pd.DataFrame: Uma linha por espectro e uma coluna por métrica.
+
+    Exemplo:
+        wl, matriz, validos = fn.empilhar_espectros(arquivos_umol)
+        metricas = calcular_metricas(wl, matriz)
+    """
+    if unidade not in ('umol', 'energia'):
+        raise ValueError(f"Unidade desconhecida: {unidade}. Use 'umol' ou 'energia'.")
+    espectros = np.atleast_2d(np.nan_to_num(np.asarray(espectros, dtype=float)))
+    if unidade == 'energia':
+        espectros = converter_para_fotons(wl, espectros)
+    pesos, nomes = montar_matriz_pesos(wl, acao, faixas)
+    integrais = pd.DataFrame(espectros @ pesos, columns=nomes)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if 'McCree' in integrais:
+            integrais['YPF'] = integrais.pop('McCree')
+        if set(COLUNAS_SIGMA) <= set(integrais.columns):
+            sigma_r, sigma_fr = (integrais[c].to_numpy() for c in COLUNAS_SIGMA)
+            integrais['PSS'] = sigma_r / (sigma_r + sigma_fr)
+        if {'Phytochrome Pr', 'Phytochrome Pfr'} <= set(integrais.columns):
+            absorcao_r = integrais['Phytochrome Pr'].to_numpy()
+            absorcao_fr = ESCALA_SIGMA_PFR * integrais['Phytochrome Pfr'].to_numpy()
+            integrais['PSS_aprox'] = absorcao_r / (absorcao_r + absorcao_fr)
+        if {'R660', 'FR730'} <= set(integrais.columns):
+            integrais['R:FR'] = integrais['R660'].to_numpy() / integrais['FR730'].to_numpy()
+        if {'PFD-B', 'PFD-R'} <= set(integrais.columns):
+            integrais['B:R'] = integrais['PFD-B'].to_numpy() / integrais['PFD-R'].to_numpy()
+    return integrais.replace([np.inf, -np.inf], np.nan)
+
+
+def metricas_por_ponto(pasta: str, salvar_csv: bool = False, acao: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calcula as métricas fotobiológicas de cada ponto de uma pasta de tratamento a partir do bloco espectral dos
+    arquivos ESPD_. O resultado tem o mesmo formato de extrair_coordenadas_e_valores_espd (PPFD e PFD do cabeçalho,
+    coordenadas de coordenadas.csv) acrescido das colunas de calcular_metricas, e pode ser passado diretamente
+    para as funções de plotagem.
+
+    Args:
+        pasta (str): Pasta com os arquivos ESPD_ de um tratamento.
+        salvar_csv (bool, opcional): Se True, salva 'metricas_fotobiologicas.csv' na pasta (ao lado do
+            pacote, se a pasta estiver empacotada). Padrão é False.
+        acao (pd.DataFrame, opcional): Tabela de espectros de ação. Padrão é a tabela de CAMINHO_ESPECTROS_ACAO.
+
+    Exemplo:
+        df = metricas_por_ponto('Caminho/para/0T')
+        fn.plotar_surface_ppfd(df, variavel='YPF')
+    """
+    try:
+        colecao = fn.ColecaoMedicoes.de_pasta(pasta, espectros=True)
+        df = colecao.para_dataframe()
+        if len(colecao):
+            metricas = calcular_metricas(colecao.wl, colecao.espectros, unidade='energia', acao=acao)
+            # PPFD e PFD do cabeçalho são mantidos; as integrais recalculadas não os substituem
+            metricas = metricas.drop(columns=[c for c in metricas.columns if c in df.columns])
+            df = pd.concat([df, metricas], axis=1)
+        df = fn.mesclar_coordenadas(df, pasta)
+        if salvar_csv:
+            pacote, _ = fn.localizar_pacote(pasta)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta, 'metricas_fotobiologicas.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+            print(f'Métricas fotobiológicas salvas em: {caminho_csv}')
+        return df
+    except Exception as e:
+        print(f'Erro ao calcular métricas fotobiológicas: {e}')
+        raise
+
+
+def metricas_campanha(pasta_principal: str, salvar_csv: bool = True, acao: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calcula as métricas fotobiológicas de todos os arquivos ESPD_ de todas as subpastas de uma campanha.
+    Os espectros são lidos para uma única ColecaoMedicoes e ponderados em uma só chamada de calcular_metricas.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        salvar_csv (bool, opcional): Se True, salva 'metricas_fotobiologicas.csv' na pasta principal
+            (ao lado do pacote, se a campanha estiver empacotada). Padrão é True.
+        acao (pd.DataFrame, opcional): Tabela de espectros de ação. Padrão é a tabela de CAMINHO_ESPECTROS_ACAO.
+
+    Returns:
+        pd.DataFrame: Uma linha por medição, com 'pasta', 'ID', posição na grade, PPFD/PFD do cabeçalho e as métricas.
+    """
+    try:
+        colecao = fn.ColecaoMedicoes()
+        pastas = []
+        for subpasta in sorted(fn.listar_pasta(pasta_principal)):
+            caminho_sub = os.path.join(pasta_principal, subpasta)
+            if not fn.eh_pasta(caminho_sub):
+                continue
+            antes = len(colecao)
+            fn.ColecaoMedicoes.de_pasta(caminho_sub, espectros=True, colecao=colecao)
+            pastas.extend([subpasta] * (len(colecao) - antes))
+        df = colecao.para_dataframe()
+        df.insert(0, 'pasta', pastas)
+        if len(colecao):
+            metricas = calcular_metricas(colecao.wl, colecao.espectros, unidade='energia', acao=acao)
+            metricas = metricas.drop(columns=[c for c in metricas.columns if c in df.columns])
+            df = pd.concat([df, metricas], axis=1)
+        if salvar_csv:
+            # Pacotes são somente leitura: a tabela fica ao lado do pacote
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta_principal,
+                                       'metricas_fotobiologicas.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+            print(f'Métricas fotobiológicas de {len(df)} medições salvas em: {caminho_csv}')
+        return df
+    except Exception as e:
+        print(f'Erro ao calcular métricas fotobiológicas da campanha: {e}')
+        raise
@@ -0,0 +1,319 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import functions as fn
+import comparacao_campanhas as cmp
+
+
+def series_dimerizacao(nomes_legenda: dict = None) -> dict:
+    """
+    Agrupa as subpastas de tratamento por combinação de cor, com o nível de dimerização (%) de cada uma, a partir dos
+    nomes de legenda ('0A': 'B15%', '100A': 'B100%' → série 'B' com {'0A': 15, '100A': 100}).
+
+    Args:
+        nomes_legenda (dict, opcional): Mapeamento subpasta → legenda. Padrão é fn.NOMES_LEGENDA.
+
+    Returns:
+        dict: {série: {subpasta: nível em %}}, com as subpastas em ordem crescente de nível.
+    """
+    series = {}
+    for pasta, legenda in (nomes_legenda or fn.NOMES_LEGENDA).items():
+        match = re.match(r'^(.*?)(\d+(?:[.,]\d+)?)%$', legenda)
+        if match:
+            series.setdefault(match.group(1), {})[pasta] = float(match.group(2).replace(',', '.'))
+    return {serie: dict(sorted(niveis.items(), key=lambda item: item[1])) for serie, niveis in series.items()}
+
+
+def _matriz_projeto(niveis, grau: int, intercepto: bool) -> np.ndarray:
+    """Matriz de Vandermonde (níveis x parâmetros) com o nível em fração (100 % = 1) para manter o sistema bem condicionado."""
+    d = np.atleast_1d(np.asarray(niveis, dtype=float)) / 100.0
+    return np.column_stack([d ** j for j in range(0 if intercepto else 1, grau + 1)])
+
+
+def _resolver(niveis: np.ndarray, medidos: np.ndarray, grau: int, intercepto: bool) -> tuple:
+    """
+    Ajusta todos os pontos e comprimentos de onda em um único np.linalg.lstsq: a matriz de projeto é compartilhada e
+    cada (ponto, coluna) do cubo é um lado direito.
+
+    Returns:
+        tuple: (coeficientes (parâmetros x pontos x colunas), resíduo RMS de cada ponto e coluna ou None se o
+            ajuste for exato).
+    """
+    k, n, m = medidos.shape
+    projeto = _matriz_projeto(niveis, grau, intercepto)
+    if k < projeto.shape[1]:
+        raise ValueError(f'O modelo de grau {grau} precisa de pelo menos {projeto.shape[1]} níveis medidos; '
+                         f'há {k}.')
+    coeficientes = np.linalg.lstsq(projeto, medidos.reshape(k, n * m), rcond=None)[0]
+    coeficientes = coeficientes.reshape(-1, n, m)
+    residuo = None
+    if k > projeto.shape[1]:
+        ajustados = np.tensordot(projeto, coeficientes, axes=1)
+        residuo = np.sqrt(np.mean((ajustados - medidos) ** 2, axis=0))
+    return coeficientes, residuo
+
+
+def carregar_cubo(pastas: list) -> dict:
+    """
+    Lê várias pastas de tratamento e empilha as medições das posições (X, Y) presentes em todas elas em um cubo
+    (pastas x pontos x colunas), com os comprimentos de onda seguidos de PPFD e PFD do cabeçalho.
+    As posições são alinhadas por chave inteira com busca binária; posições remedidas na mesma pasta entram pela média
+    das leituras (comparacao_campanhas.medias_por_posicao), independente da ordem em que os arquivos foram lidos.
+
+    Returns:
+        dict: {'wl', 'X', 'Y' (posição na grade de cada ponto), 'medidos' (float32), 'n_descartados',
+            'n_repetidas' (leituras extras de posições remedidas, somadas nas pastas)}.
+    """
+    medias, wl = [], None
+    for pasta in pastas:
+        colecao = fn.ColecaoMedicoes.de_pasta(pasta, espectros=True)
+        if not len(colecao) or colecao.espectros is None:
+            raise ValueError(f'Nenhum arquivo ESPD_ em {pasta}.')
+        wl = colecao.wl if wl is None else wl
+        medias.append(cmp.medias_por_posicao(colecao, np.zeros(len(colecao), dtype=int), {0: 0}, wl))
+
+    comuns = medias[0]['chaves']
+    for media in medias[1:]:
+        comuns = np.intersect1d(comuns, media['chaves'], assume_unique=True)
+    if not len(comuns):
+        raise ValueError('Nenhuma posição (X, Y) foi medida em todas as pastas.')
+
+    medidos = np.empty((len(pastas), len(comuns), len(wl) + 2), dtype=np.float32)
+    for i, media in enumerate(medias):
+        indices = np.searchsorted(media['chaves'], comuns)
+        medidos[i, :, :len(wl)] = media['espectros'][indices]
+        medidos[i, :, -2] = media['PPFD'][indices]
+        medidos[i, :, -1] = media['PFD'][indices]
+    # Comprimentos de onda sem leitura (NaN) entram como zero para não contaminar o sistema inteiro
+    np.nan_to_num(medidos, copy=False)
+
+    descartados = sum(len(m['chaves']) for m in medias) - len(pastas) * len(comuns)
+    if descartados:
+        print(f'{descartados} posição(ões) sem medição em todas as pastas ficaram de fora.')
+    repetidas = int(sum((m['n_leituras'] - 1).sum() for m in medias))
+    if repetidas:
+        print(f'{repetidas} leitura(s) de posições remedidas entraram pela média com as demais leituras da posição.')
+    return {'wl': wl, 'X': (comuns // 10) % 10, 'Y': comuns % 10, 'medidos': medidos, 'n_descartados': descartados,
+            'n_repetidas': repetidas}
+
+
+def ajustar_modelo(pastas_niveis: dict, grau: int = 1, intercepto: bool = True, serie: str = None) -> dict:
+    """
+    Ajusta, para cada ponto da grade e cada comprimento de onda, a resposta ao nível de dimerização
+    E(ponto, λ, d) = c0 + c1·d + ... + cg·d^g a partir das pastas medidas em níveis diferentes. PPFD e PFD do
+    cabeçalho entram como duas colunas a mais do cubo espectral e são ajustados no mesmo sistema.
+
+    Com dois níveis (ex: 0A e 100A) e grau 1 o ajuste é a interpolação linear exata entre eles; com mais níveis é o
+    ajuste por mínimos quadrados. Com intercepto=False o modelo passa pela origem (E proporcional a d).
+    Somente as posições (X, Y) medidas em todos os níveis entram no modelo; posições remedidas entram pela média.
+
+    Args:
+        pastas_niveis (dict): {caminho da pasta de tratamento: nível em %}.
+        grau (int, opcional): Grau do polinômio em d. Padrão é 1.
+        intercepto (bool, opcional): Se False, omite o termo constante. Padrão é True.
+        serie (str, opcional): Nome da série para legendas (ex: 'B').
+
+    Returns:
+        dict: {'serie', 'pastas', 'niveis', 'grau', 'intercepto', 'wl', 'X', 'Y', 'medidos' (níveis x pontos x
+            colunas, float32), 'coeficientes', 'residuo_rms', 'n_descartados'}. As colunas do cubo são os
+            comprimentos de onda seguidos de PPFD e PFD.
+
+    Exemplo:
+        modelo = ajustar_modelo({'Caminho/para/0A': 15, 'Caminho/para/100A': 100}, serie='B')
+    """
+    try:
+        if len(pastas_niveis) < 2:
+            raise ValueError('São necessárias pelo menos duas pastas com níveis de dimerização diferentes.')
+        pastas = list(pastas_niveis)
+        niveis = np.array([pastas_niveis[p] for p in pastas], dtype=float)
+        if len(np.unique(niveis)) < 2:
+            raise ValueError('As pastas precisam ter pelo menos dois níveis de dimerização diferentes.')
+
+        cubo = carregar_cubo(pastas)
+        coeficientes, residuo = _resolver(niveis, cubo['medidos'].astype(np.float64), grau, intercepto)
+        return {
+            'serie': serie or ' / '.join(os.path.basename(os.path.normpath(p)) for p in pastas),
+            'pastas': pastas, 'niveis': niveis, 'grau': grau, 'intercepto': intercepto, 'wl': cubo['wl'],
+            'X': cubo['X'], 'Y': cubo['Y'],
+            'medidos': cubo['medidos'], 'coeficientes': coeficientes, 'residuo_rms': residuo,
+            'n_descartados': cubo['n_descartados'],
+        }
+    except Exception as e:
+        print(f'Erro ao ajustar o modelo de dimerização: {e}')
+        raise
+
+
+def prever_cubo(modelo: dict, niveis) -> np.ndarray:
+    """
+    Avalia o modelo em um ou mais níveis de uma só vez (um produto matricial).
+
+    Returns:
+        np.ndarray: (níveis x pontos x colunas) com os espectros seguidos de PPFD e PFD; valores negativos são zerados.
+    """
+    projeto = _matriz_projeto(niveis, modelo['grau'], modelo['intercepto'])
+    return np.clip(np.tensordot(projeto, modelo['coeficientes'], axes=1), 0, None)
+
+
+def prever_nivel(modelo: dict, nivel: float) -> tuple:
+    """
+    Prevê a superfície e os espectros de todos os pontos da grade em um nível de dimerização qualquer.
+    Níveis fora da faixa medida são extrapolados, com aviso.
+
+    Args:
+        modelo (dict): Resultado de ajustar_modelo.
+        nivel (float): Nível de dimerização (%).
+
+    Returns:
+        tuple: (DataFrame no formato de extrair_coordenadas_e_valores_espd, com PPFD e PFD previstos e as
+            coordenadas de coordenadas.csv; matriz pontos x comprimentos de onda com os espectros previstos).
+
+    Exemplo:
+        df, espectros = prever_nivel(modelo, 50)
+        fn.plotar_surface_ppfd(df)
+    """
+    niveis = modelo['niveis']
+    if nivel < niveis.min() or nivel > niveis.max():
+        print(f'Aviso: {nivel:g}% está fora da faixa medida ({niveis.min():g}% a {niveis.max():g}%); '
+              f'o valor é extrapolado.')
+    cubo = prever_cubo(modelo, nivel)[0]
+    df = pd.DataFrame({
+        'arquivo': None,
+        'ID': f"{modelo['serie']}{nivel:g}%",
+        'linha': modelo['X'].astype(np.int64),
+        'coluna': modelo['Y'].astype(np.int64),
+        'PFD': cubo[:, -1],
+        'PPFD': cubo[:, -2],
+        'nivel': nivel,
+    })
+    return fn.mesclar_coordenadas(df, modelo['pastas'][0]), cubo[:, :-2]
+
+
+def validar_modelo(modelo: dict) -> tuple:
+    """
+    Validação deixando um nível de fora: para cada nível medido, ajusta o mesmo modelo com os demais níveis e compara
+    a previsão com a medição. Se os níveis restantes não bastam para o modelo (ex: só 0 % e 100 % com grau 1), a
+    validação usa o modelo proporcional (E = c1·d), que testa se a dimerização escala o espectro sem mudar a forma.
+
+    Returns:
+        tuple: (DataFrame por ponto e nível validado, DataFrame resumo por nível validado).
+    """
+    niveis, medidos = modelo['niveis'], modelo['medidos'].astype(np.float64)
+    linhas, resumo = [], []
+    for i, nivel in enumerate(niveis):
+        restantes = np.arange(len(niveis)) != i
+        grau, intercepto = modelo['grau'], modelo['intercepto']
+        if restantes.sum() < _matriz_projeto(niveis[:1], grau, intercepto).shape[1]:
+            grau, intercepto = 1, False
+        coeficientes, _ = _resolver(niveis[restantes], medidos[restantes], grau, intercepto)
+        previsto = np.clip(np.tensordot(_matriz_projeto(nivel, grau, intercepto), coeficientes, axes=1)[0], 0, None)
+        medido = medidos[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            erro_ppfd = 100 * (previsto[:, -2] - medido[:, -2]) / medido[:, -2]
+            erro_espectral = 100 * (np.linalg.norm(previsto[:, :-2] - medido[:, :-2], axis=1)
+                                    / np.linalg.norm(medido[:, :-2], axis=1))
+        descricao = 'proporcional' if not intercepto and grau == 1 else f'grau {grau}'
+        linhas.append(pd.DataFrame({
+            'serie': modelo['serie'], 'nivel': nivel, 'modelo_validacao': descricao,
+            'linha': modelo['X'].astype(np.int64), 'coluna': modelo['Y'].astype(np.int64),
+            'PPFD_medido': medido[:, -2], 'PPFD_previsto': previsto[:, -2],
+            'erro_PPFD_%': erro_ppfd, 'erro_espectral_%': erro_espectral,
+        }))
+        resumo.append({
+            'serie': modelo['serie'], 'nivel': nivel, 'modelo_validacao': descricao, 'n_pontos': len(medido),
+            'erro_PPFD_medio_%': np.nanmean(np.abs(erro_ppfd)),
+            'erro_PPFD_max_%': np.nanmax(np.abs(erro_ppfd)),
+            'rmse_PPFD': np.sqrt(np.nanmean((previsto[:, -2] - medido[:, -2]) ** 2)),
+            'erro_espectral_medio_%': np.nanmean(erro_espectral),
+        })
+    return pd.concat(linhas, ignore_index=True), pd.DataFrame(resumo)
+
+
+def ajustar_campanha(pasta_principal: str, grau: int = 1, intercepto: bool = True, validar: bool = True,
+                     salvar_csv: bool = True) -> dict:
+    """
+    Ajusta um modelo de dimerização para cada série de tratamentos da campanha com pelo menos dois níveis presentes
+    (0A/100A, 0B/100B, 0V/100V e 0T/99100, conforme series_dimerizacao).
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        grau (int, opcional): Grau do polinômio em d. Padrão é 1.
+        intercepto (bool, opcional): Se False, o modelo passa pela origem. Padrão é True.
+        validar (bool, opcional): Se True, executa validar_modelo em cada série. Padrão é True.
+        salvar_csv (bool, opcional): Se True (e validar=True), salva 'validacao_dimerizacao.csv' e
+            'validacao_dimerizacao_resumo.csv' na pasta principal (ao lado do pacote, se a campanha estiver
+            empacotada). Padrão é True.
+
+    Returns:
+        dict: {'modelos': {série: modelo}, 'validacao': DataFrame por ponto, 'resumo': DataFrame por série e nível}.
+
+    Exemplo:
+        resultado = ajustar_campanha('Caminho/para/pasta_principal')
+        df, espectros = prever_nivel(resultado['modelos']['B'], 50)
+    """
+    try:
+        modelos = {}
+        for serie, niveis in series_dimerizacao().items():
+            presentes = {os.path.join(pasta_principal, p): nivel for p, nivel in niveis.items()
+                         if fn.eh_pasta(os.path.join(pasta_principal, p))}
+            if len(set(presentes.values())) >= 2:
+                modelos[serie] = ajustar_modelo(presentes, grau, intercepto, serie)
+        if not modelos:
+            raise ValueError('Nenhuma série com pelo menos dois níveis de dimerização encontrada na pasta.')
+
+        validacao = resumo = pd.DataFrame()
+        if validar:
+            partes = [validar_modelo(modelo) for modelo in modelos.values()]
+            validacao = pd.concat([p[0] for p in partes], ignore_index=True)
+            resumo = pd.concat([p[1] for p in partes], ignore_index=True)
+            if salvar_csv:
+                # Pacotes são somente leitura: as tabelas ficam ao lado do pacote
+                pacote, _ = fn.localizar_pacote(pasta_principal)
+                pasta_saida = os.path.dirname(pacote) if pacote else pasta_principal
+                for nome, tabela in (('validacao_dimerizacao.csv', validacao),
+                                     ('validacao_dimerizacao_resumo.csv', resumo)):
+                    fn.gravar_atomico(os.path.join(pasta_saida, nome), lambda tmp: tabela.to_csv(tmp, index=False))
+                print(f'Validação do modelo de dimerização salva em: {pasta_saida}')
+            print(resumo.to_string(index=False))
+        return {'modelos': modelos, 'validacao': validacao, 'resumo': resumo}
+    except Exception as e:
+        print(f'Erro ao ajustar os modelos de dimerização da campanha: {e}')
+        raise
+
+
+def plotar_surface_prevista(modelo: dict, nivel: float, usar_ppfd: bool = True, interpolar: str = 'cubic') -> None:
+    """Plota a superfície interpolada de PPFD (ou PFD) prevista para um nível de dimerização."""
+    df, _ = prever_nivel(modelo, nivel)
+    fn.plotar_surface_ppfd(df, usar_ppfd=usar_ppfd, interpolar=interpolar)
+
+
+def plotar_espectros_previstos(modelo: dict, niveis: list) -> None:
+    """
+    Plota o espectro médio da grade previsto em cada nível pedido (linhas cheias) junto com o espectro médio
+    medido em cada nível da série (linhas tracejadas).
+    """
+    try:
+        wl = modelo['wl']
+        cor = 'rgb({},{},{})'.format(*fn.CORES_GRUPOS.get(os.path.basename(os.path.normpath(modelo['pastas'][-1])),
+                                                          (60, 60, 60)))
+        fig = go.Figure()
+        previstos = prever_cubo(modelo, niveis)[:, :, :-2].mean(axis=1)
+        for nivel, espectro in zip(np.atleast_1d(niveis), previstos):
+            fig.add_trace(go.Scatter(x=wl, y=espectro, mode='lines', line=dict(color=cor, width=2),
+                                     name=f"{modelo['serie']}{nivel:g}% (previsto)"))
+        for nivel, medido in zip(modelo['niveis'], modelo['medidos'][:, :, :-2].mean(axis=1)):
+            fig.add_trace(go.Scatter(x=wl, y=medido, mode='lines', line=dict(color='gray', width=1.5, dash='dash'),
+                                     name=f"{modelo['serie']}{nivel:g}% (medido)"))
+        fig.update_layout(
+            title=f"Espectro médio previsto por nível de dimerização ({modelo['serie']})",
+            xaxis_title='Comprimento de onda (nm)',
+            yaxis_title='Irradiância espectral (mW m⁻² nm⁻¹)',
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+            hovermode='x unified',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar espectros previstos: {e}')
+        raise
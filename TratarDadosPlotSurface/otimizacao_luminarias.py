@@ -0,0 +1,188 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy.optimize import lsq_linear
+import functions as fn
+import metricas_fotobiologicas as mf
+import modelo_dimerizacao as md
+
+# Canais disponíveis na sala: cada um é a pasta do tratamento medido com apenas aquele canal a 100 %
+CANAIS_PADRAO = ('100A', '100V', '100B', '99100')
+
+# Integrais usadas pela otimização (fótons, µmol m⁻² s⁻¹)
+FAIXAS_OTIMIZACAO = {nome: mf.FAIXAS[nome] for nome in ('PPFD', 'PFD', 'PFD-B', 'PFD-R')}
+
+
+def montar_base(pasta_principal: str, canais: tuple = CANAIS_PADRAO, resolucao: int = None) -> dict:
+    """
+    Monta a base de contribuições dos canais: o cubo espectral de cada pasta de canal (canais x pontos x comprimentos
+    de onda) e, em um único produto matricial, as integrais em fótons (PPFD, PFD, PFD-B, PFD-R) de cada canal em cada
+    ponto. A contribuição de um canal no ajuste s (fração de 0 a 1) é s vezes a medição a 100 %.
+
+    Com 'resolucao', as integrais também são interpoladas (linear, pesos de calcular_pesos_interpolacao) para uma grade
+    resolucao x resolucao sobre a bancada; como a interpolação linear é linear nos ajustes, otimizar na grade densa
+    equivale a otimizar a superfície interpolada.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        canais (tuple, opcional): Subpastas usadas como canais. Padrão é CANAIS_PADRAO.
+        resolucao (int, opcional): Lado da grade densa. Padrão é None (apenas os pontos medidos).
+
+    Returns:
+        dict: {'canais', 'wl', 'pontos' (DataFrame com posição e coordenadas de cada ponto), 'espectros' (canais x
+            pontos x wl), 'integrais' (pontos x canais x faixas), 'integrais_grade' (células x canais x faixas ou
+            None), 'faixas', 'pasta'}.
+    """
+    try:
+        pastas = [os.path.join(pasta_principal, c) for c in canais]
+        faltando = [c for c, p in zip(canais, pastas) if not fn.eh_pasta(p)]
+        if faltando:
+            raise ValueError(f"Pastas de canal não encontradas: {', '.join(faltando)}.")
+        cubo = md.carregar_cubo(pastas)
+        wl = cubo['wl']
+        espectros = cubo['medidos'][:, :, :len(wl)]
+
+        pesos, faixas = mf.montar_matriz_pesos(wl, acao=pd.DataFrame(), faixas=FAIXAS_OTIMIZACAO)
+        fotons = mf.converter_para_fotons(wl, espectros)
+        integrais = np.transpose(fotons @ pesos, (1, 0, 2))
+
+        pontos = pd.DataFrame({'linha': cubo['X'].astype(np.int64), 'coluna': cubo['Y'].astype(np.int64)})
+        pontos = fn.mesclar_coordenadas(pontos, pastas[0])
+
+        integrais_grade = None
+        if resolucao:
+            x, y = pontos['linha'].to_numpy(dtype=float), pontos['coluna'].to_numpy(dtype=float)
+            xi, yi = np.meshgrid(np.linspace(x.min(), x.max(), resolucao), np.linspace(y.min(), y.max(), resolucao))
+            pesos_grade = fn.calcular_pesos_interpolacao(x, y, xi, yi)
+            grade = fn.interpolar_com_pesos(pesos_grade, integrais.reshape(len(pontos), -1), metodo='linear')
+            grade = grade.reshape(-1, len(canais), len(faixas))
+            integrais_grade = grade[np.all(np.isfinite(grade), axis=(1, 2))]
+        return {'canais': list(canais), 'wl': wl, 'pontos': pontos, 'espectros': espectros, 'integrais': integrais,
+                'integrais_grade': integrais_grade, 'faixas': faixas, 'pasta': pastas[0]}
+    except Exception as e:
+        print(f'Erro ao montar a base de canais: {e}')
+        raise
+
+
+def otimizar_ajustes(base: dict, ppfd_alvo: float, razao_rb_alvo: float = None, limites: tuple = (0.0, 1.0),
+                     peso_media: float = 10.0, peso_razao: float = 10.0) -> dict:
+    """
+    Encontra os ajustes dos canais (frações de 0 a 1) que levam a PPFD média ao alvo, a razão R:B média ao alvo e
+    deixam a PPFD o mais uniforme possível sobre a bancada. O problema é um único mínimos quadrados com limites
+    (scipy.optimize.lsq_linear), com uma linha por ponto (desvio da PPFD do ponto em relação ao alvo, que mede a
+    uniformidade) e duas linhas de peso alto para a média de PPFD e para a razão R:B.
+
+    Args:
+        base (dict): Resultado de montar_base.
+        ppfd_alvo (float): PPFD média desejada (µmol m⁻² s⁻¹).
+        razao_rb_alvo (float, opcional): Razão PFD-R / PFD-B média desejada. Padrão é None (livre).
+        limites (tuple, opcional): Fração mínima e máxima de cada canal, ou arrays com um valor por canal.
+            Padrão é (0, 1).
+        peso_media (float, opcional): Peso da linha da PPFD média. Padrão é 10.
+        peso_razao (float, opcional): Peso da linha da razão R:B. Padrão é 10.
+
+    Returns:
+        dict: {'ajustes' (Series com o ajuste de cada canal em %), 'pontos' (DataFrame no formato da extração com PPFD,
+            PFD e R:B previstos), 'espectros' (pontos x wl, mW m⁻² nm⁻¹), 'resumo' (dict com média, uniformidade
+            mínimo/média, CV e R:B obtidos), 'tempo_s'}.
+
+    Exemplo:
+        base = montar_base('Caminho/para/pasta_principal', resolucao=50)
+        resultado = otimizar_ajustes(base, ppfd_alvo=300, razao_rb_alvo=2.0)
+    """
+    try:
+        inicio = time.perf_counter()
+        if ppfd_alvo <= 0:
+            raise ValueError('A PPFD alvo precisa ser positiva.')
+        faixas = base['faixas']
+        i_ppfd, i_b, i_r = faixas.index('PPFD'), faixas.index('PFD-B'), faixas.index('PFD-R')
+        integrais = base['integrais_grade'] if base['integrais_grade'] is not None else base['integrais']
+        n = len(integrais)
+
+        # Tudo normalizado pelo alvo para que as linhas tenham a mesma escala
+        linhas = [integrais[:, :, i_ppfd] / (ppfd_alvo * np.sqrt(n))]
+        alvos = [np.full(n, 1.0 / np.sqrt(n))]
+        linhas.append(peso_media * integrais[:, :, i_ppfd].mean(axis=0, keepdims=True) / ppfd_alvo)
+        alvos.append([peso_media])
+        if razao_rb_alvo is not None:
+            linha_razao = integrais[:, :, i_r].mean(axis=0) - razao_rb_alvo * integrais[:, :, i_b].mean(axis=0)
+            linhas.append(peso_razao * linha_razao[None, :] / ppfd_alvo)
+            alvos.append([0.0])
+        solucao = lsq_linear(np.vstack(linhas), np.concatenate(alvos), bounds=limites)
+        ajustes = solucao.x
+
+        medidos = np.einsum('ncf,c->nf', base['integrais'], ajustes)
+        ppfd = medidos[:, i_ppfd]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pontos = base['pontos'].copy()
+            pontos['ID'] = 'otimizado'
+            pontos['PPFD'] = ppfd
+            pontos['PFD'] = medidos[:, faixas.index('PFD')]
+            pontos['R:B'] = medidos[:, i_r] / medidos[:, i_b]
+            avaliados = np.einsum('ncf,c->nf', integrais, ajustes)
+            ppfd_avaliada = avaliados[:, i_ppfd]
+            resumo = {
+                'PPFD_media': ppfd_avaliada.mean(),
+                'uniformidade_min_media': ppfd_avaliada.min() / ppfd_avaliada.mean(),
+                'cv_%': 100 * ppfd_avaliada.std() / ppfd_avaliada.mean(),
+                'R:B_medio': avaliados[:, i_r].mean() / avaliados[:, i_b].mean(),
+                'n_pontos_avaliados': n,
+            }
+        tempo = time.perf_counter() - inicio
+        ajustes_pct = pd.Series(100 * ajustes, index=base['canais'], name='ajuste_%')
+        print('Ajustes recomendados (%): ' + ', '.join(f"{fn.NOMES_LEGENDA.get(c, c)} = {v:.1f}"
+                                                       for c, v in ajustes_pct.items()))
+        print(f"PPFD média {resumo['PPFD_media']:.1f}, mínimo/média {resumo['uniformidade_min_media']:.3f}, "
+              f"R:B {resumo['R:B_medio']:.2f} ({tempo:.3f} s)")
+        return {
+            'ajustes': ajustes_pct,
+            'pontos': pontos,
+            'espectros': np.tensordot(ajustes, base['espectros'], axes=1),
+            'resumo': resumo,
+            'tempo_s': tempo,
+        }
+    except Exception as e:
+        print(f'Erro ao otimizar os ajustes das luminárias: {e}')
+        raise
+
+
+def otimizar_campanha(pasta_principal: str, ppfd_alvo: float, razao_rb_alvo: float = None,
+                      canais: tuple = CANAIS_PADRAO, resolucao: int = 50, salvar_csv: bool = True) -> dict:
+    """
+    Monta a base de canais de uma campanha e otimiza os ajustes. Com salvar_csv, grava 'otimizacao_ajustes.csv'
+    (ajuste de cada canal e resumo) e 'otimizacao_pontos.csv' (PPFD prevista em cada ponto) na pasta principal, ou
+    ao lado do pacote se a campanha estiver empacotada.
+
+    Exemplo:
+        resultado = otimizar_campanha('Caminho/para/pasta_principal', ppfd_alvo=300, razao_rb_alvo=2.0)
+        plotar_surface_otimizada(resultado)
+    """
+    try:
+        base = montar_base(pasta_principal, canais, resolucao)
+        resultado = otimizar_ajustes(base, ppfd_alvo, razao_rb_alvo)
+        if salvar_csv:
+            tabela = resultado['ajustes'].rename_axis('canal').reset_index()
+            tabela['legenda'] = [fn.NOMES_LEGENDA.get(c, c) for c in tabela['canal']]
+            for chave, valor in resultado['resumo'].items():
+                tabela[chave] = valor
+            tabela['PPFD_alvo'] = ppfd_alvo
+            tabela['R:B_alvo'] = razao_rb_alvo
+            pontos = resultado['pontos']
+            # Pacotes são somente leitura: as tabelas ficam ao lado do pacote
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            pasta_saida = os.path.dirname(pacote) if pacote else pasta_principal
+            fn.gravar_atomico(os.path.join(pasta_saida, 'otimizacao_ajustes.csv'),
+                              lambda tmp: tabela.to_csv(tmp, index=False))
+            fn.gravar_atomico(os.path.join(pasta_saida, 'otimizacao_pontos.csv'),
+                              lambda tmp: pontos.to_csv(tmp, index=False))
+            print(f'Ajustes otimizados salvos em: {pasta_saida}')
+        return resultado
+    except Exception as e:
+        print(f'Erro ao otimizar a campanha: {e}')
+        raise
+
+
+def plotar_surface_otimizada(resultado: dict, usar_ppfd: bool = True, interpolar: str = 'cubic') -> None:
+    """Plota a superfície prevista com os ajustes otimizados pelo mesmo caminho das superfícies medidas."""
+    fn.plotar_surface_ppfd(resultado['pontos'], usar_ppfd=usar_ppfd, interpolar=interpolar)
@@ -0,0 +1,239 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy.linalg import cho_solve, solve_triangular
+from scipy.optimize import minimize
+from scipy.spatial import cKDTree
+import functions as fn
+
+
+def _kernel(a: np.ndarray, b: np.ndarray, comprimento: float, variancia: float) -> np.ndarray:
+    """Kernel exponencial quadrático (RBF) entre dois conjuntos de pontos (n x 2 e m x 2)."""
+    d2 = np.sum(a ** 2, axis=1)[:, None] + np.sum(b ** 2, axis=1)[None, :] - 2 * a @ b.T
+    return variancia * np.exp(-0.5 * np.maximum(d2, 0) / comprimento ** 2)
+
+
+def ajustar_processo_gaussiano(coordenadas: np.ndarray, valores: np.ndarray, ruido_minimo: float = 1e-4) -> dict:
+    """
+    Ajusta um processo gaussiano (krigagem simples com média constante e kernel RBF) aos pontos medidos.
+    As coordenadas são normalizadas pela extensão da bancada e os valores pela média e desvio; o comprimento de
+    correlação, a variância do sinal e o ruído são estimados pela máxima verossimilhança marginal.
+
+    Args:
+        coordenadas (np.ndarray): Posições medidas (n x 2), nas unidades de coordenadas.csv.
+        valores (np.ndarray): Valor medido em cada posição (ex: PPFD).
+        ruido_minimo (float, opcional): Piso da variância do ruído (normalizada), para estabilidade. Padrão é 1e-4.
+
+    Returns:
+        dict: Parâmetros, normalização e fatoração de Cholesky usados por prever_processo_gaussiano.
+    """
+    coordenadas = np.asarray(coordenadas, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+    validos = np.all(np.isfinite(coordenadas), axis=1) & np.isfinite(valores)
+    coordenadas, valores = coordenadas[validos], valores[validos]
+    if len(valores) < 3:
+        raise ValueError('São necessários pelo menos 3 pontos medidos para ajustar o modelo.')
+    centro = coordenadas.mean(axis=0)
+    escala = max(np.ptp(coordenadas, axis=0).max(), 1e-12)
+    media = valores.mean()
+    desvio = valores.std() or 1.0
+    x = (coordenadas - centro) / escala
+    y = (valores - media) / desvio
+
+    def neg_log_verossimilhanca(theta):
+        comprimento, variancia, ruido = np.exp(theta)
+        K = _kernel(x, x, comprimento, variancia) + (ruido + ruido_minimo) * np.eye(len(x))
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            return 1e10
+        alfa = cho_solve((L, True), y)
+        return 0.5 * y @ alfa + np.log(np.diag(L)).sum() + 0.5 * len(x) * np.log(2 * np.pi)
+
+    # O comprimento de correlação não pode ser menor que metade do espaçamento típico entre os pontos medidos;
+    # abaixo disso o modelo trata toda a variação como ruído e não interpola nada. Pelo mesmo motivo o ruído fica
+    # limitado a 10 % da variância dos dados (a repetibilidade do LI-180 é da ordem de 1 %)
+    distancias = cKDTree(x).query(x, k=2)[0][:, 1]
+    comprimento_minimo = max(0.5 * np.median(distancias[distancias > 0]) if np.any(distancias > 0) else 0.05, 0.05)
+    limites = [(np.log(comprimento_minimo), np.log(3.0)), (np.log(1e-2), np.log(1e2)), (np.log(1e-6), np.log(0.1))]
+    melhor = None
+    for comprimento_inicial in (comprimento_minimo, 0.3, 1.0):
+        resultado = minimize(neg_log_verossimilhanca, np.log([comprimento_inicial, 1.0, 1e-2]),
+                             method='L-BFGS-B', bounds=limites)
+        if melhor is None or resultado.fun < melhor.fun:
+            melhor = resultado
+    comprimento, variancia, ruido = np.exp(melhor.x)
+    ruido += ruido_minimo
+    K = _kernel(x, x, comprimento, variancia) + ruido * np.eye(len(x))
+    L = np.linalg.cholesky(K)
+    return {'x': x, 'L': L, 'alfa': cho_solve((L, True), y), 'comprimento': comprimento, 'variancia': variancia,
+            'ruido': ruido, 'centro': centro, 'escala': escala, 'media': media, 'desvio': desvio}
+
+
+def prever_processo_gaussiano(gp: dict, coordenadas: np.ndarray) -> tuple:
+    """
+    Média e desvio padrão preditivos do processo gaussiano em todas as posições de uma vez.
+
+    Returns:
+        tuple: (média, desvio padrão), nas unidades dos valores medidos.
+    """
+    alvo = (np.asarray(coordenadas, dtype=float) - gp['centro']) / gp['escala']
+    k_alvo = _kernel(gp['x'], alvo, gp['comprimento'], gp['variancia'])
+    v = solve_triangular(gp['L'], k_alvo, lower=True)
+    media = gp['media'] + gp['desvio'] * (k_alvo.T @ gp['alfa'])
+    variancia = np.maximum(gp['variancia'] - np.sum(v ** 2, axis=0), 0)
+    return media, gp['desvio'] * np.sqrt(variancia)
+
+
+def planejar_amostragem(pasta: str, n_sugestoes: int = 5, variavel: str = 'PPFD', resolucao: int = 40,
+                        tolerancia: float = 0.05, max_pontos_extra: int = 30, salvar_csv: bool = False) -> dict:
+    """
+    Sugere as próximas posições a medir em uma pasta de tratamento. Um processo gaussiano é ajustado aos pontos já
+    medidos e a incerteza preditiva é calculada sobre a grade de interpolação da bancada (limites de coordenadas.csv).
+    As sugestões são escolhidas uma a uma pela maior redução da variância integrada sobre a grade; como a variância
+    do processo gaussiano não depende dos valores ainda não medidos, a covariância da grade é atualizada a cada
+    escolha (atualização de posto 1) e a incerteza depois das medições sugeridas é conhecida antes de ir à sala.
+    Cada sugestão fica a pelo menos metade do espaçamento típico dos pontos medidos das anteriores.
+
+    A superfície é considerada precisa o bastante quando o desvio preditivo médio sobre a grade, relativo ao valor
+    médio previsto, fica abaixo de 'tolerancia'.
+
+    Args:
+        pasta (str): Pasta de tratamento com os arquivos ESPD_ já medidos.
+        n_sugestoes (int, opcional): Quantas posições sugerir. Padrão é 5.
+        variavel (str, opcional): Coluna modelada ('PPFD' ou 'PFD'). Padrão é 'PPFD'.
+        resolucao (int, opcional): Lado da grade de candidatos e de avaliação. Padrão é 40.
+        tolerancia (float, opcional): Incerteza relativa média aceitável. Padrão é 0.05 (5 %).
+        max_pontos_extra (int, opcional): Limite de pontos simulados para estimar quantos faltam. Padrão é 30.
+        salvar_csv (bool, opcional): Se True, salva 'sugestoes_amostragem.csv' na pasta. Padrão é False.
+
+    Returns:
+        dict: {'sugestoes' (DataFrame com 'ordem', 'linha', 'coluna' (coordenadas reais), 'perto_de' (posição da grade
+            mais próxima), 'desvio_previsto' e 'incerteza_apos'), 'medidos', 'grade' (xi, yi, média, desvio),
+            'incerteza_relativa', 'incerteza_apos', 'parar', 'pontos_para_tolerancia', 'gp'}.
+
+    Exemplo:
+        plano = planejar_amostragem('Caminho/para/0A', n_sugestoes=3)
+        print(plano['sugestoes'])
+    """
+    try:
+        medidos = fn.mesclar_coordenadas(fn.ColecaoMedicoes.de_pasta(pasta, espectros=False).para_dataframe(), pasta)
+        if 'X' not in medidos.columns:
+            medidos['X'], medidos['Y'] = medidos['linha'], medidos['coluna']
+        coordenadas = medidos[['linha', 'coluna']].to_numpy(dtype=float)
+        gp = ajustar_processo_gaussiano(coordenadas, medidos[variavel].to_numpy(dtype=float))
+
+        # Limites da bancada: todos os pontos de coordenadas.csv, não apenas os já medidos
+        caminho_coordenadas = os.path.abspath(os.path.join(pasta, '..', 'coordenadas.csv'))
+        if fn.existe(caminho_coordenadas):
+            df_coord = fn.ler_csv(caminho_coordenadas)
+            limites = df_coord[['linha', 'coluna']].to_numpy(dtype=float)
+        else:
+            df_coord = medidos.rename(columns={'X': 'x', 'Y': 'y'})
+            limites = coordenadas
+        xi, yi = np.meshgrid(np.linspace(limites[:, 0].min(), limites[:, 0].max(), resolucao),
+                             np.linspace(limites[:, 1].min(), limites[:, 1].max(), resolucao))
+        grade = np.column_stack([xi.ravel(), yi.ravel()])
+        media, desvio = prever_processo_gaussiano(gp, grade)
+        referencia = max(np.mean(np.abs(media)), 1e-12)
+        incerteza = desvio.mean() / referencia
+
+        # Covariância posterior da grade (normalizada), atualizada a cada ponto escolhido
+        alvo = (grade - gp['centro']) / gp['escala']
+        v = solve_triangular(gp['L'], _kernel(gp['x'], alvo, gp['comprimento'], gp['variancia']), lower=True)
+        covariancia = _kernel(alvo, alvo, gp['comprimento'], gp['variancia']) - v.T @ v
+        # Sugestões separadas por pelo menos metade do espaçamento típico entre os pontos medidos
+        distancia_minima = 0.5 * np.median(cKDTree(coordenadas).query(coordenadas, k=2)[0][:, 1]) \
+            if len(coordenadas) > 1 else 0.0
+        bloqueadas = np.zeros(len(grade), dtype=bool)
+        escolhidos, desvios_escolha, incertezas = [], [], []
+        pontos_para_tolerancia = 0 if incerteza <= tolerancia else None
+        for _ in range(max(n_sugestoes, max_pontos_extra if pontos_para_tolerancia is None else 0)):
+            variancias = np.maximum(np.diag(covariancia), 0)
+            reducao = np.sum(covariancia ** 2, axis=0) / (variancias + gp['ruido'])
+            # Com ruído, uma célula já escolhida (ou vizinha dela) ainda reduz a variância e seria sugerida de novo
+            reducao[bloqueadas] = -np.inf
+            if not np.isfinite(reducao).any():
+                break
+            escolha = int(np.argmax(reducao))
+            escolhidos.append(escolha)
+            bloqueadas |= np.hypot(*(grade - grade[escolha]).T) < distancia_minima
+            desvios_escolha.append(gp['desvio'] * np.sqrt(variancias[escolha]))
+            coluna = covariancia[:, escolha].copy()
+            covariancia -= np.outer(coluna, coluna) / (variancias[escolha] + gp['ruido'])
+            incertezas.append(gp['desvio'] * np.sqrt(np.maximum(np.diag(covariancia), 0)).mean() / referencia)
+            if pontos_para_tolerancia is None and incertezas[-1] <= tolerancia:
+                pontos_para_tolerancia = len(escolhidos)
+            if len(escolhidos) >= n_sugestoes and pontos_para_tolerancia is not None:
+                break
+
+        n = min(n_sugestoes, len(escolhidos))
+        posicoes = grade[escolhidos[:n]]
+        _, vizinho = cKDTree(df_coord[['linha', 'coluna']].to_numpy(dtype=float)).query(posicoes)
+        sugestoes = pd.DataFrame({
+            'ordem': np.arange(1, n + 1),
+            'linha': posicoes[:, 0],
+            'coluna': posicoes[:, 1],
+            'perto_de': [f"({int(df_coord['x'].iloc[i])}, {int(df_coord['y'].iloc[i])})" for i in vizinho],
+            'desvio_previsto': desvios_escolha[:n],
+            'incerteza_apos': incertezas[:n],
+        })
+        incerteza_apos = incertezas[n - 1] if n else incerteza
+        if salvar_csv:
+            caminho_csv = os.path.join(pasta, 'sugestoes_amostragem.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: sugestoes.to_csv(tmp, index=False))
+            print(f'Sugestões de amostragem salvas em: {caminho_csv}')
+
+        print(f'Incerteza relativa média de {variavel}: {100 * incerteza:.1f}% com {len(medidos)} pontos; '
+              f'{100 * incerteza_apos:.1f}% após {n} sugestão(ões).')
+        if incerteza <= tolerancia:
+            print(f'A superfície já está dentro da tolerância de {100 * tolerancia:g}%: a coleta pode parar.')
+        elif pontos_para_tolerancia is not None:
+            print(f'Estimativa: {pontos_para_tolerancia} ponto(s) a mais para atingir {100 * tolerancia:g}%.')
+        return {
+            'sugestoes': sugestoes,
+            'medidos': medidos,
+            'grade': (xi, yi, media.reshape(xi.shape), desvio.reshape(xi.shape)),
+            'incerteza_relativa': incerteza,
+            'incerteza_apos': incerteza_apos,
+            'parar': bool(incerteza <= tolerancia),
+            'pontos_para_tolerancia': pontos_para_tolerancia,
+            'gp': gp,
+        }
+    except Exception as e:
+        print(f'Erro ao planejar a amostragem: {e}')
+        raise
+
+
+def plotar_incerteza(plano: dict, variavel: str = 'PPFD') -> None:
+    """
+    Plota o mapa do desvio padrão preditivo sobre a bancada, com os pontos já medidos e as posições sugeridas
+    (numeradas na ordem de medição).
+    """
+    try:
+        xi, yi, _, desvio = plano['grade']
+        medidos, sugestoes = plano['medidos'], plano['sugestoes']
+        rotulo = fn.ROTULOS_VARIAVEIS.get(variavel, variavel)
+        fig = go.Figure()
+        fig.add_trace(go.Contour(x=xi[0], y=yi[:, 0], z=desvio, colorscale='Viridis',
+                                 colorbar=dict(title=f'Desvio previsto<br>{rotulo}'),
+                                 hovertemplate='Linha (X): %{x}<br>Coluna (Y): %{y}<br>Desvio: %{z:.2f}<extra></extra>'))
+        fig.add_trace(go.Scatter(x=medidos['linha'], y=medidos['coluna'], mode='markers',
+                                 marker=dict(color='white', size=9, line=dict(color='black', width=1)),
+                                 name='Medidos'))
+        fig.add_trace(go.Scatter(x=sugestoes['linha'], y=sugestoes['coluna'], mode='markers+text',
+                                 text=sugestoes['ordem'].astype(str), textposition='top center',
+                                 marker=dict(color='red', size=12, symbol='x'), name='Sugeridos'))
+        fig.update_layout(
+            title=(f"Incerteza da superfície: {100 * plano['incerteza_relativa']:.1f}% agora, "
+                   f"{100 * plano['incerteza_apos']:.1f}% após as sugestões"),
+            xaxis_title='Linha (X)',
+            yaxis_title='Coluna (Y)',
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar o mapa de incerteza: {e}')
+        raise
@@ -0,0 +1,299 @@
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+import functions as fn
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def medir_pico_rss_mb() -> float:
+    """
+    Retorna o pico de memória residente (RSS) do processo em MB, ou None se não for possível medir.
+    Usa o módulo 'resource' (Linux/macOS) ou o pacote opcional 'psutil' (Windows).
+    """
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é dado em bytes no macOS e em KB no Linux
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    return None
+
+
+def medir_rss_atual_mb() -> float:
+    """
+    Retorna a memória residente (RSS) atual do processo em MB, ou None se não for possível medir. Ao contrário do
+    pico, sobe e desce com a memória liberada entre lotes. Usa /proc/self/statm (Linux) ou o pacote opcional 'psutil'.
+    """
+    try:
+        with open('/proc/self/statm') as arquivo:
+            residentes = int(arquivo.read().split()[1])
+        return residentes * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    return None
+
+
+def _acrescentar_colunas(caminho_csv: str, colunas: list, blocos: int = 50000) -> None:
+    """Regrava um CSV já gravado com o cabeçalho 'colunas' (colunas novas vazias), em blocos e de forma atômica."""
+    def escrever(tmp):
+        for i, bloco in enumerate(pd.read_csv(caminho_csv, chunksize=blocos)):
+            bloco.reindex(columns=colunas).to_csv(tmp, mode='a' if i else 'w', header=(i == 0), index=False)
+    fn.gravar_atomico(caminho_csv, escrever)
+
+
+def percorrer_arquivos_espd(pasta_raiz: str):
+    """
+    Percorre recursivamente a árvore de pastas e gera (grupo, caminho) para cada arquivo ESPD_*.txt,
+    sem montar a lista completa em memória. O grupo é o caminho relativo da subpasta (ex: 'RoomA/2025/0A').
+
+    Args:
+        pasta_raiz (str): Pasta raiz do arquivo de campanhas (ou um pacote de campanha .zip).
+    """
+    pendentes = [pasta_raiz]
+    while pendentes:
+        pasta = pendentes.pop()
+        if fn.localizar_pacote(pasta)[0] is not None:
+            # Dentro de um pacote a listagem vem do índice em memória, sem chamadas ao sistema de arquivos
+            for nome in sorted(fn.listar_pasta(pasta)):
+                caminho = os.path.join(pasta, nome)
+                if fn.eh_pasta(caminho):
+                    pendentes.append(caminho)
+                elif nome.startswith('ESPD_') and nome.endswith('.txt'):
+                    grupo = os.path.relpath(pasta, pasta_raiz)
+                    yield ('.' if grupo == '.' else grupo.replace(os.sep, '/')), caminho
+            continue
+        with os.scandir(pasta) as entradas:
+            for entrada in sorted(entradas, key=lambda e: e.name):
+                if entrada.is_dir():
+                    pendentes.append(entrada.path)
+                elif entrada.name.startswith('ESPD_') and entrada.name.endswith('.txt'):
+                    grupo = os.path.relpath(pasta, pasta_raiz)
+                    yield ('.' if grupo == '.' else grupo.replace(os.sep, '/')), entrada.path
+
+
+def ler_medicoes(arquivos):
+    """
+    Gera um registro por arquivo ESPD a partir de um iterável de (grupo, caminho).
+    Arquivos que não puderem ser lidos são ignorados (o erro é exibido no terminal).
+
+    Yields:
+        dict: {'grupo', 'arquivo', 'linha', 'coluna', 'cabecalho', 'wl', 'espectro'}.
+    """
+    padrao_nome = re.compile(r'^ESPD_(\d)(\d)')
+    for grupo, caminho in arquivos:
+        try:
+            cabecalho, wl, espectro = fn.ler_arquivo_espd(caminho)
+        except Exception as e:
+            print(f'Erro ao ler {caminho}: {e}')
+            continue
+        match = padrao_nome.match(os.path.basename(caminho))
+        yield {
+            'grupo': grupo,
+            'arquivo': os.path.basename(caminho),
+            'linha': int(match.group(1)) if match else None,
+            'coluna': int(match.group(2)) if match else None,
+            'cabecalho': cabecalho,
+            'wl': wl,
+            'espectro': espectro.astype(np.float32),
+        }
+
+
+def agrupar_em_lotes(registros, tamanho_lote: int):
+    """
+    Agrupa um iterável de registros em listas de no máximo 'tamanho_lote' itens.
+    'tamanho_lote' pode ser alterado entre lotes enviando um novo valor com send().
+    """
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            novo_tamanho = yield lote
+            if novo_tamanho:
+                tamanho_lote = novo_tamanho
+            lote = []
+    if lote:
+        yield lote
+
+
+class _EnvelopeAcumulado:
+    """
+    Estatísticas por comprimento de onda acumuladas lote a lote (contagem, média, soma dos quadrados dos desvios,
+    mínimo e máximo). Cada lote é combinado ao acumulado pela fórmula de Chan et al. (média e desvios do lote em torno
+    da própria média), sem subtrair somas de quadrados grandes e próximas.
+    """
+
+    __slots__ = ('wl', 'n', 'media', 'm2', 'minimo', 'maximo')
+
+    def __init__(self, wl: np.ndarray):
+        self.wl = wl
+        self.n = 0
+        self.media = np.zeros(len(wl))
+        self.m2 = np.zeros(len(wl))
+        self.minimo = np.full(len(wl), np.inf)
+        self.maximo = np.full(len(wl), -np.inf)
+
+    def acumular(self, matriz: np.ndarray) -> None:
+        matriz = matriz.astype(np.float64)
+        n_lote = matriz.shape[0]
+        media_lote = matriz.mean(axis=0)
+        m2_lote = ((matriz - media_lote) ** 2).sum(axis=0)
+        n_total = self.n + n_lote
+        delta = media_lote - self.media
+        self.media += delta * (n_lote / n_total)
+        self.m2 += m2_lote + delta ** 2 * (self.n * n_lote / n_total)
+        self.n = n_total
+        np.minimum(self.minimo, matriz.min(axis=0), out=self.minimo)
+        np.maximum(self.maximo, matriz.max(axis=0), out=self.maximo)
+
+    def tabela(self, grupo: str) -> pd.DataFrame:
+        desvio = np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.zeros(len(self.wl))
+        return pd.DataFrame({'grupo': grupo, 'Wavelength(nm)': self.wl, 'n': self.n, 'media': self.media.copy(),
+                             'desvio': desvio, 'minimo': self.minimo, 'maximo': self.maximo})
+
+
+def processar_arquivo_em_lotes(pasta_raiz: str, pasta_saida: str, limite_memoria_mb: float = 512,
+                               tamanho_lote: int = None) -> dict:
+    """
+    Processa um arquivo de campanhas inteiro (todas as salas, sessões e tratamentos) em lotes de tamanho limitado.
+    A árvore é percorrida por geradores; cada lote é lido, reduzido e gravado antes do próximo ser carregado, de modo
+    que a memória usada não depende do número total de arquivos.
+
+    Saídas gravadas em pasta_saida:
+        - 'metricas_medicoes.csv': uma linha por arquivo ESPD com grupo, posição e todas as métricas numéricas do cabeçalho
+          (anexada a cada lote).
+        - 'envelopes_por_grupo.csv': média, desvio, mínimo e máximo do bloco espectral ESPD (mW m⁻² nm⁻¹) por grupo.
+
+    Args:
+        pasta_raiz (str): Pasta raiz a ser percorrida recursivamente.
+        pasta_saida (str): Pasta onde os resultados serão gravados (criada se não existir).
+        limite_memoria_mb (float, opcional): Teto de memória (RSS) do processo. O tamanho do lote é calculado a partir
+            da memória livre abaixo do teto no início (1/4 dela para os dados do lote); depois de cada lote, a RSS atual
+            é medida e o lote é reduzido pela metade se passar do teto, ou volta a crescer (até o tamanho inicial) se
+            ficar abaixo da metade. Padrão é 512.
+        tamanho_lote (int, opcional): Tamanho fixo de lote. Se None, é calculado a partir de limite_memoria_mb.
+
+    Returns:
+        dict: Resumo com 'n_arquivos', 'n_lotes', 'n_grupos', 'pico_rss_mb', 'rss_max_lotes_mb' (maior RSS medida
+            entre os lotes) e os caminhos dos arquivos gerados.
+
+    Exemplo:
+        resumo = processar_arquivo_em_lotes('D:/Spectros_ROOM_LAAC', 'D:/resultados', limite_memoria_mb=1024)
+        print(resumo['pico_rss_mb'])
+    """
+    try:
+        os.makedirs(pasta_saida, exist_ok=True)
+        caminho_metricas = os.path.join(pasta_saida, 'metricas_medicoes.csv')
+        caminho_envelopes = os.path.join(pasta_saida, 'envelopes_por_grupo.csv')
+        if os.path.exists(caminho_metricas):
+            os.remove(caminho_metricas)
+
+        rss_inicial = medir_rss_atual_mb()
+        disponivel_mb = limite_memoria_mb - (rss_inicial or 0)
+        if rss_inicial is not None and disponivel_mb <= 0:
+            print(f'Aviso: o processo já usa {rss_inicial:.1f} MB, acima do limite de {limite_memoria_mb} MB; '
+                  'os lotes terão o tamanho mínimo e o limite não poderá ser respeitado.')
+        if tamanho_lote is None:
+            # Espectro float32 + métricas do cabeçalho + sobrecarga dos objetos Python, por medição
+            bytes_por_medicao = 401 * 4 + 80 * 8 + 4096
+            tamanho_lote = max(1, int(max(disponivel_mb, 0) * 1024 * 1024 / 4 / bytes_por_medicao))
+        tamanho_inicial = tamanho_lote
+        rss_max = rss_inicial
+
+        envelopes = {}
+        colunas_metricas = None
+        n_arquivos = 0
+        n_lotes = 0
+        lotes = agrupar_em_lotes(ler_medicoes(percorrer_arquivos_espd(pasta_raiz)), tamanho_lote)
+        lote = next(lotes, None)
+        while lote is not None:
+            n_lotes += 1
+            n_arquivos += len(lote)
+
+            linhas = []
+            for registro in lote:
+                metricas = {k: v for k, v in registro['cabecalho'].items() if isinstance(v, float)}
+                linhas.append({'grupo': registro['grupo'], 'arquivo': registro['arquivo'],
+                               'linha': registro['linha'], 'coluna': registro['coluna'],
+                               'Time': registro['cabecalho'].get('Time'), **metricas})
+            df_lote = pd.DataFrame(linhas)
+            if colunas_metricas is None:
+                colunas_metricas = list(df_lote.columns)
+            novas = [c for c in df_lote.columns if c not in colunas_metricas]
+            if novas:
+                # Chaves do cabeçalho que só aparecem em lotes posteriores: o CSV já gravado ganha as colunas novas
+                colunas_metricas += novas
+                _acrescentar_colunas(caminho_metricas, colunas_metricas)
+                print(f"Colunas novas no cabeçalho a partir do lote {n_lotes}: {', '.join(novas)}.")
+            df_lote.reindex(columns=colunas_metricas).to_csv(
+                caminho_metricas, mode='a', header=(n_lotes == 1), index=False)
+
+            por_grupo = {}
+            for registro in lote:
+                por_grupo.setdefault(registro['grupo'], []).append(registro)
+            for grupo, registros in por_grupo.items():
+                # Todos os lotes do grupo usam a grade de comprimentos de onda do primeiro espectro válido do grupo;
+                # espectros em outra grade são reamostrados nela e arquivos sem bloco espectral ficam de fora
+                validos = [r for r in registros if len(r['wl'])]
+                for r in registros:
+                    if not len(r['wl']):
+                        print(f"Aviso: {r['arquivo']} ({grupo}) sem bloco espectral; fora do envelope.")
+                if not validos:
+                    continue
+                wl = envelopes[grupo].wl if grupo in envelopes else np.asarray(validos[0]['wl'], dtype=float)
+                matriz = np.vstack([r['espectro'] if len(r['wl']) == len(wl) and np.allclose(r['wl'], wl)
+                                    else np.interp(wl, r['wl'], r['espectro']).astype(np.float32)
+                                    for r in validos])
+                if grupo not in envelopes:
+                    envelopes[grupo] = _EnvelopeAcumulado(wl)
+                envelopes[grupo].acumular(matriz)
+
+            del linhas, df_lote, por_grupo
+            atual = medir_rss_atual_mb()
+            texto_atual = f'{atual:.1f} MB' if atual is not None else 'indisponível'
+            print(f'Lote {n_lotes}: {len(lote)} arquivos ({n_arquivos} no total), RSS: {texto_atual}')
+            del lote
+            novo_tamanho = None
+            if atual is not None:
+                rss_max = max(rss_max or 0, atual)
+                if atual > limite_memoria_mb and tamanho_lote > 1:
+                    tamanho_lote = novo_tamanho = max(1, tamanho_lote // 2)
+                    print(f'Memória acima do limite ({limite_memoria_mb} MB); lote reduzido para {tamanho_lote}.')
+                elif atual < limite_memoria_mb / 2 and tamanho_lote < tamanho_inicial:
+                    tamanho_lote = novo_tamanho = min(tamanho_inicial, tamanho_lote * 2)
+            try:
+                lote = lotes.send(novo_tamanho)
+            except StopIteration:
+                lote = None
+
+        if envelopes:
+            pd.concat([acc.tabela(grupo) for grupo, acc in envelopes.items()],
+                      ignore_index=True).to_csv(caminho_envelopes, index=False)
+        resumo = {
+            'n_arquivos': n_arquivos,
+            'n_lotes': n_lotes,
+            'n_grupos': len(envelopes),
+            'pico_rss_mb': medir_pico_rss_mb(),
+            'rss_max_lotes_mb': rss_max,
+            'metricas_csv': caminho_metricas if n_arquivos else None,
+            'envelopes_csv': caminho_envelopes if envelopes else None,
+        }
+        texto_pico = f"{resumo['pico_rss_mb']:.1f} MB" if resumo['pico_rss_mb'] is not None else 'indisponível'
+        print(f'Processamento concluído: {n_arquivos} arquivos em {n_lotes} lotes, '
+              f'{len(envelopes)} grupos. Pico de RSS: {texto_pico}')
+        return resumo
+    except Exception as e:
+        print(f'Erro ao processar arquivo em lotes: {e}')
+        raise
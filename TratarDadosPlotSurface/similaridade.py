@@ -0,0 +1,247 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+import functions as fn
+
+
+def carregar_espectros(pasta_principal: str) -> dict:
+    """
+    Carrega todos os espectros uMOL_*.txt das subpastas em uma única matriz (arquivos x comprimentos de onda).
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+
+    Returns:
+        dict: {'wl', 'matriz', 'arquivos', 'grupos', 'linha', 'coluna'} — 'grupos', 'linha' e 'coluna' são arrays
+            alinhados com as linhas da matriz (posição -1 quando o nome do arquivo não segue o padrão).
+    """
+    padrao_nome = re.compile(r'^uMOL_(\d)(\d)')
+    wl_comum = None
+    blocos, arquivos, grupos = [], [], []
+    for grupo, lista in fn.listar_arquivos_umol(pasta_principal).items():
+        wl, matriz, validos = fn.empilhar_espectros(lista)
+        if not validos:
+            continue
+        if wl_comum is None:
+            wl_comum = wl
+        elif len(wl) != len(wl_comum) or not np.allclose(wl, wl_comum):
+            matriz = np.vstack([np.interp(wl_comum, wl, linha) for linha in matriz])
+        blocos.append(matriz)
+        arquivos.extend(validos)
+        grupos.extend([grupo] * len(validos))
+    posicoes = []
+    for arquivo in arquivos:
+        match = padrao_nome.match(os.path.basename(arquivo))
+        posicoes.append((int(match.group(1)), int(match.group(2))) if match else (-1, -1))
+    posicoes = np.array(posicoes, dtype=int).reshape(-1, 2)
+    return {
+        'wl': wl_comum if wl_comum is not None else np.array([]),
+        'matriz': np.vstack(blocos) if blocos else np.empty((0, 0)),
+        'arquivos': arquivos,
+        'grupos': np.array(grupos, dtype=object),
+        'linha': posicoes[:, 0],
+        'coluna': posicoes[:, 1],
+    }
+
+
+def normalizar_espectros(matriz: np.ndarray) -> tuple:
+    """
+    Normaliza cada espectro (linha) para norma euclidiana unitária, separando forma e intensidade.
+
+    Returns:
+        tuple: (espectros unitários, intensidade = soma de cada espectro).
+    """
+    matriz = np.nan_to_num(np.asarray(matriz, dtype=float))
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas, matriz.sum(axis=1)
+
+
+def matriz_distancias(a: np.ndarray, b: np.ndarray = None, metrica: str = 'sam') -> np.ndarray:
+    """
+    Calcula a matriz de distâncias entre todos os espectros de 'a' e de 'b' (ou de 'a' com ele mesmo) por
+    produto matricial, sem laços em Python.
+
+    Args:
+        a (np.ndarray): Matriz (n x comprimentos de onda).
+        b (np.ndarray, opcional): Matriz (m x comprimentos de onda). Se None, usa 'a'.
+        metrica (str, opcional): 'sam' (ângulo espectral em graus), 'cosseno' (1 - similaridade do cosseno)
+            ou 'euclidiana'. Padrão é 'sam'.
+
+    Returns:
+        np.ndarray: Matriz (n x m) de distâncias.
+    """
+    a = np.nan_to_num(np.asarray(a, dtype=float))
+    b = a if b is None else np.nan_to_num(np.asarray(b, dtype=float))
+    if metrica == 'euclidiana':
+        quad = (a ** 2).sum(axis=1)[:, None] + (b ** 2).sum(axis=1)[None, :] - 2 * a @ b.T
+        return np.sqrt(np.clip(quad, 0, None))
+    unit_a, _ = normalizar_espectros(a)
+    unit_b, _ = normalizar_espectros(b)
+    cosseno = np.clip(unit_a @ unit_b.T, -1.0, 1.0)
+    if metrica == 'cosseno':
+        return 1.0 - cosseno
+    if metrica == 'sam':
+        return np.degrees(np.arccos(cosseno))
+    raise ValueError(f"Métrica desconhecida: {metrica}. Use 'sam', 'cosseno' ou 'euclidiana'.")
+
+
+class IndiceVizinhos:
+    """
+    Índice de vizinhos mais próximos (KD-tree) sobre a forma dos espectros, para arquivos grandes em que a
+    matriz completa de distâncias não cabe na memória. A distância euclidiana entre vetores unitários é
+    convertida para o ângulo espectral (SAM, em graus).
+
+    Os vetores unitários são projetados nas n_componentes principais antes de montar a árvore, pois a KD-tree
+    perde eficiência com 401 dimensões; os espectros de LED ocupam poucas direções e o erro da projeção é pequeno.
+    """
+
+    def __init__(self, matriz: np.ndarray, n_componentes: int = 20):
+        unitarios, _ = normalizar_espectros(matriz)
+        self.media = unitarios.mean(axis=0)
+        _, _, vt = np.linalg.svd(unitarios - self.media, full_matrices=False)
+        self.base = vt[:min(n_componentes, vt.shape[0])]
+        self.n = len(unitarios)
+        self.arvore = cKDTree((unitarios - self.media) @ self.base.T)
+
+    def consultar(self, matriz: np.ndarray, k: int = 5) -> tuple:
+        """
+        Retorna (ângulos SAM aproximados em graus, índices) dos k vizinhos mais próximos de cada espectro consultado.
+        """
+        unitarios, _ = normalizar_espectros(matriz)
+        k = min(k, self.n)
+        corda, indices = self.arvore.query((unitarios - self.media) @ self.base.T, k=k)
+        angulos = np.degrees(2 * np.arcsin(np.clip(np.asarray(corda) / 2, 0, 1)))
+        return angulos.reshape(len(unitarios), -1), np.asarray(indices).reshape(len(unitarios), -1)
+
+
+def _z_robusto(valores: np.ndarray) -> np.ndarray:
+    mediana = np.median(valores)
+    mad = 1.4826 * np.median(np.abs(valores - mediana))
+    if mad == 0:
+        return np.zeros_like(valores)
+    return (valores - mediana) / mad
+
+
+def detectar_anomalias(pasta_principal: str, limiar: float = 3.5, k_vizinhos: int = 5,
+                       salvar_csv: bool = True) -> pd.DataFrame:
+    """
+    Gera uma lista de revisão dos espectros uMOL_ antes da extração, apontando arquivos atípicos dentro da própria
+    subpasta e arquivos que parecem pertencer a outro tratamento (ex: leitura de 100A salva em 0A).
+
+    Cada espectro é separado em forma (vetor unitário) e nível de intensidade. Como a intensidade varia ao longo da
+    bancada, o nível é corrigido pelo fator espacial da posição (mediana, entre os tratamentos, da intensidade relativa
+    naquela posição). Assim tratamentos com a mesma forma e dimerização diferente (0A e 100A) ficam separáveis.
+    Os k vizinhos de forma mais próximos (IndiceVizinhos) também são consultados: um arquivo cujos vizinhos são, na
+    maioria, de outro tratamento é marcado quando esse tratamento também tem escore menor que o do próprio grupo,
+    mesmo abaixo do limiar do escore.
+
+    Args:
+        pasta_principal (str): Pasta principal com as subpastas de tratamento.
+        limiar (float, opcional): Escore z robusto acima do qual um arquivo é marcado. Padrão é 3.5.
+        k_vizinhos (int, opcional): Número de vizinhos consultados no índice de forma. Padrão é 5.
+        salvar_csv (bool, opcional): Se True, salva 'revisao_espectros.csv' na pasta principal (ao lado do pacote,
+            se a campanha estiver empacotada). Padrão é True.
+
+    Returns:
+        pd.DataFrame: Uma linha por arquivo, com as colunas 'revisar' e 'motivo', ordenada com os marcados primeiro.
+    """
+    try:
+        dados = carregar_espectros(pasta_principal)
+        matriz = dados['matriz']
+        grupos = dados['grupos']
+        if matriz.size == 0:
+            return pd.DataFrame()
+        unitarios, intensidade = normalizar_espectros(matriz)
+        log_int = np.log(np.clip(intensidade, 1e-12, None))
+        nomes_grupos = sorted(set(grupos))
+        idx_grupo = np.array([nomes_grupos.index(g) for g in grupos])
+
+        # Fator espacial por posição: intensidade relativa à mediana do grupo, mediana entre grupos
+        relativo = log_int.copy()
+        for gi in range(len(nomes_grupos)):
+            membros = idx_grupo == gi
+            relativo[membros] -= np.median(log_int[membros])
+        chave_pos = dados['linha'] * 100 + dados['coluna']
+        fator_pos = np.zeros(len(matriz))
+        for pos in np.unique(chave_pos):
+            if pos < 0:
+                continue
+            membros = chave_pos == pos
+            fator_pos[membros] = np.median(relativo[membros])
+        nivel = log_int - fator_pos
+
+        # Centróides de forma e nível por grupo
+        centroides = np.vstack([unitarios[idx_grupo == gi].mean(axis=0) for gi in range(len(nomes_grupos))])
+        niveis_grupo = np.array([np.median(nivel[idx_grupo == gi]) for gi in range(len(nomes_grupos))])
+        sam = matriz_distancias(unitarios, centroides, metrica='sam')
+        delta_nivel = np.abs(nivel[:, None] - niveis_grupo[None, :])
+
+        # Escalas comuns: dispersão típica dentro dos grupos
+        linhas = np.arange(len(matriz))
+        sam_proprio = sam[linhas, idx_grupo]
+        escala_sam = max(np.median(sam_proprio), 0.5)
+        escala_nivel = max(np.median([1.4826 * np.median(np.abs(nivel[idx_grupo == gi] - niveis_grupo[gi]))
+                                      for gi in range(len(nomes_grupos))]), 0.05)
+        escore = (sam / escala_sam) ** 2 + (delta_nivel / escala_nivel) ** 2
+        melhor = escore.argmin(axis=1)
+        escore_proprio = escore[linhas, idx_grupo]
+
+        z_forma = np.zeros(len(matriz))
+        z_nivel = np.zeros(len(matriz))
+        for gi in range(len(nomes_grupos)):
+            membros = idx_grupo == gi
+            z_forma[membros] = _z_robusto(sam_proprio[membros])
+            z_nivel[membros] = _z_robusto(nivel[membros])
+
+        indice = IndiceVizinhos(matriz)
+        _, vizinhos = indice.consultar(matriz, k=k_vizinhos + 1)
+        grupos_vizinhos = grupos[vizinhos[:, 1:]]
+        grupo_vizinhos = [pd.Series(v).mode().iloc[0] for v in grupos_vizinhos]
+        idx_vizinhos = np.array([nomes_grupos.index(g) for g in grupo_vizinhos])
+        # Vizinhos de forma de outro tratamento confirmam a troca quando esse tratamento também explica melhor o nível
+        # (0A e 100A têm a mesma forma e só se separam pela intensidade)
+        vizinhos_confirmam = (idx_vizinhos != idx_grupo) & (escore[linhas, idx_vizinhos] < escore_proprio)
+
+        motivos = []
+        for i in range(len(matriz)):
+            motivo = []
+            if melhor[i] != idx_grupo[i] and escore_proprio[i] > limiar ** 2 / 4:
+                motivo.append(f'parece {nomes_grupos[melhor[i]]}')
+            elif vizinhos_confirmam[i]:
+                motivo.append(f'parece {grupo_vizinhos[i]} (vizinhos de forma)')
+            # O escore z robusto exige também um desvio absoluto mínimo, para não marcar grupos muito homogêneos
+            if z_forma[i] > limiar and sam_proprio[i] > 2 * escala_sam:
+                motivo.append('forma atípica no grupo')
+            if abs(z_nivel[i]) > limiar and delta_nivel[i, idx_grupo[i]] > 2 * escala_nivel:
+                motivo.append('intensidade atípica no grupo')
+            motivos.append('; '.join(motivo))
+
+        df = pd.DataFrame({
+            'arquivo': [os.path.basename(a) for a in dados['arquivos']],
+            'grupo': grupos,
+            'linha': dados['linha'],
+            'coluna': dados['coluna'],
+            'PFD_total': intensidade,
+            'sam_centroide_graus': sam_proprio,
+            'z_forma': z_forma,
+            'z_intensidade': z_nivel,
+            'grupo_sugerido': [nomes_grupos[m] for m in melhor],
+            'grupo_vizinhos': grupo_vizinhos,
+            'motivo': motivos,
+        })
+        df['revisar'] = df['motivo'] != ''
+        df['caminho'] = dados['arquivos']
+        df = df.sort_values(['revisar', 'z_forma'], ascending=[False, False]).reset_index(drop=True)
+        if salvar_csv:
+            # Pacotes são somente leitura: a lista fica ao lado do pacote
+            pacote, _ = fn.localizar_pacote(pasta_principal)
+            caminho_csv = os.path.join(os.path.dirname(pacote) if pacote else pasta_principal, 'revisao_espectros.csv')
+            fn.gravar_atomico(caminho_csv, lambda tmp: df.to_csv(tmp, index=False))
+            print(f"Lista de revisão salva em: {caminho_csv} ({int(df['revisar'].sum())} arquivos marcados)")
+        return df
+    except Exception as e:
+        print(f'Erro ao detectar anomalias: {e}')
+        raise
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos do projeto são arquivos soltos na pasta TratarDadosPlotSurface
+PASTA_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PASTA_PROJETO)
@@ -0,0 +1,61 @@
+import numpy as np
+import biblioteca_referencia as br
+
+
+def _gaussiana(wl, centro, largura=15.0):
+    return np.exp(-0.5 * ((wl - centro) / largura) ** 2)
+
+
+def test_matriz_reamostragem_igual_a_interp():
+    wl_origem = np.sort(np.random.default_rng(0).uniform(390, 770, 120))
+    valores = np.sin(wl_origem / 37.0) + 2
+    reamostrado = br.matriz_reamostragem(wl_origem) @ valores
+    dentro = (br.GRADE_REFERENCIA >= wl_origem[0]) & (br.GRADE_REFERENCIA <= wl_origem[-1])
+    np.testing.assert_allclose(reamostrado[dentro], np.interp(br.GRADE_REFERENCIA[dentro], wl_origem, valores))
+    assert np.all(reamostrado[~dentro] == 0)
+
+
+def test_melhores_encontra_a_referencia_de_mesma_forma_e_ignora_absorbancia():
+    wl = np.arange(380.0, 781.0, 2.0)
+    biblioteca = br.BibliotecaReferencia()
+    biblioteca.adicionar_varios(['azul', 'verde', 'vermelho'], wl,
+                                np.vstack([_gaussiana(wl, c) for c in (450, 530, 660)]), 'LED monocromático')
+    biblioteca.adicionar('Pigmento', wl, _gaussiana(wl, 452), br.PREFIXO_ABSORBANCIA + ' of pigments')
+
+    medidos = np.vstack([5 * _gaussiana(wl, 451), 0.2 * _gaussiana(wl, 662)])
+    melhores = biblioteca.melhores(wl, medidos, n=2)
+    assert melhores['referencia_1'].tolist() == ['azul', 'vermelho']
+    assert 'Pigmento' not in set(melhores[['referencia_1', 'referencia_2']].to_numpy().ravel())
+    assert np.all(melhores['angulo_1'] < melhores['angulo_2'])
+
+    com_absorbancia = biblioteca.melhores(wl, medidos[:1], n=1, categorias=[br.PREFIXO_ABSORBANCIA + ' of pigments'])
+    assert com_absorbancia['referencia_1'].tolist() == ['Pigmento']
+
+
+def test_biblioteca_padrao_e_montada_de_novo_quando_as_fontes_mudam(tmp_path, monkeypatch):
+    fontes = {'dados/sol/uMOL_SOL.txt': 1.0}
+    montagens = []
+
+    def montar():
+        biblioteca = br.BibliotecaReferencia()
+        biblioteca.adicionar('Sol', br.GRADE_REFERENCIA, _gaussiana(br.GRADE_REFERENCIA, 550, 100), 'Luz solar',
+                             'dados/sol')
+        biblioteca.fontes = dict(fontes)
+        montagens.append(biblioteca)
+        return biblioteca
+
+    monkeypatch.setattr(br, 'CAMINHO_BIBLIOTECA', str(tmp_path / 'biblioteca.npz'))
+    monkeypatch.setattr(br, 'fontes_padrao', lambda: dict(fontes))
+    monkeypatch.setattr(br, 'montar_biblioteca_padrao', montar)
+    monkeypatch.setattr(br, '_BIBLIOTECA_PADRAO', None)
+
+    br.biblioteca_padrao()
+    monkeypatch.setattr(br, '_BIBLIOTECA_PADRAO', None)
+    gravada = br.biblioteca_padrao()
+    assert len(montagens) == 1
+    assert gravada.origens == ['dados/sol'] and gravada.fontes == fontes
+
+    fontes['dados/sol/uMOL_SOL.txt'] = 2.0
+    monkeypatch.setattr(br, '_BIBLIOTECA_PADRAO', None)
+    br.biblioteca_padrao()
+    assert len(montagens) == 2
@@ -0,0 +1,18 @@
+import os
+import numpy as np
+import comparacao_campanhas as cmp
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_campanha_comparada_com_ela_mesma_nao_tem_diferencas():
+    comparacao = cmp.comparar_campanhas(PASTA_EXEMPLO, PASTA_EXEMPLO, salvar_csv=False)
+    pontos, resumo = comparacao['pontos'], comparacao['resumo']
+    assert np.all(pontos['delta_PPFD'] == 0)
+    assert np.all(pontos['delta_PFD'] == 0)
+    assert np.all(comparacao['delta_espectros'] == 0)
+    assert np.all(resumo['delta_PPFD_medio'] == 0)
+    assert not pontos['mudanca_local'].any()
+    # A posição (5, 5) de 99100 foi medida duas vezes e entra uma única vez, pela média
+    assert resumo.set_index('grupo').loc['99100', 'n_duplicados_a'] == 1
+    assert resumo['n_nao_pareados_a'].sum() == 0
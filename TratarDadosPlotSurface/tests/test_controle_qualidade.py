@@ -0,0 +1,12 @@
+import os
+import controle_qualidade as cq
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_posicao_remedida_e_aviso_e_nao_vai_para_quarentena():
+    relatorio, quarentena, _ = cq.verificar_pasta(PASTA_EXEMPLO, salvar_csv=False)
+    remedidas = relatorio[(relatorio['grupo'] == '99100') & relatorio['problema'].str.contains(r'\(5, 5\)')]
+    assert len(remedidas) == 4  # ESPD e uMOL das duas leituras
+    assert set(remedidas['severidade']) == {'aviso'}
+    assert not set(remedidas['caminho']) & set(quarentena)
@@ -0,0 +1,15 @@
+import os
+import estabilidade_temporal as et
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_repeticao_unica_nao_corrige_deriva():
+    # Na campanha de exemplo, 99100 tem uma única remedição de (5, 5), 3,5 min depois e 37 % diferente
+    resultado = et.analisar_estabilidade(PASTA_EXEMPLO, salvar_csv=False)
+    deriva = resultado['deriva']
+    com_pares = deriva[deriva['n_pares'] > 0]
+    assert list(com_pares['ID']) == ['99100']
+    assert not com_pares['deriva_valida'].any()
+    df = et.corrigir_deriva(resultado['indice'], resultado, grupo='99100')
+    assert (df['fator_deriva'] == 1).all()
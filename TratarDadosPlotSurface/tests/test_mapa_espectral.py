@@ -0,0 +1,42 @@
+import os
+import numpy as np
+import pytest
+import functions as fn
+import mapa_espectral as me
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def mapa():
+    return me.MapaEspectral.de_pasta(os.path.join(PASTA_EXEMPLO, '100A'), resolucao=20)
+
+
+def test_operador_celulas_reproduz_espectro(mapa):
+    base, indices, pesos = mapa.operador_celulas()
+    for i, j in [(0, 0), (7, 12), (19, 19), (10, 3)]:
+        c = i * mapa.forma[1] + j
+        compacto = (pesos[c, :, None] * base[indices[c]]).sum(axis=0)
+        np.testing.assert_allclose(compacto, mapa.espectro(i, j), rtol=1e-5, atol=1e-5)
+
+
+def test_operador_celulas_recusa_cubica(mapa):
+    with pytest.raises(ValueError):
+        mapa.operador_celulas('cubic')
+
+
+def test_materializar_grava_no_caminho_pedido(tmp_path):
+    mapa = me.MapaEspectral.de_pasta(os.path.join(PASTA_EXEMPLO, '100A'), resolucao=12, metodo='cubic')
+    esperado = mapa.espectro(5, 6)
+    cubo = mapa.materializar(str(tmp_path / 'cubo.npy'), bloco=50)
+    assert os.listdir(tmp_path) == ['cubo.npy']
+    np.testing.assert_allclose(cubo[5, 6], esperado)
+
+
+def test_relatorio_cubico_nao_embute_o_cubo(tmp_path, monkeypatch):
+    monkeypatch.setattr(fn.webbrowser, 'open', lambda *args, **kwargs: None)
+    mapa = me.MapaEspectral.de_pasta(os.path.join(PASTA_EXEMPLO, '100A'), resolucao=50, metodo='cubic')
+    saida = me.plotar_mapa_espectral(mapa, pasta_saida=str(tmp_path))
+    cubo_base64 = 4 / 3 * len(mapa) * len(mapa.wl) * 4
+    assert os.path.getsize(saida) < cubo_base64 / 4
+    assert mapa._interpolador is None
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import metricas_fotobiologicas as mf
+
+WL = np.arange(380, 781, 1.0)
+
+
+def _monocromatica(pico: float, largura: float = 2.0) -> np.ndarray:
+    return np.exp(-0.5 * ((WL - pico) / largura) ** 2)
+
+
+def test_pss_aprox_vermelho_660nm():
+    pss = mf.calcular_metricas(WL, _monocromatica(660))['PSS_aprox'].iloc[0]
+    assert pss == pytest.approx(0.89, abs=0.02)
+
+
+def test_pss_aprox_vermelho_distante_730nm():
+    pss = mf.calcular_metricas(WL, _monocromatica(730))['PSS_aprox'].iloc[0]
+    assert pss == pytest.approx(0.1, abs=0.05)
+
+
+def test_pss_aprox_azul_perto_de_meio():
+    pss = mf.calcular_metricas(WL, _monocromatica(450, largura=10))['PSS_aprox'].iloc[0]
+    assert pss == pytest.approx(0.5, abs=0.1)
+
+
+def test_pss_so_com_secoes_de_choque_tabeladas():
+    assert 'PSS' not in mf.calcular_metricas(WL, _monocromatica(660)).columns
+
+    acao = mf.carregar_espectros_acao()
+    acao[mf.COLUNAS_SIGMA[0]] = 1.0
+    acao[mf.COLUNAS_SIGMA[1]] = 3.0
+    metricas = mf.calcular_metricas(WL, _monocromatica(660), acao=acao)
+    assert metricas['PSS'].iloc[0] == pytest.approx(0.25)
@@ -0,0 +1,26 @@
+import os
+import numpy as np
+import functions as fn
+import modelo_dimerizacao as md
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_carregar_cubo_usa_a_media_das_posicoes_remedidas():
+    pasta = os.path.join(PASTA_EXEMPLO, '99100')
+    colecao = fn.ColecaoMedicoes.de_pasta(pasta, espectros=False)
+    remedida = (colecao.dados['X'] == 5) & (colecao.dados['Y'] == 5)
+    assert remedida.sum() == 2
+
+    cubo = md.carregar_cubo([pasta])
+    ponto = (cubo['X'] == 5) & (cubo['Y'] == 5)
+    assert cubo['n_repetidas'] == 1
+    assert ponto.sum() == 1
+    np.testing.assert_allclose(cubo['medidos'][0, ponto, -2], colecao.dados['PPFD'][remedida].mean(), rtol=1e-6)
+
+
+def test_modelo_com_dois_niveis_reproduz_os_niveis_medidos():
+    pastas = {os.path.join(PASTA_EXEMPLO, '0A'): 15, os.path.join(PASTA_EXEMPLO, '100A'): 100}
+    modelo = md.ajustar_modelo(pastas, serie='B')
+    previsto = md.prever_cubo(modelo, [15, 100])
+    np.testing.assert_allclose(previsto, np.clip(modelo['medidos'], 0, None), rtol=1e-4, atol=1e-4)
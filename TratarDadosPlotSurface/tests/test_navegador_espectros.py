@@ -0,0 +1,39 @@
+import os
+import numpy as np
+import pytest
+import functions as fn
+
+pytest.importorskip('ttkbootstrap')
+import main  # noqa: E402
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_listar_arquivos_da_campanha_e_de_um_tratamento():
+    arquivos, grupos, posicoes = main.NavegadorEspectros._listar_arquivos(PASTA_EXEMPLO)
+    assert len(arquivos) == len(grupos) == len(posicoes) > 0
+    assert set(grupos) == {'0A', '0B', '0T', '0V', '100A', '100B', '100V', '99100'}
+    assert all(os.path.basename(a).startswith('ESPD_') for a in arquivos)
+
+    arquivos, grupos, posicoes = main.NavegadorEspectros._listar_arquivos(os.path.join(PASTA_EXEMPLO, '99100'))
+    assert set(grupos) == {'99100'}
+    assert (np.all(posicoes == (5, 5), axis=1)).sum() == 2
+
+
+def test_arquivo_sem_bloco_espectral_nao_contamina_o_cache(tmp_path):
+    corrompido = tmp_path / 'ESPD_1190A.txt'
+    corrompido.write_text('PPFD\t1.0\nPFD\t1.0\n')
+    valido = os.path.join(PASTA_EXEMPLO, '0A', 'ESPD_1290A.txt')
+
+    navegador = object.__new__(main.NavegadorEspectros)
+    navegador.arquivos = [str(corrompido), valido]
+    navegador.grupos = np.array(['0A', '0A'], dtype=object)
+    navegador.posicoes = np.array([[1, 1], [1, 2]])
+    navegador.cache = fn.ColecaoMedicoes()
+    navegador.linha_cache = np.full(2, -1, dtype=np.int64)
+
+    with pytest.raises(ValueError):
+        navegador._carregar(0)
+    wl, espectro, _ = navegador._carregar(1)
+    assert len(wl) == 401 and len(espectro) == 401
+    assert navegador.linha_cache[0] == -1
@@ -0,0 +1,26 @@
+import os
+import numpy as np
+import pytest
+import otimizacao_luminarias as ol
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def base():
+    return ol.montar_base(PASTA_EXEMPLO)
+
+
+def test_ajustes_atingem_ppfd_e_razao_alvo(base):
+    resultado = ol.otimizar_ajustes(base, ppfd_alvo=120, razao_rb_alvo=2.0)
+    assert resultado['resumo']['PPFD_media'] == pytest.approx(120, rel=0.01)
+    assert resultado['resumo']['R:B_medio'] == pytest.approx(2.0, rel=0.02)
+    assert np.all((resultado['ajustes'] >= 0) & (resultado['ajustes'] <= 100))
+
+
+def test_canal_fixo_reproduz_a_propria_medicao(base):
+    fixo = np.array([1.0, 0.0, 0.0, 0.0])
+    resultado = ol.otimizar_ajustes(base, ppfd_alvo=100, limites=(fixo, fixo + 1e-12))
+    i_ppfd = base['faixas'].index('PPFD')
+    np.testing.assert_allclose(resultado['pontos']['PPFD'], base['integrais'][:, 0, i_ppfd], rtol=1e-6)
+    np.testing.assert_allclose(resultado['espectros'], base['espectros'][0], rtol=1e-5, atol=1e-8)
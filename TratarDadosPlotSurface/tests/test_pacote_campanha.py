@@ -0,0 +1,73 @@
+import os
+import shutil
+import pytest
+import functions as fn
+import controle_qualidade as cq
+import metricas_fotobiologicas as mf
+import comparacao_campanhas as cmp
+import colorimetria as cor
+import otimizacao_luminarias as ol
+import modelo_dimerizacao as md
+import similaridade as sim
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUBPASTAS = ['0A', '0B', '0T', '0V', '100A', '100B', '100V', '99100']
+
+
+@pytest.fixture
+def pacote(tmp_path):
+    campanha = tmp_path / 'campanha'
+    for subpasta in SUBPASTAS:
+        shutil.copytree(os.path.join(PASTA_EXEMPLO, subpasta), campanha / subpasta)
+    shutil.copy(os.path.join(PASTA_EXEMPLO, 'coordenadas.csv'), campanha / 'coordenadas.csv')
+    caminho = fn.empacotar_campanha(str(campanha), str(tmp_path / 'campanha.zip'))
+    yield caminho
+    fn.fechar_pacote(caminho)
+
+
+def test_verificar_pasta_salva_relatorio_ao_lado_do_pacote(pacote):
+    cq.verificar_pasta(pacote, salvar_csv=True)
+    assert os.path.isfile(os.path.join(os.path.dirname(pacote), 'relatorio_qc.csv'))
+
+
+def test_metricas_campanha_salva_tabela_ao_lado_do_pacote(pacote):
+    df = mf.metricas_campanha(pacote, salvar_csv=True)
+    assert len(df) > 0
+    assert os.path.isfile(os.path.join(os.path.dirname(pacote), 'metricas_fotobiologicas.csv'))
+
+
+def test_comparar_campanhas_salva_tabelas_ao_lado_do_pacote(pacote):
+    cmp.comparar_campanhas(PASTA_EXEMPLO, pacote, salvar_csv=True)
+    for nome in ('comparacao_pontos.csv', 'comparacao_resumo.csv', 'comparacao_comprimentos_onda.csv'):
+        assert os.path.isfile(os.path.join(os.path.dirname(pacote), nome))
+
+
+def test_colorimetria_salva_tabelas_ao_lado_do_pacote(pacote):
+    cor.verificar_colorimetria(pacote, salvar_csv=True)
+    cor.rotular_tratamentos(pacote, salvar_csv=True)
+    for nome in ('verificacao_colorimetria.csv', 'etiquetas_colorimetria.csv'):
+        assert os.path.isfile(os.path.join(os.path.dirname(pacote), nome))
+
+
+def test_otimizar_campanha_salva_tabelas_ao_lado_do_pacote(pacote):
+    ol.otimizar_campanha(pacote, ppfd_alvo=100, resolucao=20, salvar_csv=True)
+    for nome in ('otimizacao_ajustes.csv', 'otimizacao_pontos.csv'):
+        assert os.path.isfile(os.path.join(os.path.dirname(pacote), nome))
+
+
+def test_ajustar_campanha_salva_validacao_ao_lado_do_pacote(pacote):
+    md.ajustar_campanha(pacote, salvar_csv=True)
+    for nome in ('validacao_dimerizacao.csv', 'validacao_dimerizacao_resumo.csv'):
+        assert os.path.isfile(os.path.join(os.path.dirname(pacote), nome))
+
+
+def test_detectar_anomalias_salva_revisao_ao_lado_do_pacote(pacote):
+    sim.detectar_anomalias(pacote, salvar_csv=True)
+    assert os.path.isfile(os.path.join(os.path.dirname(pacote), 'revisao_espectros.csv'))
+
+
+def test_reempacotar_descarta_pacote_aberto(pacote, tmp_path):
+    assert '0A' in fn.listar_pasta(pacote)
+    shutil.rmtree(tmp_path / 'campanha' / '0A')
+    fn.empacotar_campanha(str(tmp_path / 'campanha'), pacote)
+    assert '0A' not in fn.listar_pasta(pacote)
@@ -0,0 +1,46 @@
+import os
+import shutil
+import numpy as np
+import pytest
+from scipy.spatial import cKDTree
+import planejamento_amostragem as pa
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def pasta_esparsa(tmp_path):
+    # Tratamento com metade das posições medidas, para que sobre incerteza a reduzir
+    pasta = tmp_path / '100A'
+    shutil.copytree(os.path.join(PASTA_EXEMPLO, '100A'), pasta)
+    shutil.copy(os.path.join(PASTA_EXEMPLO, 'coordenadas.csv'), tmp_path / 'coordenadas.csv')
+    for arquivo in sorted(os.listdir(pasta))[1::2]:
+        os.remove(pasta / arquivo)
+    return str(pasta)
+
+
+def test_sugestoes_distintas_e_incerteza_decrescente(pasta_esparsa):
+    plano = pa.planejar_amostragem(pasta_esparsa, n_sugestoes=8, tolerancia=0.0)
+    sugestoes = plano['sugestoes']
+    assert len(sugestoes) == 8
+    posicoes = sugestoes[['linha', 'coluna']].to_numpy()
+    distancias = np.hypot(*(posicoes[:, None] - posicoes[None]).transpose(2, 0, 1))
+    medidos = plano['medidos'][['linha', 'coluna']].to_numpy(dtype=float)
+    espacamento = np.median(cKDTree(medidos).query(medidos, k=2)[0][:, 1])
+    assert distancias[np.triu_indices(len(posicoes), 1)].min() >= 0.5 * espacamento
+    incertezas = np.r_[plano['incerteza_relativa'], sugestoes['incerteza_apos']]
+    assert np.all(np.diff(incertezas) < 0)
+    assert not plano['parar'] and plano['pontos_para_tolerancia'] is None
+
+
+def test_criterio_de_parada(pasta_esparsa):
+    plano = pa.planejar_amostragem(pasta_esparsa, n_sugestoes=3, tolerancia=1.0)
+    assert plano['parar'] and plano['pontos_para_tolerancia'] == 0
+
+    completo = pa.planejar_amostragem(pasta_esparsa, n_sugestoes=10, tolerancia=0.0)
+    incertezas = completo['sugestoes']['incerteza_apos'].to_numpy()
+    tolerancia = (incertezas[3] + incertezas[4]) / 2
+    plano = pa.planejar_amostragem(pasta_esparsa, n_sugestoes=2, tolerancia=tolerancia)
+    assert not plano['parar']
+    assert plano['pontos_para_tolerancia'] == 5
+    np.testing.assert_allclose(plano['sugestoes']['incerteza_apos'], incertezas[:2])
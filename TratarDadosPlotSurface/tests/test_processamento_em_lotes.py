@@ -0,0 +1,44 @@
+import os
+import re
+import shutil
+import numpy as np
+import pandas as pd
+import functions as fn
+import processamento_em_lotes as pl
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_envelope_acumulado_sem_cancelamento():
+    rng = np.random.default_rng(1)
+    matriz = 1e8 + rng.normal(0, 1e-2, size=(1000, 5))
+    envelope = pl._EnvelopeAcumulado(np.arange(5.0))
+    for inicio in range(0, len(matriz), 37):
+        envelope.acumular(matriz[inicio:inicio + 37])
+    tabela = envelope.tabela('g')
+    np.testing.assert_allclose(tabela['media'], matriz.mean(axis=0), rtol=1e-14)
+    np.testing.assert_allclose(tabela['desvio'], matriz.std(axis=0, ddof=1), rtol=1e-6)
+
+
+def test_envelope_reamostra_espectros_em_outra_grade(tmp_path):
+    pasta = tmp_path / 'raiz' / '0A'
+    shutil.copytree(os.path.join(PASTA_EXEMPLO, '0A'), pasta)
+    arquivos = sorted(f for f in os.listdir(pasta) if f.startswith('ESPD_'))
+    # O primeiro arquivo do segundo lote passa a ter o bloco espectral a cada 2 nm
+    with open(pasta / arquivos[3]) as f:
+        linhas = [linha for linha in f if not (re.match(r'^(\d+)nm\t', linha) and int(linha.split('nm')[0]) % 2)]
+    with open(pasta / arquivos[3], 'w') as f:
+        f.writelines(linhas)
+
+    resumo = pl.processar_arquivo_em_lotes(str(tmp_path / 'raiz'), str(tmp_path / 'saida'), tamanho_lote=3)
+    envelope = pd.read_csv(resumo['envelopes_csv'])
+    wl = envelope['Wavelength(nm)'].to_numpy()
+    assert len(wl) == 401
+
+    esperado = []
+    for arquivo in arquivos:
+        _, wl_arquivo, espectro = fn.ler_arquivo_espd(str(pasta / arquivo))
+        esperado.append(np.interp(wl, wl_arquivo, espectro.astype(np.float32)))
+    esperado = np.vstack(esperado)
+    np.testing.assert_allclose(envelope['media'], esperado.mean(axis=0), rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(envelope['desvio'], esperado.std(axis=0, ddof=1), rtol=1e-4, atol=1e-7)
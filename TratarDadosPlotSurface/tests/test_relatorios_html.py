@@ -0,0 +1,23 @@
+import os
+import plotly.graph_objects as go
+import plotly.offline
+import functions as fn
+
+
+def test_relatorios_locais_reaproveitam_o_bundle(tmp_path, monkeypatch):
+    chamadas = []
+    original = plotly.offline.get_plotlyjs
+    monkeypatch.setattr(plotly.offline, 'get_plotlyjs', lambda: chamadas.append(1) or original())
+    fig = go.Figure(go.Scatter(x=[1, 2], y=[3, 4]))
+
+    primeiro = fn.gravar_relatorio_html(fig, 'A', '', '', 'a.html', str(tmp_path), modo_plotlyjs='local', abrir=False)
+    segundo = fn.gravar_relatorio_html(fig, 'B', '', '', 'b.html', str(tmp_path), modo_plotlyjs='local', abrir=False)
+    assert len(chamadas) == 1
+    assert os.listdir(tmp_path / 'assets') == [f'plotly-{plotly.offline.get_plotlyjs_version()}.min.js']
+
+    bundle = os.path.getsize(next((tmp_path / 'assets').iterdir()))
+    for saida in (primeiro, segundo):
+        with open(saida, encoding='utf-8') as f:
+            html = f.read()
+        assert "src='assets/plotly-" in html
+        assert len(html) < bundle / 10
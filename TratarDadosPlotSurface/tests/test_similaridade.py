@@ -0,0 +1,24 @@
+import os
+import shutil
+import similaridade as sim
+
+PASTA_EXEMPLO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUBPASTAS = ['0A', '0B', '0T', '0V', '100A', '100B', '100V', '99100']
+
+
+def test_leitura_salva_na_subpasta_errada_e_marcada(tmp_path):
+    for subpasta in SUBPASTAS:
+        destino = tmp_path / subpasta
+        destino.mkdir()
+        for arquivo in os.listdir(os.path.join(PASTA_EXEMPLO, subpasta)):
+            if arquivo.startswith('uMOL_'):
+                shutil.copy(os.path.join(PASTA_EXEMPLO, subpasta, arquivo), destino / arquivo)
+    # Leitura de 100V salva por engano em 0A, no lugar da leitura da mesma posição
+    shutil.move(str(tmp_path / '100V' / 'uMOL_339100V.txt'), str(tmp_path / '0A' / 'uMOL_3390A.txt'))
+
+    df = sim.detectar_anomalias(str(tmp_path), salvar_csv=True)
+    linha = df.set_index('arquivo').loc['uMOL_3390A.txt']
+    assert linha['revisar']
+    assert linha['grupo_vizinhos'] == '100V'
+    assert 'parece 100V' in linha['motivo']
+    assert os.path.isfile(tmp_path / 'revisao_espectros.csv')
@@ -0,0 +1,25 @@
+import numpy as np
+import volume_luz as vl
+
+
+def test_trilinear_reproduz_campo_linear():
+    eixo_x = np.array([0.0, 1.0, 2.5, 4.0])
+    eixo_y = np.array([-1.0, 0.5, 3.0])
+    eixo_z = np.array([10.0, 20.0, 35.0])
+    zz, yy, xx = np.meshgrid(eixo_z, eixo_y, eixo_x, indexing='ij')
+    campo = 2 * xx - 3 * yy + 0.5 * zz + 1
+    dados = np.stack([campo, -campo], axis=-1)
+
+    rng = np.random.default_rng(0)
+    x, y, z = rng.uniform(0, 4, 50), rng.uniform(-1, 3, 50), rng.uniform(10, 35, 50)
+    resultado = vl._trilinear(dados, eixo_z, eixo_y, eixo_x, x, y, z)
+    esperado = 2 * x - 3 * y + 0.5 * z + 1
+    assert resultado.shape == (50, 2)
+    np.testing.assert_allclose(resultado[:, 0], esperado)
+    np.testing.assert_allclose(resultado[:, 1], -esperado)
+
+    # Broadcasting de um escalar de altura e NaN fora do volume
+    plano = vl._trilinear(campo, eixo_z, eixo_y, eixo_x, x[:, None], y[None, :5], 20.0)
+    assert plano.shape == (50, 5)
+    np.testing.assert_allclose(plano, 2 * x[:, None] - 3 * y[None, :5] + 11)
+    assert np.isnan(vl._trilinear(campo, eixo_z, eixo_y, eixo_x, 5.0, 0.0, 20.0))
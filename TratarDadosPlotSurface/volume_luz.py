@@ -0,0 +1,297 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import functions as fn
+import modelo_dimerizacao as md
+
+# Arquivo da pasta principal que associa cada pasta de plano à altura de medição (colunas 'pasta' e 'altura', em cm)
+ARQUIVO_ALTURAS = 'alturas.csv'
+
+# Espaçamento das camadas pré-calculadas do volume entre os planos medidos (cm)
+PASSO_ALTURA_CM = 1.0
+
+# Volumes montados na sessão, por pasta e parâmetros; consultas seguintes não releem os planos
+_VOLUMES = {}
+
+
+def ler_alturas(pasta_principal: str) -> dict:
+    """
+    Lê o arquivo alturas.csv da pasta principal (ou do pacote de campanha), que estende o layout das coordenadas com a
+    dimensão Z: cada linha associa uma subpasta de plano ('pasta') à altura em que ela foi medida ('altura', em cm).
+
+    Returns:
+        dict: {pasta: altura}.
+    """
+    caminho = os.path.join(pasta_principal, ARQUIVO_ALTURAS)
+    if not fn.existe(caminho):
+        raise ValueError(f"Arquivo '{ARQUIVO_ALTURAS}' não encontrado em {pasta_principal}. "
+                         "Ele deve ter as colunas 'pasta' e 'altura' (cm).")
+    df = fn.ler_csv(caminho)
+    faltando = {'pasta', 'altura'} - set(df.columns)
+    if faltando:
+        raise ValueError(f"Colunas ausentes em {ARQUIVO_ALTURAS}: {', '.join(sorted(faltando))}.")
+    return dict(zip(df['pasta'].astype(str), df['altura'].astype(float)))
+
+
+def montar_volume(pasta_principal: str, alturas: dict = None, resolucao: int = 50,
+                  passo_altura: float = PASSO_ALTURA_CM, metodo: str = 'linear', espectros: bool = True) -> dict:
+    """
+    Monta o modelo 3D do volume de luz a partir de planos medidos em alturas diferentes. Cada plano é uma subpasta de
+    tratamento com as mesmas posições (X, Y) da grade; as posições são alinhadas entre os planos por
+    modelo_dimerizacao.carregar_cubo e levadas às coordenadas reais de coordenadas.csv.
+
+    Os pesos de interpolação no plano (calcular_pesos_interpolacao) são calculados uma única vez, e PPFD, PFD e todos os
+    comprimentos de onda de todos os planos são interpolados para a grade resolucao x resolucao em um único produto
+    matricial. Entre os planos a interpolação é linear em Z: o volume de PPFD e PFD é pré-calculado em camadas a cada
+    'passo_altura' cm, e os espectros ficam guardados apenas nos planos medidos (são combinados na consulta).
+
+    Args:
+        pasta_principal (str): Pasta principal (ou pacote de campanha) com as subpastas dos planos.
+        alturas (dict, opcional): {subpasta: altura em cm}. Padrão é None (lido de alturas.csv).
+        resolucao (int, opcional): Lado da grade no plano. Padrão é 50.
+        passo_altura (float, opcional): Espaçamento das camadas pré-calculadas (cm). Padrão é PASSO_ALTURA_CM.
+        metodo (str, opcional): Interpolação no plano, 'linear' ou 'cubic'. Padrão é 'linear'.
+        espectros (bool, opcional): Se True, guarda os espectros interpolados de cada plano. Padrão é True.
+
+    Returns:
+        dict: {'x', 'y', 'z' (eixos da grade; 'z' são as alturas das camadas), 'variaveis' ('PPFD', 'PFD'),
+            'volume' (camadas x y x x x variáveis, float32), 'alturas' (alturas dos planos medidos), 'pastas',
+            'espectros_planos' (planos x y x x x wl, float32, ou None), 'wl', 'pontos' (DataFrame com as posições
+            medidas e a PPFD de cada plano), 'metodo', 'tempo_s'}.
+
+    Exemplo:
+        volume = montar_volume('Caminho/para/pasta_principal')
+        plano = plano_na_altura(volume, 35)
+    """
+    try:
+        inicio = time.perf_counter()
+        alturas = alturas or ler_alturas(pasta_principal)
+        planos = sorted(alturas.items(), key=lambda item: item[1])
+        nomes = [p for p, _ in planos]
+        z_planos = np.array([a for _, a in planos], dtype=float)
+        if len(planos) < 2:
+            raise ValueError('São necessários pelo menos dois planos em alturas diferentes.')
+        if np.any(np.diff(z_planos) <= 0):
+            raise ValueError('Cada plano precisa de uma altura diferente.')
+        if passo_altura <= 0:
+            raise ValueError('O passo entre camadas precisa ser positivo.')
+        pastas = [os.path.join(pasta_principal, p) for p in nomes]
+        faltando = [p for p, c in zip(nomes, pastas) if not fn.eh_pasta(c)]
+        if faltando:
+            raise ValueError(f"Pastas de plano não encontradas: {', '.join(faltando)}.")
+
+        cubo = md.carregar_cubo(pastas)
+        wl = cubo['wl']
+        medidos = cubo['medidos'] if espectros else cubo['medidos'][:, :, -2:]
+        n_planos, n_pontos, n_canais = medidos.shape
+
+        pontos = pd.DataFrame({'linha': cubo['X'].astype(np.int64), 'coluna': cubo['Y'].astype(np.int64)})
+        pontos = fn.mesclar_coordenadas(pontos, pastas[0])
+        x, y = pontos['linha'].to_numpy(dtype=float), pontos['coluna'].to_numpy(dtype=float)
+        eixo_x = np.linspace(x.min(), x.max(), resolucao)
+        eixo_y = np.linspace(y.min(), y.max(), resolucao)
+        xi, yi = np.meshgrid(eixo_x, eixo_y)
+
+        # Uma triangulação e um produto para todos os planos e canais: z é pontos x (planos * canais)
+        pesos = fn.calcular_pesos_interpolacao(x, y, xi, yi)
+        grade = fn.interpolar_com_pesos(pesos, medidos.transpose(1, 0, 2).reshape(n_pontos, -1), metodo=metodo)
+        grade = grade.reshape(resolucao, resolucao, n_planos, n_canais).transpose(2, 0, 1, 3).astype(np.float32)
+        # A interpolação cúbica pode passar um pouco abaixo de zero perto de pontos escuros
+        np.maximum(grade, 0, out=grade)
+
+        eixo_z = np.union1d(np.arange(z_planos[0], z_planos[-1], passo_altura), z_planos)
+        i0, t = _indices_fracionarios(z_planos, eixo_z)
+        t = t.astype(np.float32)[:, None, None, None]
+        volume = (1 - t) * grade[i0, :, :, -2:] + t * grade[i0 + 1, :, :, -2:]
+
+        for i, nome in enumerate(nomes):
+            pontos[f'PPFD_{nome}'] = medidos[i, :, -2]
+        tempo = time.perf_counter() - inicio
+        print(f'Volume montado: {n_planos} planos entre {z_planos[0]:g} e {z_planos[-1]:g} cm, '
+              f'{len(eixo_z)} camadas de {resolucao} x {resolucao} ({tempo:.2f} s)')
+        return {
+            'x': eixo_x,
+            'y': eixo_y,
+            'z': eixo_z,
+            'variaveis': ('PPFD', 'PFD'),
+            'volume': volume,
+            'alturas': z_planos,
+            'pastas': nomes,
+            'espectros_planos': grade[..., :len(wl)] if espectros else None,
+            'wl': wl,
+            'pontos': pontos,
+            'metodo': metodo,
+            'tempo_s': tempo,
+        }
+    except Exception as e:
+        print(f'Erro ao montar o volume de luz: {e}')
+        raise
+
+
+def volume_campanha(pasta_principal: str, alturas: dict = None, resolucao: int = 50,
+                    passo_altura: float = PASSO_ALTURA_CM, metodo: str = 'linear', espectros: bool = True) -> dict:
+    """Como montar_volume, mas guarda o volume na sessão: chamadas seguintes com os mesmos parâmetros não releem os planos."""
+    alturas = alturas or ler_alturas(pasta_principal)
+    chave = (os.path.abspath(pasta_principal), tuple(sorted(alturas.items())), resolucao, passo_altura, metodo,
+             espectros)
+    if chave not in _VOLUMES:
+        _VOLUMES[chave] = montar_volume(pasta_principal, alturas, resolucao, passo_altura, metodo, espectros)
+    return _VOLUMES[chave]
+
+
+def _indices_fracionarios(eixo: np.ndarray, valores) -> tuple:
+    """
+    Índice da célula e fração dentro dela de cada valor em um eixo crescente (regular ou não). Valores fora do eixo
+    recebem fração NaN, para que a interpolação devolva NaN.
+    """
+    valores = np.asarray(valores, dtype=float)
+    posicao = np.interp(valores, eixo, np.arange(len(eixo)))
+    i0 = np.clip(np.floor(posicao).astype(np.int64), 0, len(eixo) - 2)
+    t = posicao - i0
+    t[(valores < eixo[0]) | (valores > eixo[-1]) | np.isnan(valores)] = np.nan
+    return i0, t
+
+
+def _trilinear(dados: np.ndarray, eixo_z: np.ndarray, eixo_y: np.ndarray, eixo_x: np.ndarray, x, y, z) -> np.ndarray:
+    """
+    Interpolação trilinear vetorizada em 'dados' (z x y x x x ...), nos pontos (x, y, z) com broadcasting.
+    Devolve a forma dos pontos seguida das dimensões restantes de 'dados'.
+    """
+    x, y, z = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(z, dtype=float))
+    ix, tx = _indices_fracionarios(eixo_x, x.ravel())
+    iy, ty = _indices_fracionarios(eixo_y, y.ravel())
+    iz, tz = _indices_fracionarios(eixo_z, z.ravel())
+    extra = (slice(None),) + (None,) * (dados.ndim - 3)
+    tx, ty, tz = tx[extra], ty[extra], tz[extra]
+    resultado = 0.0
+    for dz, pz in ((0, 1 - tz), (1, tz)):
+        for dy, py in ((0, 1 - ty), (1, ty)):
+            for dx, px in ((0, 1 - tx), (1, tx)):
+                resultado = resultado + pz * py * px * dados[iz + dz, iy + dy, ix + dx]
+    return np.asarray(resultado).reshape(x.shape + dados.shape[3:])
+
+
+def consultar(volume: dict, x, y, z, variavel: str = 'PPFD') -> np.ndarray:
+    """
+    Consulta PPFD ou PFD em pontos quaisquer (x, y em coordenadas reais, z em cm) por interpolação trilinear no volume
+    pré-calculado. Aceita escalares ou arrays (com broadcasting); NaN fora do volume.
+
+    Exemplo:
+        ppfd = consultar(volume, x=30, y=45, z=35)
+    """
+    try:
+        if variavel not in volume['variaveis']:
+            raise ValueError(f"Variável desconhecida: {variavel}. Use {' ou '.join(volume['variaveis'])}.")
+        dados = volume['volume'][..., volume['variaveis'].index(variavel)]
+        return _trilinear(dados, volume['z'], volume['y'], volume['x'], x, y, z)
+    except Exception as e:
+        print(f'Erro ao consultar o volume de luz: {e}')
+        raise
+
+
+def espectro_em(volume: dict, x, y, z) -> np.ndarray:
+    """
+    Espectro interpolado (mW m⁻² nm⁻¹) em pontos quaisquer do volume: bilinear na grade de cada plano e linear em Z
+    entre os dois planos medidos mais próximos. Devolve a forma dos pontos seguida dos comprimentos de onda.
+    """
+    try:
+        if volume['espectros_planos'] is None:
+            raise ValueError('O volume foi montado sem espectros: use montar_volume(..., espectros=True).')
+        return _trilinear(volume['espectros_planos'], volume['alturas'], volume['y'], volume['x'], x, y, z)
+    except Exception as e:
+        print(f'Erro ao consultar o espectro no volume: {e}')
+        raise
+
+
+def plano_na_altura(volume: dict, altura: float) -> pd.DataFrame:
+    """
+    Plano horizontal do volume em uma altura qualquer entre os planos medidos, combinando as duas camadas
+    pré-calculadas mais próximas. O resultado segue o formato da extração ('linha', 'coluna', 'PPFD', 'PFD', 'ID'),
+    e pode ser plotado com as funções de superfície de functions.py.
+
+    Exemplo:
+        df = plano_na_altura(volume, 35)
+        fn.plotar_surface_ppfd(df, interpolar='linear')
+    """
+    try:
+        if not volume['z'][0] <= altura <= volume['z'][-1]:
+            raise ValueError(f"Altura {altura:g} cm fora dos planos medidos "
+                             f"({volume['z'][0]:g} a {volume['z'][-1]:g} cm).")
+        i0, t = _indices_fracionarios(volume['z'], [altura])
+        camada = (1 - t[0]) * volume['volume'][i0[0]] + t[0] * volume['volume'][i0[0] + 1]
+        xi, yi = np.meshgrid(volume['x'], volume['y'])
+        df = pd.DataFrame({'linha': xi.ravel(), 'coluna': yi.ravel()})
+        for k, variavel in enumerate(volume['variaveis']):
+            df[variavel] = camada[..., k].ravel()
+        df['ID'] = f'{altura:g} cm'
+        return df.dropna(subset=list(volume['variaveis'])).reset_index(drop=True)
+    except Exception as e:
+        print(f'Erro ao extrair o plano do volume: {e}')
+        raise
+
+
+def plotar_fatias(volume: dict, alturas=None, variavel: str = 'PPFD') -> None:
+    """
+    Plota fatias horizontais do volume (por padrão, nos planos medidos), coloridas pela variável e com a mesma escala
+    de cores, empilhadas na altura em que estão.
+    """
+    try:
+        alturas = volume['alturas'] if alturas is None else np.atleast_1d(np.asarray(alturas, dtype=float))
+        k = volume['variaveis'].index(variavel)
+        rotulo = fn.ROTULOS_VARIAVEIS.get(variavel, variavel)
+        fora = (alturas < volume['z'][0]) | (alturas > volume['z'][-1])
+        if fora.any():
+            raise ValueError(f"Alturas fora dos planos medidos ({volume['z'][0]:g} a {volume['z'][-1]:g} cm): "
+                             + ', '.join(f'{a:g}' for a in alturas[fora]) + '.')
+        camadas = [(1 - t) * volume['volume'][i, ..., k] + t * volume['volume'][i + 1, ..., k]
+                   for i, t in zip(*_indices_fracionarios(volume['z'], alturas))]
+        cmin = min(np.nanmin(c) for c in camadas)
+        cmax = max(np.nanmax(c) for c in camadas)
+        fig = go.Figure()
+        for i, (altura, camada) in enumerate(zip(alturas, camadas)):
+            fig.add_trace(go.Surface(
+                x=volume['x'], y=volume['y'], z=np.full(camada.shape, altura), surfacecolor=camada,
+                cmin=cmin, cmax=cmax, colorscale='Viridis', showscale=i == 0, colorbar=dict(title=rotulo),
+                name=f'{altura:g} cm',
+                hovertemplate='X: %{x:.1f}<br>Y: %{y:.1f}<br>Altura: %{z:g} cm<br>'
+                              + variavel + ': %{surfacecolor:.1f}<extra></extra>'))
+        fig.update_layout(
+            title=f'{rotulo} por altura',
+            scene=dict(xaxis_title='Linha (X)', yaxis_title='Coluna (Y)', zaxis_title='Altura (cm)'),
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar as fatias do volume: {e}')
+        raise
+
+
+def plotar_isosuperficies(volume: dict, variavel: str = 'PPFD', n_superficies: int = 5) -> None:
+    """
+    Plota isosuperfícies da variável no volume (regiões de mesma PPFD ou PFD), entre os percentis 10 e 90 do volume.
+    Células fora do fecho dos pontos medidos entram como zero.
+    """
+    try:
+        k = volume['variaveis'].index(variavel)
+        rotulo = fn.ROTULOS_VARIAVEIS.get(variavel, variavel)
+        valores = volume['volume'][..., k]
+        zi, yi, xi = np.meshgrid(volume['z'], volume['y'], volume['x'], indexing='ij')
+        isomin, isomax = np.nanpercentile(valores, [10, 90])
+        fig = go.Figure(go.Isosurface(
+            x=xi.ravel(), y=yi.ravel(), z=zi.ravel(), value=np.nan_to_num(valores).ravel(),
+            isomin=isomin, isomax=isomax, surface_count=n_superficies, opacity=0.5,
+            caps=dict(x_show=False, y_show=False, z_show=False),
+            colorscale='Viridis', colorbar=dict(title=rotulo)))
+        fig.update_layout(
+            title=f'Isosuperfícies de {rotulo}',
+            scene=dict(xaxis_title='Linha (X)', yaxis_title='Coluna (Y)', zaxis_title='Altura (cm)'),
+            font=dict(family='Segoe UI, Segoe, Arial', size=14),
+            template='plotly_white',
+        )
+        fig.show()
+    except Exception as e:
+        print(f'Erro ao plotar as isosuperfícies do volume: {e}')
+        raise